@@ -0,0 +1,124 @@
+"""
+Benchmarks for Ulauncher's latency sensitive code paths.
+
+Each module is runnable on its own (ex `python -m benchmarks.client`) and writes its results as JSON to stdout,
+or to the file given with --output, so that results can be compared between commits.
+
+The micro benchmarks (protocol, matching and rendering) are pytest-benchmark tests in tests/benchmarks.
+To compare them between commits, save the results on the parent commit and compare against them on your branch:
+
+pytest tests/benchmarks --benchmark-autosave
+git checkout my-branch
+pytest tests/benchmarks --benchmark-compare --benchmark-compare-fail=median:10%
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from ulauncher.modes.poplauncher.result import Result
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Same as bin/ulauncher does when running from the source tree
+os.environ.setdefault("ULAUNCHER_SYSTEM_DATA_DIR", str(PROJECT_ROOT / "data" / "share" / "ulauncher"))
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """
+    Summarize timings given in seconds, as milliseconds
+    """
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+    return {
+        "runs": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def measure(func: Callable[[], Any], runs: int = 100, warmup: int = 3) -> dict[str, float]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def get_argument_parser(description: str, runs: int | None = 100) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    if runs is not None:
+        parser.add_argument("--runs", type=int, default=runs, help="Number of measured runs per benchmark")
+    parser.add_argument("--output", help="Write the results to this JSON file instead of stdout")
+    return parser
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(name: str, results: dict[str, Any], output: str | None = None) -> None:
+    data = {
+        "benchmark": name,
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    text = json.dumps(data, indent=2) + "\n"
+    if output:
+        Path(output).write_text(text)
+    else:
+        sys.stdout.write(text)
+
+
+def make_update_line(size: int) -> str:
+    """
+    Synthetic Update response, similar to what pop-launcher sends for a broad query
+    """
+    items = [
+        {
+            "id": index,
+            "name": f"Application {index}",
+            "description": f"/usr/share/applications/application-{index}.desktop",
+            "icon": {"Name": f"application-{index}"},
+            "category_icon": {"Name": "applications-other"},
+        }
+        for index in range(size)
+    ]
+    return json.dumps({"Update": items})
+
+
+def make_results(count: int) -> list[Result]:
+    return [
+        Result(
+            id=index,
+            name=f"Application {index}",
+            description=f"/usr/share/applications/application-{index}.desktop",
+            icon="application-x-executable",
+        )
+        for index in range(count)
+    ]
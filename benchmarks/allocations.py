@@ -0,0 +1,66 @@
+"""
+Check the memory allocated per rendered row by each stage of turning an Update into widgets against a budget.
+
+Exits with an error if any stage goes over its budget, so allocation regressions on the hot path fail CI.
+The decode and model stages don't need GTK. benchmarks.widget_allocations also checks the widget build
+(needs a display).
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any
+
+from benchmarks import get_argument_parser, make_update_line, write_results
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopResponse
+from ulauncher.modes.poplauncher.result import results_from_update
+from ulauncher.utils import allocations
+
+ROWS = 1000
+# Peak bytes allocated per row, with some headroom over the measured values
+# (the widget budget is a loose upper bound, since it depends on the GTK version and theme)
+BUDGET_PER_ROW = {
+    "decode": 1200,
+    "model": 200,
+    "widgets": 60_000,
+}
+
+
+def run_stages(rows: int, runs: int) -> None:
+    line = make_update_line(rows)
+    for _ in range(runs):
+        with allocations.stage("decode", rows=rows):
+            update = PopResponse.from_json(line)
+        with allocations.stage("model", rows=rows):
+            results_from_update(update)
+
+
+def check_budgets(name: str, stats: dict[str, dict[str, Any]], output: str | None) -> None:
+    """
+    Write the stats of the stages with their budget, and exit with an error if any stage is over its budget
+    """
+    results: dict[str, Any] = {}
+    over_budget = []
+    for stage, stage_stats in stats.items():
+        budget = BUDGET_PER_ROW[stage]
+        results[stage] = {**stage_stats, "budget_per_row": budget}
+        if stage_stats["peak_per_row"] > budget:
+            over_budget.append(f"{stage}: {stage_stats['peak_per_row']:.0f} > {budget} bytes per row")
+
+    write_results(name, results, output)
+    if over_budget:
+        sys.exit("Allocation budget exceeded:\n" + "\n".join(over_budget))
+
+
+def main() -> None:
+    args = get_argument_parser(__doc__ or "", runs=20).parse_args()
+
+    allocations.set_enabled(True)
+    run_stages(ROWS, args.runs)
+    stats = allocations.get_stats()
+    allocations.set_enabled(False)
+    check_budgets("allocations", stats, args.output)
+
+
+if __name__ == "__main__":
+    main()
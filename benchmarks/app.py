@@ -0,0 +1,56 @@
+"""
+Helpers for benchmarks that need a running UlauncherApp. These need a display, but work headless,
+ex with `xvfb-run python -m benchmarks.widget_allocations` or with the Broadway backend
+(`broadwayd :5 & GDK_BACKEND=broadway BROADWAY_DISPLAY=:5 python -m benchmarks.widget_allocations`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shlex
+import sys
+from collections.abc import Callable
+from typing import Any
+
+# Don't connect to a running Ulauncher instance. Has to be set before importing ulauncher.config
+os.environ["ULAUNCHER_APP_ID"] = "io.ulauncher.Ulauncher.benchmark"
+
+from gi.events import GLibEventLoopPolicy  # noqa: E402
+from gi.repository import GLib  # noqa: E402
+
+from ulauncher.ui.UlauncherApp import UlauncherApp  # noqa: E402
+from ulauncher.utils.Settings import get_settings  # noqa: E402
+
+
+def use_fake_launcher(*args: str) -> None:
+    """
+    Run the window against the fake pop-launcher (with the given arguments), so results are reproducible
+    and pop-launcher doesn't have to be installed
+    """
+    command = [sys.executable, "-m", "ulauncher.modes.poplauncher.fake_launcher", *args]
+    get_settings().pop_launcher_command = shlex.join(command)
+
+
+def run_with_app(start: Callable[[UlauncherApp, Callable[[dict[str, Any]], None]], None]) -> dict[str, Any]:
+    """
+    Start the app and call start(app, finish) once it's running. The benchmark calls finish(results) when done
+    """
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
+    app = UlauncherApp.get_instance()
+    results: dict[str, Any] = {}
+
+    def finish(benchmark_results: dict[str, Any]) -> None:
+        results.update(benchmark_results)
+        app.quit()
+
+    def on_startup(_app: UlauncherApp) -> None:
+        def run() -> bool:
+            start(app, finish)
+            return False
+
+        GLib.idle_add(run)
+
+    app.connect("startup", on_startup)
+    app.run(["ulauncher", "--no-window"])
+    return results
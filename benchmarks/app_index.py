@@ -0,0 +1,124 @@
+"""
+Benchmark the in-process application index on a synthetic corpus of desktop entries.
+
+Measures the full scan (parsing every desktop file), loading the persisted store and re-scanning
+without changes (only stat calls), and queries of different lengths (uncached, like new keystrokes).
+"""
+
+from __future__ import annotations
+
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import get_argument_parser, measure, write_results
+from ulauncher.modes.apps.app_index import AppIndex
+from ulauncher.utils import fuzzy_search
+
+WORDS = [
+    "firefox",
+    "web",
+    "browser",
+    "libre",
+    "office",
+    "writer",
+    "calc",
+    "impress",
+    "terminal",
+    "text",
+    "editor",
+    "files",
+    "manager",
+    "settings",
+    "system",
+    "monitor",
+    "image",
+    "viewer",
+    "video",
+    "player",
+    "music",
+    "mail",
+    "calendar",
+    "contacts",
+    "maps",
+    "weather",
+    "clock",
+    "calculator",
+    "disks",
+    "backup",
+    "software",
+    "center",
+    "screenshot",
+    "recorder",
+    "code",
+    "studio",
+    "game",
+    "chess",
+    "solitaire",
+    "mines",
+    "network",
+    "tools",
+    "remote",
+    "desktop",
+]
+QUERIES = ("f", "te", "fire", "lbroffice", "system monitor", "zzzz")
+
+
+def make_corpus(app_dir: Path, count: int, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    app_dir.mkdir(parents=True, exist_ok=True)
+    for index in range(count):
+        name = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 3)))
+        keywords = ";".join(rng.sample(WORDS, 3))
+        (app_dir / f"org.example.App{index}.desktop").write_text(
+            "[Desktop Entry]\n"
+            "Type=Application\n"
+            f"Name={name} {index}\n"
+            f"Comment=Synthetic application {index}\n"
+            f"Exec=app{index} %U\n"
+            f"Icon=app{index}\n"
+            f"Keywords={keywords};\n"
+            "\n[Desktop Action new-window]\nName=New Window\nExec=app --new-window\n"
+        )
+
+
+def run_query(index: AppIndex, query: str) -> None:
+    fuzzy_search.get_matching_blocks.cache_clear()
+    index.query(query, 25)
+
+
+def main() -> None:
+    parser = get_argument_parser(__doc__ or "", runs=200)
+    parser.add_argument("--entries", type=int, default=10_000, help="Number of desktop entries in the corpus")
+    args = parser.parse_args()
+
+    results: dict[str, object] = {"entries": args.entries}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_dir = Path(tmp_dir) / "applications"
+        store_path = Path(tmp_dir) / "app_index.json"
+        make_corpus(app_dir, args.entries)
+
+        start = time.perf_counter()
+        index = AppIndex([str(app_dir)], store_path)
+        index.refresh()
+        len(index)  # builds the search index
+        results["cold_scan_ms"] = (time.perf_counter() - start) * 1000
+        index.save()
+        results["store_bytes"] = store_path.stat().st_size
+
+        start = time.perf_counter()
+        index = AppIndex([str(app_dir)], store_path)
+        parsed = index.refresh()
+        len(index)
+        results["warm_start_ms"] = (time.perf_counter() - start) * 1000
+        assert parsed == 0, "the warm start should not parse any files"
+
+        for query in QUERIES:
+            results[f"query_{query.replace(' ', '_')}"] = measure(lambda q=query: run_query(index, q), args.runs)
+
+    write_results("app_index", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
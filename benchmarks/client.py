@@ -0,0 +1,43 @@
+"""
+Compare the cost of forwarding an activation with the lightweight client versus the full Ulauncher startup.
+
+The import benchmarks run in fresh interpreters, because that is what every hotkey press pays for.
+Pass --activate to also time complete activations of a running Ulauncher instance.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+
+from benchmarks import PROJECT_ROOT, get_argument_parser, measure, write_results
+from ulauncher.config import APP_ID
+
+
+def run_python(code: str) -> None:
+    subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
+
+
+def main() -> None:
+    parser = get_argument_parser(__doc__ or "", runs=20)
+    parser.add_argument("--activate", action="store_true", help="Also activate a running Ulauncher instance")
+    args = parser.parse_args()
+
+    results = {
+        "interpreter": measure(lambda: run_python("pass"), args.runs),
+        "import_client": measure(lambda: run_python("import ulauncher.client"), args.runs),
+        "import_full": measure(lambda: run_python("import ulauncher.main"), args.runs),
+    }
+    if args.activate:
+        results["activate_client"] = measure(
+            lambda: run_python("from ulauncher.client import activate; assert activate()"), args.runs
+        )
+        results["activate_gapplication"] = measure(
+            lambda: subprocess.run(["gapplication", "launch", APP_ID], check=True), args.runs
+        )
+
+    write_results("client", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
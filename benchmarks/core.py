@@ -0,0 +1,97 @@
+"""
+Benchmark the GTK-free search core against the fake pop-launcher, without a display.
+
+Measures the time from sending a search to having its ranked results, with the core running in this process
+(StdioPopLauncherProvider merged by a ResultFanout, on a plain asyncio loop) and with the core in the worker
+process (`python -m ulauncher.core.worker`), which adds the channel round trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import shlex
+import sys
+import time
+from typing import Any
+
+from benchmarks import PROJECT_ROOT, get_argument_parser, summarize, write_results
+from ulauncher.core import channel
+from ulauncher.core.ResultFanout import ResultFanout
+from ulauncher.core.StdioPopLauncher import StdioPopLauncherProvider
+
+SIZES = (10, 100, 1000)
+QUERIES = ("f", "fi", "fir", "fire", "firef")
+
+
+def get_fake_launcher_command(items: int) -> list[str]:
+    return [sys.executable, "-m", "ulauncher.modes.poplauncher.fake_launcher", "--items", str(items), "--latency", "0"]
+
+
+async def measure_in_process(items: int, runs: int) -> dict[str, float]:
+    pop_launcher = StdioPopLauncherProvider(lambda _response: None, get_fake_launcher_command(items))
+    fanout = ResultFanout([pop_launcher], deadline_ms=50, timeout_ms=5000)
+    samples = []
+    try:
+        for run in range(runs + 1):
+            start = time.perf_counter()
+            async for _results in fanout.search(QUERIES[run % len(QUERIES)]):
+                pass
+            if run:  # The first search includes starting pop-launcher
+                samples.append(time.perf_counter() - start)
+    finally:
+        process = pop_launcher.process
+        pop_launcher.stop()
+        if process:
+            await asyncio.to_thread(process.wait)
+    return summarize(samples)
+
+
+async def measure_worker(items: int, runs: int) -> dict[str, float]:
+    worker = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "ulauncher.core.worker",
+        "--pop-launcher-command",
+        shlex.join(get_fake_launcher_command(items)),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        cwd=PROJECT_ROOT,
+        # Result batches are one line each
+        limit=16 * 1024 * 1024,
+    )
+    assert worker.stdin
+    assert worker.stdout
+    samples = []
+    try:
+        for run in range(runs + 1):
+            start = time.perf_counter()
+            worker.stdin.write(channel.encode(["search", run, QUERIES[run % len(QUERIES)]]).encode())
+            message: list[Any] = []
+            while message[:2] != ["done", run]:
+                message = channel.decode(await worker.stdout.readline())
+                if message[0] == "results":
+                    results = list(map(channel.decode_result, message[2]))
+            assert len(results) == items
+            if run:  # The first search includes starting the worker and pop-launcher
+                samples.append(time.perf_counter() - start)
+    finally:
+        worker.stdin.write(channel.encode(["exit"]).encode())
+        await worker.wait()
+    return summarize(samples)
+
+
+async def run(runs: int) -> dict[str, Any]:
+    results = {}
+    for size in SIZES:
+        results[f"in_process_{size}"] = await measure_in_process(size, runs)
+        results[f"worker_{size}"] = await measure_worker(size, runs)
+    return results
+
+
+def main() -> None:
+    args = get_argument_parser(__doc__ or "", runs=50).parse_args()
+    write_results("core", asyncio.run(run(args.runs)), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare building the result model of a 1000 row Update with the slotted Result (activated by id through the
+provider) against the previous plain dataclass with one activation closure per row.
+"""
+
+from __future__ import annotations
+
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any
+
+from benchmarks import get_argument_parser, make_update_line, measure, write_results
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopResponse, SearchResult
+from ulauncher.modes.poplauncher.result import results_from_update
+
+ROWS = 1000
+
+
+@dataclass
+class ClosureResult:
+    """
+    The result model before it was slotted
+    """
+
+    on_enter: Any
+    searchable: bool = True
+    compact: bool = False
+    highlightable: bool = False
+    name: str = ""
+    description: str = ""
+    icon: str = ""
+
+
+def closure_results_from_update(update: list[SearchResult], activate) -> list[ClosureResult]:
+    def make_on_enter(id):
+        def on_enter(_query):
+            activate(id)
+            return False
+
+        return on_enter
+
+    return [
+        ClosureResult(
+            name=r["name"],
+            description=r["description"],
+            icon=r.get("icon", {}).get("Name", ""),
+            on_enter=make_on_enter(r["id"]),
+        )
+        for r in update
+    ]
+
+
+def measure_retained_bytes(build) -> int:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        results = build()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del results
+    return retained
+
+
+def main() -> None:
+    args = get_argument_parser(__doc__ or "").parse_args()
+    update = PopResponse.from_json(make_update_line(ROWS))
+
+    def build_before():
+        return closure_results_from_update(update, lambda _id: None)
+
+    def build_after():
+        return results_from_update(update)
+
+    results = {
+        "before_closures": {
+            **measure(build_before, args.runs),
+            "retained_bytes": measure_retained_bytes(build_before),
+        },
+        "after_slotted": {
+            **measure(build_after, args.runs),
+            "retained_bytes": measure_retained_bytes(build_after),
+        },
+    }
+    write_results("result_model", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Drive a real UlauncherWindow with scripted keystrokes, and report per-keystroke time-to-paint and dropped frames.
+
+Keystrokes are fed into the input at a fixed rate, against the fake pop-launcher with the given latency.
+Time-to-paint of typed keys is measured from the input change until the results for it have been painted
+(using the keystroke spans from ulauncher.utils.tracing), and for navigation keys until the next paint.
+A tick callback keeps the frame clock running during the scenario, so any main loop stall shows up as
+a frame interval longer than the refresh interval.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+from gi.repository import Gdk, GLib, Gtk
+
+from benchmarks import get_argument_parser, summarize, write_results
+from benchmarks.app import run_with_app, use_fake_launcher
+from ulauncher.ui.UlauncherApp import UlauncherApp
+from ulauncher.ui.windows.UlauncherWindow import UlauncherWindow
+from ulauncher.utils import tracing
+
+DEFAULT_REFRESH_INTERVAL_US = 16667
+# Give the last results time to arrive and be painted before ending a scenario
+SETTLE_MS = 500
+
+Keystroke = tuple[str, str]  # (kind, key) where kind is "type", "backspace" or "key"
+
+
+def type_text(text: str) -> list[Keystroke]:
+    return [("type", char) for char in text]
+
+
+SCENARIOS: dict[str, list[Keystroke]] = {
+    "typing": type_text("firefox web browser"),
+    "backspace_storm": [*type_text("libreoffice writer"), *[("backspace", "")] * 18],
+    "navigation": [
+        *type_text("a"),
+        *[("key", "Down")] * 10,
+        *[("key", "Up")] * 5,
+        *[("key", f"<Alt>{index}") for index in range(1, 6)],
+    ],
+}
+
+
+class TypingScenario:
+    def __init__(self, window: UlauncherWindow, keystrokes: list[Keystroke], keys_per_second: float) -> None:
+        self.window = window
+        self.keystrokes = list(keystrokes)
+        self.interval_ms = int(1000 / keys_per_second)
+        self.navigation_samples: list[float] = []
+        self.frame_intervals: list[int] = []
+        self.refresh_interval_us = DEFAULT_REFRESH_INTERVAL_US
+        self._last_frame_time = 0
+        self._tick_id = 0
+
+    def run(self, on_done: Callable[[dict[str, Any]], None]) -> None:
+        self.window.input.set_text("")
+        tracing.set_enabled(True)
+        self._tick_id = self.window.add_tick_callback(self.on_tick)
+
+        def settled() -> bool:
+            on_done(self.finish())
+            return False
+
+        def send_next() -> bool:
+            if not self.keystrokes:
+                GLib.timeout_add(SETTLE_MS, settled)
+                return False
+            self.send(*self.keystrokes.pop(0))
+            return True
+
+        GLib.timeout_add(self.interval_ms, send_next)
+
+    def on_tick(self, _widget: UlauncherWindow, frame_clock: Gdk.FrameClock) -> bool:
+        frame_time = frame_clock.get_frame_time()
+        refresh_interval, _presentation_time = frame_clock.get_refresh_info(frame_time)
+        if refresh_interval:
+            self.refresh_interval_us = refresh_interval
+        if self._last_frame_time:
+            self.frame_intervals.append(frame_time - self._last_frame_time)
+        self._last_frame_time = frame_time
+        return GLib.SOURCE_CONTINUE
+
+    def send(self, kind: str, key: str) -> None:
+        entry = self.window.input
+        if kind == "type":
+            entry.set_text(entry.get_text() + key)
+            entry.set_position(-1)
+        elif kind == "backspace":
+            entry.set_text(entry.get_text()[:-1])
+            entry.set_position(-1)
+        else:
+            _valid, keyval, state = Gtk.accelerator_parse(key)
+            sent_at = time.perf_counter()
+            self.window.on_input_key_press(None, keyval, 0, state)  # type: ignore[arg-type]
+            self.window.call_after_next_paint(lambda: self.navigation_samples.append(time.perf_counter() - sent_at))
+
+    def finish(self) -> dict[str, Any]:
+        self.window.remove_tick_callback(self._tick_id)
+        keystrokes = tracing.get_histograms().get("keystroke", {"count": 0})
+        tracing.set_enabled(False)
+        dropped_frames = sum(
+            max(0, round(interval / self.refresh_interval_us) - 1) for interval in self.frame_intervals
+        )
+        return {
+            "keystroke_to_paint_ms": keystrokes,
+            "navigation_to_paint_ms": summarize(self.navigation_samples) if self.navigation_samples else None,
+            "frames": len(self.frame_intervals),
+            "dropped_frames": dropped_frames,
+            "refresh_interval_ms": self.refresh_interval_us / 1000,
+        }
+
+
+def run_scenarios(app: UlauncherApp, names: list[str], keys_per_second: float, finish) -> None:
+    app.show_launcher()
+    window = app.window
+    assert window
+    # Don't hide the window if the (headless) display never gives it focus
+    window.is_dragging = True
+    results: dict[str, Any] = {}
+    pending = list(names)
+
+    def run_next(scenario_results: dict[str, Any] | None = None) -> None:
+        if scenario_results is not None:
+            results[pending.pop(0)] = scenario_results
+        if not pending:
+            finish(results)
+            return
+        TypingScenario(window, SCENARIOS[pending[0]], keys_per_second).run(run_next)
+
+    run_next()
+
+
+def main() -> None:
+    parser = get_argument_parser(__doc__ or "", runs=None)
+    parser.add_argument("--keys-per-second", type=float, default=15)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Default: all scenarios")
+    parser.add_argument("--latency", default="10", help="Latency of the fake pop-launcher in ms")
+    parser.add_argument("--jitter", default="5", help="Jitter of the fake pop-launcher in ms")
+    parser.add_argument("--items", default="25", help="Number of results per Update from the fake pop-launcher")
+    args = parser.parse_args()
+
+    use_fake_launcher("--latency", args.latency, "--jitter", args.jitter, "--items", args.items, "--seed", "1")
+    scenarios = args.scenario or list(SCENARIOS)
+    results = run_with_app(lambda app, finish: run_scenarios(app, scenarios, args.keys_per_second, finish))
+    results["config"] = {"keys_per_second": args.keys_per_second, "latency_ms": args.latency, "items": args.items}
+    write_results("typing_load", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Check the memory allocated per rendered row by the widget build, along with the other stages, against a budget
+(see benchmarks.allocations). Needs a display (see benchmarks.app).
+"""
+
+from __future__ import annotations
+
+from benchmarks import get_argument_parser, make_results
+from benchmarks.allocations import ROWS, check_budgets, run_stages
+from benchmarks.app import run_with_app, use_fake_launcher
+from ulauncher.ui.UlauncherApp import UlauncherApp
+from ulauncher.ui.windows.UlauncherWindow import UlauncherWindow
+from ulauncher.utils import allocations
+
+
+def run_widget_stage(runs: int) -> None:
+    use_fake_launcher()
+
+    def start(app: UlauncherApp, finish) -> None:
+        window = UlauncherWindow(application=app)
+        app.window = window
+        window.input.set_text("app")
+        results = make_results(25)
+        for _ in range(runs):
+            window.show_results(results)
+        finish({})
+
+    run_with_app(start)
+
+
+def main() -> None:
+    args = get_argument_parser(__doc__ or "", runs=20).parse_args()
+
+    allocations.set_enabled(True)
+    run_stages(ROWS, args.runs)
+    run_widget_stage(args.runs)
+    stats = allocations.get_stats()
+    allocations.set_enabled(False)
+    check_budgets("widget_allocations", stats, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Check the memory allocated per row by the decode and model stages against their budget (see benchmarks.allocations)
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+
+from benchmarks.allocations import BUDGET_PER_ROW, ROWS, run_stages
+from ulauncher.utils import allocations
+
+
+@pytest.fixture(scope="module")
+def stats() -> Iterator[dict]:
+    allocations.set_enabled(True)
+    run_stages(ROWS, runs=5)
+    yield allocations.get_stats()
+    allocations.set_enabled(False)
+
+
+@pytest.mark.parametrize("stage", ["decode", "model"])
+def test_stage_is_within_budget(stats: dict, stage: str) -> None:
+    assert stats[stage]["rows"] == 5 * ROWS
+    assert stats[stage]["peak_per_row"] <= BUDGET_PER_ROW[stage]
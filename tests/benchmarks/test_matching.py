@@ -0,0 +1,78 @@
+"""
+Benchmark fuzzy matching and highlighting with both the Levenshtein and the native backend.
+
+The lru_cache in front of get_matching_blocks is cleared before each uncached round, so the cost
+of a new query is measured separately from the cost of re-rendering the same results.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import pytest
+
+from ulauncher.utils import fuzzy_search
+from ulauncher.utils.text_highlighter import highlight_text
+
+pytest.importorskip("pytest_benchmark")
+
+CASES = (
+    ("fi", "Firefox Web Browser"),
+    ("lbroffice", "LibreOffice Writer"),
+    ("terminal", "GNOME Terminal Emulator with a fairly long name"),
+)
+
+BACKENDS = {"native": fuzzy_search._get_matching_blocks_native}
+if fuzzy_search._get_matching_blocks is not fuzzy_search._get_matching_blocks_native:
+    BACKENDS["levenshtein"] = fuzzy_search._get_matching_blocks
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> Iterator[str]:
+    monkeypatch.setattr(fuzzy_search, "_get_matching_blocks", BACKENDS[request.param])
+    fuzzy_search.get_matching_blocks.cache_clear()
+    yield request.param
+    fuzzy_search.get_matching_blocks.cache_clear()
+
+
+def run_uncached(benchmark, func: Callable[[str, str], Any], query: str, text: str) -> Any:
+    return benchmark.pedantic(
+        lambda: list(func(query, text)), setup=fuzzy_search.get_matching_blocks.cache_clear, rounds=1000
+    )
+
+
+def check_highlights(highlights: list[tuple[str, bool]], query: str, text: str) -> None:
+    """
+    The chunks make up the text, and the highlighted ones are the characters matching the query
+    """
+    assert "".join(chunk for chunk, _ in highlights) == text
+    highlighted = "".join(chunk for chunk, is_highlighted in highlights if is_highlighted)
+    assert highlighted
+    assert all(char in query for char in highlighted.lower())
+
+
+@pytest.mark.usefixtures("backend")
+@pytest.mark.parametrize(("query", "text"), CASES)
+def test_get_matching_blocks(benchmark, query: str, text: str) -> None:
+    blocks, matching_chars = run_uncached(benchmark, fuzzy_search.get_matching_blocks, query, text)
+    assert matching_chars == sum(len(chars) for _, chars in blocks) > 0
+
+
+@pytest.mark.usefixtures("backend")
+@pytest.mark.parametrize(("query", "text"), CASES)
+def test_highlight_text(benchmark, query: str, text: str) -> None:
+    check_highlights(run_uncached(benchmark, highlight_text, query, text), query, text)
+
+
+@pytest.mark.usefixtures("backend")
+@pytest.mark.parametrize(("query", "text"), CASES)
+def test_highlight_text_cached(benchmark, query: str, text: str) -> None:
+    expected = list(highlight_text(query, text))
+    highlights = benchmark(lambda: list(highlight_text(query, text)))
+    assert highlights == expected
+    check_highlights(highlights, query, text)
+    # Only the first call missed the cache
+    info = fuzzy_search.get_matching_blocks.cache_info()
+    assert info.misses == 1
+    assert info.hits > 0
@@ -0,0 +1,35 @@
+"""
+Benchmark decoding and encoding pop-launcher messages with JsonProtocol.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from benchmarks import make_update_line
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopRequest, PopResponse
+
+pytest.importorskip("pytest_benchmark")
+
+SIZES = (10, 100, 1000)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_from_json_update(benchmark, size: int) -> None:
+    line = make_update_line(size)
+    update = benchmark(PopResponse.from_json, line)
+    assert len(update) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_to_json_update(benchmark, size: int) -> None:
+    update = PopResponse.from_json(make_update_line(size))
+    assert PopResponse.from_json(benchmark(update.to_json)) == update
+
+
+def test_to_json_search(benchmark) -> None:
+    assert benchmark(PopRequest.Search("firefox").to_json) == '{"Search": "firefox"}'
+
+
+def test_from_json_close(benchmark) -> None:
+    assert isinstance(benchmark(PopResponse.from_json, '"Close"'), PopResponse.Close)
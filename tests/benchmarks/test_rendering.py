@@ -0,0 +1,59 @@
+"""
+Benchmark icon loading and rendering result rows in a real UlauncherWindow. These need a display, but work
+headless, ex with `xvfb-run pytest tests/benchmarks/test_rendering.py`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+
+from benchmarks import make_results
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("gi")
+
+from gi.events import GLibEventLoopPolicy  # noqa: E402
+from gi.repository import Gdk  # noqa: E402
+
+from benchmarks.app import use_fake_launcher  # noqa: E402
+from ulauncher.ui.UlauncherApp import UlauncherApp  # noqa: E402
+from ulauncher.ui.windows.UlauncherWindow import UlauncherWindow  # noqa: E402
+from ulauncher.utils.load_icon_surface import load_icon_paintable  # noqa: E402
+
+ROW_COUNTS = (1, 10, 25)
+ICON = "application-x-executable"
+
+
+@pytest.fixture(scope="module")
+def window() -> Iterator[UlauncherWindow]:
+    if not Gdk.Display.get_default():
+        pytest.skip("Needs a display")
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
+    use_fake_launcher()
+    app = UlauncherApp.get_instance()
+    app.register(None)
+    window = UlauncherWindow(application=app)
+    app.window = window
+    window.input.set_text("app")
+    yield window
+    window.close()
+    asyncio.set_event_loop_policy(None)
+
+
+@pytest.mark.usefixtures("window")
+def test_load_icon_paintable_hit(benchmark) -> None:
+    load_icon_paintable(ICON)
+    assert benchmark(load_icon_paintable, ICON)
+
+
+@pytest.mark.usefixtures("window")
+def test_load_icon_paintable_miss(benchmark) -> None:
+    assert benchmark.pedantic(load_icon_paintable, (ICON,), setup=load_icon_paintable.cache_clear, rounds=100)
+
+
+@pytest.mark.parametrize("count", ROW_COUNTS)
+def test_show_results(benchmark, window: UlauncherWindow, count: int) -> None:
+    benchmark(window.show_results, make_results(count))
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import pytest
+
+from ulauncher.core import channel
+from ulauncher.modes.poplauncher.result import Result
+
+
+def test_encode_and_decode() -> None:
+    message = ["search", 1, 'fïre "fox"\n']
+    line = channel.encode(message)
+    assert line.endswith("\n")
+    assert line.count("\n") == 1
+    assert "ï" in line
+    assert channel.decode(line) == message
+    assert channel.decode(line.encode()) == message
+
+
+@pytest.mark.parametrize("line", ["[]", "{}", '"exit"', "1", "[1"])
+def test_decode_rejects_invalid_messages(line: str) -> None:
+    with pytest.raises(ValueError):  # noqa: PT011
+        channel.decode(line)
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        Result(1, "Firefox", "Web Browser", "firefox"),
+        Result(2, "Open", "", "", searchable=False, compact=True),
+        Result(3, "Calc", "", "", searchable=False, highlightable=True),
+    ],
+)
+def test_encode_and_decode_result(result: Result) -> None:
+    row = channel.encode_result(7, result)
+    assert row[0] == 7
+    decoded = channel.decode_result(channel.decode(channel.encode(row)))
+    assert decoded == Result(
+        7, result.name, result.description, result.icon, result.searchable, result.compact, result.highlightable
+    )
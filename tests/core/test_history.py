@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from ulauncher.core import history
+from ulauncher.core.history import get_default_index, remember_pick
+from ulauncher.modes.poplauncher.result import Result
+
+RESULTS = [Result(0, "Files"), Result(1, "Firefox"), Result(2, "Fire", searchable=False)]
+
+
+@pytest.fixture(autouse=True)
+def _query_history(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(history, "query_history_path", str(tmp_path / "query_history.json"))
+    history.release_query_history()
+    yield
+    history.release_query_history()
+
+
+def test_get_default_index_without_history() -> None:
+    assert get_default_index(RESULTS, "fi") == 0
+
+
+def test_get_default_index_selects_the_last_pick() -> None:
+    remember_pick("fi", RESULTS[1])
+    assert get_default_index(RESULTS, "fi") == 1
+    assert get_default_index(RESULTS, "f") == 0
+    # The picked result isn't in the results anymore
+    assert get_default_index(RESULTS[:1], "fi") == 0
+
+
+def test_picks_of_unsearchable_results_are_not_remembered() -> None:
+    remember_pick("fi", RESULTS[2])
+    assert get_default_index(RESULTS, "fi") == 0
+
+
+def test_picks_are_saved() -> None:
+    remember_pick("fi", RESULTS[1])
+    history.release_query_history()
+    assert get_default_index(RESULTS, "fi") == 1
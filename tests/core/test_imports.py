@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+
+def test_core_does_not_import_gtk() -> None:
+    # In a new interpreter, since other tests may have imported gi.repository already
+    code = (
+        "import sys\n"
+        "import ulauncher.core.worker, ulauncher.core.history\n"
+        "assert not [name for name in sys.modules if name.startswith('gi.repository')], sorted(sys.modules)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from ulauncher.core.PopLauncherClient import PopLauncherClient, TResponse
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopRequest, PopResponse, TPopRequest
+from ulauncher.modes.poplauncher.result import Result, ResultBatch
+from ulauncher.utils import metrics, tracing
+
+
+class FakeProcess:
+    def __init__(self) -> None:
+        self.requests: list[TPopRequest] = []
+        self.running = True
+
+
+class FakePopLauncherClient(PopLauncherClient):
+    def __init__(self) -> None:
+        self.responses: list[TResponse] = []
+        super().__init__(self.responses.append)
+
+    def _spawn(self, _on_response: Any) -> FakeProcess:
+        return FakeProcess()
+
+    def _is_running(self, process: Any) -> bool:
+        return process.running
+
+    def _send_request(self, process: Any, request: TPopRequest) -> None:
+        process.requests.append(request)
+
+    def _stop_process(self, process: Any) -> None:
+        process.running = False
+
+    def _get_pid(self, _process: Any) -> int | None:
+        return None
+
+    def respond(self, response: TResponse) -> None:
+        self._on_response(self._generation, response)
+
+
+def make_update(name: str) -> PopResponse.Update:
+    return PopResponse.Update([{"id": 1, "name": name, "description": ""}])
+
+
+async def first_batch(client: PopLauncherClient, query: str) -> tuple[Result, ...] | None:
+    async for results in client.search(query):
+        return tuple(results)
+    return None
+
+
+class TestPopLauncherClient:
+    def test_updates_answer_the_searches_in_order(self) -> None:
+        async def run() -> None:
+            client = FakePopLauncherClient()
+            first = asyncio.create_task(first_batch(client, "f"))
+            second = asyncio.create_task(first_batch(client, "fi"))
+            await asyncio.sleep(0)
+            assert client.process.requests == [PopRequest.Search("f"), PopRequest.Search("fi")]
+            client.respond(make_update("f"))
+            client.respond(make_update("fi"))
+            assert [result.name for result in await first] == ["f"]
+            assert [result.name for result in await second] == ["fi"]
+
+        asyncio.run(run())
+
+    def test_typing_faster_than_the_main_loop_with_threaded_parsing(self) -> None:
+        async def run() -> None:
+            client = FakePopLauncherClient()
+            searches = [asyncio.create_task(first_batch(client, query)) for query in ("f", "fi", "fir")]
+            await asyncio.sleep(0)
+            # Like the window does, each keystroke cancels the search of the previous one
+            for search in searches[:-1]:
+                search.cancel()
+            # The reader thread replaced the unhandled batches of "f" and "fi" with the one of "fir"
+            results = (Result(1, "fir"),)
+            client.respond(ResultBatch(results, updates=3))
+            assert await asyncio.wait_for(searches[-1], 1) == results
+            assert not client._pending_searches
+            assert client.responses == []
+
+        asyncio.run(run())
+
+    def test_dropped_updates_are_counted_once(self) -> None:
+        async def run() -> None:
+            client = FakePopLauncherClient()
+            searches = [asyncio.create_task(first_batch(client, query)) for query in ("f", "fi", "fir", "fire")]
+            await asyncio.sleep(0)
+            for search in searches:
+                search.cancel()
+            client.respond(ResultBatch((Result(1, "fir"),), updates=3))
+            client.respond(ResultBatch((Result(1, "fire"),)))
+
+        dropped = metrics.snapshot()["counters"].get("updates_dropped", 0)
+        tracing.set_enabled(True)
+        try:
+            asyncio.run(run())
+            # All four keystrokes end when the next results are painted
+            assert tracing._superseded_results == 4
+        finally:
+            tracing.set_enabled(False)
+        assert metrics.snapshot()["counters"]["updates_dropped"] == dropped + 4
+
+    def test_replaced_update_resolves_a_search_that_is_still_waiting(self) -> None:
+        async def run() -> None:
+            client = FakePopLauncherClient()
+            older = asyncio.create_task(first_batch(client, "f"))
+            newer = asyncio.create_task(first_batch(client, "fi"))
+            await asyncio.sleep(0)
+            results = (Result(1, "fi"),)
+            client.respond(ResultBatch(results, updates=2))
+            assert await older == ()
+            assert await newer == results
+
+        asyncio.run(run())
+
+    def test_update_without_search_is_passed_on(self) -> None:
+        client = FakePopLauncherClient()
+        client.start()
+        batch = ResultBatch((Result(1, "a"),))
+        client.respond(batch)
+        client.respond(PopResponse.Close())
+        assert client.responses[0] is batch
+        assert isinstance(client.responses[1], PopResponse.Close)
+
+    def test_responses_of_a_stopped_process_are_ignored(self) -> None:
+        client = FakePopLauncherClient()
+        client.start()
+        respond = client.respond
+        generation = client._generation
+        client.stop()
+        client._on_response(generation, PopResponse.Close())
+        client.start()
+        client._on_response(generation, PopResponse.Close())
+        assert client.responses == []
+        respond(PopResponse.Close())
+        assert len(client.responses) == 1
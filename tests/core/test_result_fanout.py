@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+from ulauncher.core.ResultFanout import ResultFanout
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption
+from ulauncher.modes.poplauncher.result import Result
+
+
+class FakeProvider:
+    immediate = False
+
+    def __init__(self, name: str, priority: int = 0) -> None:
+        self.name = name
+        self.priority = priority
+
+    async def search(self, _query: str) -> AsyncIterator[list[Result]]:
+        yield []
+
+    def activate(self, result: Result) -> None:
+        pass
+
+    async def context(self, _result: Result) -> list[ContextOption]:
+        return []
+
+    def activate_context(self, result: Result, option_id: int) -> None:
+        pass
+
+
+def make_results(prefix: str, count: int) -> list[Result]:
+    return [Result(index, f"{prefix}{index}") for index in range(count)]
+
+
+def test_merge_ranks_by_priority_then_interleaves_by_rank() -> None:
+    apps, plugin, calc = FakeProvider("apps"), FakeProvider("plugin"), FakeProvider("calc", priority=10)
+    fanout = ResultFanout([apps, plugin, calc], deadline_ms=50, timeout_ms=1000)
+    batches = {0: make_results("a", 3), 1: make_results("p", 2), 2: make_results("c", 1)}
+    merged = fanout._merge(batches)
+    assert [result.name for result in merged] == ["c0", "a0", "p0", "a1", "p1", "a2"]
+    assert fanout.get_provider(merged[0]) is calc
+    assert fanout.get_provider(merged[1]) is apps
+    assert fanout.get_provider(merged[2]) is plugin
+
+
+def test_merge_without_results_of_a_provider() -> None:
+    apps, plugin = FakeProvider("apps"), FakeProvider("plugin")
+    fanout = ResultFanout([apps, plugin], deadline_ms=50, timeout_ms=1000)
+    merged = fanout._merge({1: make_results("p", 2)})
+    assert [result.name for result in merged] == ["p0", "p1"]
+
+
+def test_merge_replaces_the_owners_of_the_previous_results() -> None:
+    apps = FakeProvider("apps")
+    fanout = ResultFanout([apps], deadline_ms=50, timeout_ms=1000)
+    previous = fanout._merge({0: make_results("a", 1)})
+    fanout._merge({0: make_results("b", 1)})
+    assert fanout.get_provider(previous[0]) is None
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+from ulauncher.core import channel
+from ulauncher.core.worker import SearchWorker
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption
+from ulauncher.modes.poplauncher.result import Result
+
+
+class FakeProvider:
+    name = "fake"
+    priority = 0
+    immediate = False
+
+    def __init__(self) -> None:
+        self.activated: list[Any] = []
+
+    async def search(self, query: str) -> AsyncIterator[list[Result]]:
+        yield [Result(10, f"{query} 1"), Result(11, f"{query} 2")]
+        yield [Result(12, f"{query} 3")]
+
+    def activate(self, result: Result) -> None:
+        self.activated.append(result.name)
+
+    async def context(self, result: Result) -> list[ContextOption]:
+        return [{"id": 1, "name": f"Open {result.name}"}]
+
+    def activate_context(self, result: Result, option_id: int) -> None:
+        self.activated.append((result.name, option_id))
+
+
+def run_worker(messages: list[list[Any]]) -> tuple[FakeProvider, list[list[Any]], list[bool]]:
+    provider = FakeProvider()
+    sent: list[list[Any]] = []
+
+    async def main() -> list[bool]:
+        worker = SearchWorker(provider, sent.append)
+        handled = []
+        for message in messages:
+            handled.append(worker.handle(message))
+            # Let the tasks started by the message run
+            for _ in range(5):
+                await asyncio.sleep(0)
+        return handled
+
+    return provider, sent, asyncio.run(main())
+
+
+def test_search_sends_result_batches_then_done() -> None:
+    _provider, sent, handled = run_worker([["search", 1, "fi"]])
+    assert handled == [True]
+    assert sent == [
+        ["results", 1, [[0, "fi 1", "", "", 1], [1, "fi 2", "", "", 1]]],
+        ["results", 1, [[2, "fi 3", "", "", 1]]],
+        ["done", 1],
+    ]
+    assert channel.decode_result(sent[0][2][1]) == Result(1, "fi 2")
+
+
+def test_activate_by_key() -> None:
+    provider, sent, _handled = run_worker(
+        [["search", 1, "fi"], ["activate", 1], ["activate", 2], ["activate_context", 0, 3], ["context", 2]]
+    )
+    # Results of the previous batch are kept, since the window may still show them
+    assert provider.activated == ["fi 2", "fi 3", ("fi 1", 3)]
+    assert sent[-1] == ["context", 2, [{"id": 1, "name": "Open fi 3"}]]
+
+
+def test_unknown_keys_are_not_activated() -> None:
+    provider, sent, _handled = run_worker([["search", 1, "fi"], ["activate", 99], ["context", 99]])
+    assert provider.activated == []
+    assert sent[-1] == ["context", 99, []]
+
+
+def test_invalid_messages_are_ignored() -> None:
+    _provider, sent, handled = run_worker([["search", "1", "fi"], ["unknown"], ["activate"]])
+    assert handled == [True, True, True]
+    assert sent == []
+
+
+def test_exit() -> None:
+    _provider, _sent, handled = run_worker([["exit"]])
+    assert handled == [False]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import random
+from collections import Counter
+from pathlib import Path
+
+from ulauncher.modes.apps.app_index import AppIndex, get_counted, get_mask
+
+
+def write_entry(app_dir: Path, name: str, keywords: str = "", **values: str) -> Path:
+    app_dir.mkdir(parents=True, exist_ok=True)
+    lines = ["[Desktop Entry]", "Type=Application", f"Name={name}", f"Keywords={keywords}"]
+    lines += [f"{key}={value}" for key, value in values.items()]
+    path = app_dir / f"{name.replace(' ', '')}.desktop"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_get_counted_orders_by_count_then_index() -> None:
+    rng = random.Random(1)
+    for _ in range(200):
+        lists = [sorted(rng.sample(range(300), rng.randint(1, 300))) for _ in range(rng.randint(1, 12))]
+        counts = Counter(index for indices in lists for index in indices)
+        expected = sorted(counts, key=lambda index: (-counts[index], index))[:30]
+        assert get_counted([get_mask(indices) for indices in lists], 30) == expected
+
+
+def test_get_counted_without_masks() -> None:
+    assert get_counted([], 30) == []
+
+
+def test_query_finds_names_and_keywords(tmp_path: Path) -> None:
+    app_dir = tmp_path / "applications"
+    write_entry(app_dir, "Firefox", "browser;web")
+    write_entry(app_dir, "Files", "folder;manager")
+    write_entry(app_dir, "Terminal", "shell;console")
+    index = AppIndex([str(app_dir)])
+    index.refresh()
+
+    assert index.query("fire")[0][1].name == "Firefox"
+    assert [entry.name for _score, entry in index.query("f")] == ["Files", "Firefox"]
+    assert [entry.name for _score, entry in index.query("shell")] == ["Terminal"]
+    assert index.query("zzzz") == []
+
+
+def test_query_uses_common_trigram_masks(tmp_path: Path) -> None:
+    app_dir = tmp_path / "applications"
+    for number in range(200):
+        write_entry(app_dir, f"Editor {number}")
+    write_entry(app_dir, "Text Editor")
+    index = AppIndex([str(app_dir)])
+    index.refresh()
+
+    assert len(index) == 201
+    assert isinstance(index._trigrams["edi"], int)
+    assert index.query("text editor", 1)[0][1].name == "Text Editor"
+
+
+def test_refresh_only_parses_changed_files(tmp_path: Path) -> None:
+    app_dir = tmp_path / "applications"
+    store_path = tmp_path / "app_index.json"
+    write_entry(app_dir, "Firefox")
+    index = AppIndex([str(app_dir)], store_path)
+    assert index.refresh() == 1
+    index.save()
+
+    index = AppIndex([str(app_dir)], store_path)
+    assert index.refresh() == 0
+    assert len(index) == 1
+
+
+def test_hidden_entries_are_not_shown(tmp_path: Path) -> None:
+    app_dir = tmp_path / "applications"
+    write_entry(app_dir, "Firefox")
+    write_entry(app_dir, "Helper", NoDisplay="true")
+    index = AppIndex([str(app_dir)])
+    index.refresh()
+
+    assert index.query("helper") == []
+    assert len(index) == 1
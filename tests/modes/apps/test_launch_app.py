@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+pytest.importorskip("gi")
+
+from ulauncher.modes.apps import launch_app as launch_app_module  # noqa: E402
+from ulauncher.modes.apps.launch_app import DEFAULT_NON_DEFAULT_GPU_ENV, get_gpu_env, launch_app  # noqa: E402
+
+INTEGRATED = {"Name": "Intel", "Environment": [], "Default": True}
+DISCRETE = {"Name": "NVIDIA", "Environment": ["__NV_PRIME_RENDER_OFFLOAD", "1", "__GLX_VENDOR_LIBRARY_NAME", "nvidia"]}
+SECOND_DISCRETE = {"Name": "AMD", "Environment": ["DRI_PRIME", "pci-0000_03_00_0"], "Default": False}
+
+
+def test_get_gpu_env_for_the_default_gpu() -> None:
+    assert get_gpu_env(False, [INTEGRATED, DISCRETE]) == {}
+    assert get_gpu_env(False, None) == {}
+
+
+def test_get_gpu_env_with_one_gpu() -> None:
+    assert get_gpu_env(True, [INTEGRATED]) == {}
+
+
+def test_get_gpu_env_with_several_gpus() -> None:
+    assert get_gpu_env(True, [INTEGRATED, DISCRETE]) == {
+        "__NV_PRIME_RENDER_OFFLOAD": "1",
+        "__GLX_VENDOR_LIBRARY_NAME": "nvidia",
+    }
+    # The first non-default GPU, like GNOME Shell
+    assert get_gpu_env(True, [INTEGRATED, SECOND_DISCRETE, DISCRETE]) == {"DRI_PRIME": "pci-0000_03_00_0"}
+
+
+def test_get_gpu_env_without_switcheroo_control() -> None:
+    assert get_gpu_env(True, None) == DEFAULT_NON_DEFAULT_GPU_ENV
+
+
+@pytest.mark.parametrize(
+    ("prefers_non_default_gpu", "gpu_preference", "expected"),
+    [("false", "Default", False), ("true", "Default", True), ("false", "NonDefault", True)],
+)
+def test_launch_app_prefers_non_default_gpu(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, prefers_non_default_gpu: str, gpu_preference: Any, expected: bool
+) -> None:
+    desktop_file = tmp_path / "test-app.desktop"
+    desktop_file.write_text(
+        f"[Desktop Entry]\nType=Application\nName=Test\nExec=true\nPrefersNonDefaultGPU={prefers_non_default_gpu}\n"
+    )
+    launched = threading.Event()
+    launches = []
+
+    def fake_launch(*args: Any) -> None:
+        launches.append(args)
+        launched.set()
+
+    monkeypatch.setattr(launch_app_module, "_launch", fake_launch)
+    assert launch_app(str(desktop_file), gpu_preference=gpu_preference)
+    assert launched.wait(5)
+    _app_info, _files, _env, _started_at, prefers_non_default_gpu_arg, action_name = launches[0]
+    assert prefers_non_default_gpu_arg is expected
+    assert action_name is None
+
+
+def test_launch_app_without_app(tmp_path: Path) -> None:
+    assert not launch_app(str(tmp_path / "missing.desktop"))
+    assert not launch_app("ulauncher-test-missing-app")
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import pytest
+
+from ulauncher.modes.calc import calc
+from ulauncher.modes.calc.calc import (
+    MAX_INLINE_BITS,
+    HeavyExpression,
+    evaluate,
+    evaluate_in_worker,
+    format_number,
+    get_expression,
+)
+
+
+@pytest.mark.parametrize(
+    ("query", "expression"),
+    [
+        ("1+2", "1+2"),
+        (" 2^10 ", "2**10"),
+        ("sqrt(16)", "sqrt(16)"),
+        ("firefox", None),
+        ("12", None),
+        ("pi*", None),
+        ("1+" * 101, None),
+    ],
+)
+def test_get_expression(query: str, expression: str | None) -> None:
+    assert get_expression(query) == expression
+
+
+@pytest.mark.parametrize(
+    ("expression", "value"),
+    [
+        ("1+2*3", 7),
+        ("7//2", 3),
+        ("7%4", 3),
+        ("-2**2", -4),
+        ("sqrt(16)+floor(2.5)", 6.0),
+        ("2*pi", 2 * calc.math.pi),
+        ("factorial(5)", 120),
+    ],
+)
+def test_evaluate(expression: str, value: float) -> None:
+    assert evaluate(expression) == value
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "__import__('os')",
+        "open('x')",
+        "(1).__class__",
+        "[1, 2]",
+        "lambda: 1",
+        "x",
+        "sqrt(x=1)",
+        "1 if 1 else 2",
+        "1 < 2",
+        "True + 1",
+        "'a' * 2",
+        "1 << 2",
+        "sqrt.__name__",
+    ],
+)
+def test_evaluate_rejects_anything_not_whitelisted(expression: str) -> None:
+    with pytest.raises(ValueError, match="Unsupported"):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression", ["(-2)**0.5", "abs((-8)**(1/3))"])
+def test_evaluate_rejects_complex_results(expression: str) -> None:
+    with pytest.raises(TypeError, match="Complex"):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize(
+    "expression", ["2**20000", "9**9**9", "factorial(10000)", "(2**9000)*(2**9000)", "round(5, -10000000)"]
+)
+def test_evaluate_raises_heavy_expression_over_the_bit_limit(expression: str) -> None:
+    with pytest.raises(HeavyExpression):
+        evaluate(expression)
+
+
+def test_round() -> None:
+    assert evaluate("round(1234, -2)") == 1200
+    assert evaluate("round(2.5)") == 2
+    assert evaluate("round(1.23456, 2)") == 1.23
+    assert evaluate("round(1.5, -10000000)") == 0
+
+
+def test_evaluate_within_the_bit_limit() -> None:
+    assert evaluate(f"2**{MAX_INLINE_BITS - 1}") == 2 ** (MAX_INLINE_BITS - 1)
+    assert evaluate("2**20000", max_bits=30_000) == 2**20000
+
+
+@pytest.mark.parametrize(
+    ("value", "text"),
+    [(7, "7"), (2.0, "2"), (0.1 + 0.2, "0.3"), (1e20 / 3, "3.33333333333e+19"), (-(10**30), "-1e+30")],
+)
+def test_format_number(value: float, text: str) -> None:
+    assert format_number(value) == text
+
+
+def test_format_number_of_huge_integers() -> None:
+    # Bigger than str() can convert by default
+    assert format_number(2**100000) == "9.99002093e+30102"
+
+
+def test_evaluate_in_worker() -> None:
+    assert evaluate_in_worker("2**20000") == format_number(2**20000)
+
+
+@pytest.mark.parametrize("expression", ["9**9**9", "(-2)**0.5", "1/0"])
+def test_evaluate_in_worker_returns_none_for_invalid_or_too_big_expressions(expression: str) -> None:
+    assert evaluate_in_worker(expression) is None
+
+
+def test_evaluate_in_worker_returns_none_on_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(calc, "WORKER_TIMEOUT_S", 0.001)
+    assert evaluate_in_worker("2**20000") is None
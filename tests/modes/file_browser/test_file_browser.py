@@ -0,0 +1,86 @@
+"""
+FileBrowserProvider on temporary directories, on the GLib event loop
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.events import GLibEventLoopPolicy  # noqa: E402
+
+from ulauncher.modes.file_browser import FileBrowserProvider as file_browser  # noqa: E402
+from ulauncher.modes.file_browser.FileBrowserProvider import FileBrowserProvider, parse_path_query  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _glib_loop() -> Iterator[None]:
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
+    yield
+    asyncio.set_event_loop_policy(None)
+
+
+async def search(provider: FileBrowserProvider, query: str) -> list[list[str]]:
+    return [[result.name for result in results] async for results in provider.search(query)]
+
+
+def test_parse_path_query() -> None:
+    assert parse_path_query("/usr/") == ("/usr", "")
+    assert parse_path_query("/usr/li") == ("/usr", "li")
+    assert parse_path_query("/") == ("/", "")
+    assert parse_path_query("fire") is None
+
+
+def test_search_filters_every_batch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(file_browser, "BATCH_SIZE", 7)
+    names = [f"file{i:03}" for i in range(100)] + [f"a-file{i:03}" for i in range(10)] + [".file-hidden"]
+    for name in names:
+        (tmp_path / name).touch()
+
+    async def run() -> list[list[str]]:
+        return await search(FileBrowserProvider(), f"{tmp_path}/file")
+
+    updates = asyncio.run(run())
+    # The names starting with the filter first, without the hidden files
+    expected = sorted(name for name in names if name.startswith("file"))[: file_browser.MAX_RESULTS]
+    assert updates[-1] == expected
+    # Updates are only sent when the results change
+    assert all(previous != update for previous, update in itertools.pairwise(updates))
+
+
+def test_search_shows_hidden_files_for_dot_filter(tmp_path: Path) -> None:
+    (tmp_path / ".hidden").touch()
+    (tmp_path / "visible.h").touch()
+
+    async def run() -> list[list[str]]:
+        return await search(FileBrowserProvider(), f"{tmp_path}/.h")
+
+    assert asyncio.run(run())[-1] == [".hidden", "visible.h"]
+
+
+def test_changed_listing_is_replaced_by_next_search(tmp_path: Path) -> None:
+    (tmp_path / "old").touch()
+
+    async def run() -> tuple[list[list[str]], list[list[str]], bool]:
+        provider = FileBrowserProvider()
+        before = await search(provider, f"{tmp_path}/")
+        listing = provider._listings[str(tmp_path)]
+        (tmp_path / "new").touch()
+        # Wait for the file monitor to report the change
+        for _ in range(100):
+            if listing.stale:
+                break
+            await asyncio.sleep(0.01)
+        after = await search(provider, f"{tmp_path}/")
+        return before, after, provider._listings[str(tmp_path)] is listing
+
+    before, after, reused = asyncio.run(run())
+    assert before[-1] == ["old"]
+    assert after[-1] == ["new", "old"]
+    assert not reused
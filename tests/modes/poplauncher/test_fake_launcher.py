@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from ulauncher.modes.poplauncher.fake_launcher import load_exchanges
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopRequest, PopResponse
+
+
+def update(name: str) -> str:
+    return PopResponse.Update([{"id": 0, "name": name, "description": ""}]).to_json()
+
+
+@pytest.fixture
+def recording(tmp_path: Path) -> Path:
+    # Typing sends the searches ahead of their responses
+    entries = [
+        ("request", PopRequest.Search("f").to_json()),
+        ("request", PopRequest.Search("fi").to_json()),
+        ("response", update("f")),
+        ("response", update("fi")),
+        ("request", PopRequest.Context(0).to_json()),
+        ("request", PopRequest.Activate(0).to_json()),
+        ("response", PopResponse.Context(id=0, options=[{"id": 1, "name": "Open"}]).to_json()),
+        ("response", PopResponse.Close().to_json()),
+    ]
+    path = tmp_path / "session.jsonl"
+    path.write_text(
+        "".join(
+            json.dumps({"t": index / 100, "dir": d, "line": line}) + "\n" for index, (d, line) in enumerate(entries)
+        )
+    )
+    return path
+
+
+def test_load_exchanges_pairs_updates_with_searches_in_order(recording: Path) -> None:
+    exchanges = load_exchanges(str(recording))
+    searches = [[entry["line"] for entry in exchange] for exchange in exchanges["Search"]]
+    assert searches == [
+        [PopRequest.Search("f").to_json(), update("f")],
+        [PopRequest.Search("fi").to_json(), update("fi")],
+    ]
+    [[_context_request, context]] = exchanges["Context"]
+    assert json.loads(context["line"])["Context"]["id"] == 0
+    [[_activate_request, close]] = exchanges["Activate"]
+    assert close["line"] == PopResponse.Close().to_json()
+
+
+def test_replay_answers_each_search_and_outlives_the_recording(recording: Path) -> None:
+    requests = [
+        PopRequest.Search("f"),
+        PopRequest.Search("fi"),
+        PopRequest.Search("fir"),
+        PopRequest.Context(0),
+        PopRequest.Context(1),
+        PopRequest.Exit(),
+    ]
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "ulauncher.modes.poplauncher.fake_launcher",
+            "--replay",
+            str(recording),
+            "--speed",
+            "max",
+        ],
+        input="".join(request.to_json() + "\n" for request in requests),
+        capture_output=True,
+        text=True,
+        timeout=10,
+        check=True,
+    ).stdout.splitlines()
+    assert output == [
+        update("f"),
+        update("fi"),
+        # Beyond the recording
+        PopResponse.Update([]).to_json(),
+        PopResponse.Context(id=0, options=[{"id": 1, "name": "Open"}]).to_json(),
+        PopResponse.Context(id=1, options=[]).to_json(),
+    ]
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from ulauncher.modes.poplauncher.plugins import PluginConfig, find_plugins, get_category_icons, parse_ron
+
+PLUGIN_RON = """
+(
+    name: "Files", // the name shown in pop-launcher's help
+    description: "Syntax: /path/to/file\\nExample: ~/Documents",
+    bin: (path: "files"),
+    icon: Name("system-file-manager"),
+    query: (regex: "^(/|~).*", isolate: true, priority: High),
+    /* unused by the launcher */
+    history: false,
+)
+"""
+
+
+@pytest.mark.parametrize(
+    ("text", "value"),
+    [
+        ('"a \\"quoted\\" string"', 'a "quoted" string'),
+        ("42", 42),
+        ("-1.5e3", -1500.0),
+        ("true", True),
+        ("None", None),
+        ("Some(3)", 3),
+        ("High", "High"),
+        ('Name("icon")', {"Name": "icon"}),
+        ("[1, 2, 3,]", [1, 2, 3]),
+        ("[]", []),
+        ("(1, 2)", [1, 2]),
+        ('(a: 1, b: [true], c: (d: "e"),)', {"a": 1, "b": [True], "c": {"d": "e"}}),
+    ],
+)
+def test_parse_ron(text: str, value: object) -> None:
+    assert parse_ron(text) == value
+
+
+def test_parse_ron_plugin_config() -> None:
+    assert parse_ron(PLUGIN_RON) == {
+        "name": "Files",
+        "description": "Syntax: /path/to/file\nExample: ~/Documents",
+        "bin": {"path": "files"},
+        "icon": {"Name": "system-file-manager"},
+        "query": {"regex": "^(/|~).*", "isolate": True, "priority": "High"},
+        "history": False,
+    }
+
+
+@pytest.mark.parametrize("text", ["", "(a: 1", "[1, 2", "1 2", "@", ")"])
+def test_parse_ron_rejects_invalid_input(text: str) -> None:
+    with pytest.raises(ValueError):  # noqa: PT011
+        parse_ron(text)
+
+
+def write_plugin(plugin_dir: Path, name: str, config: str = PLUGIN_RON) -> Path:
+    path = plugin_dir / name / "plugin.ron"
+    path.parent.mkdir(parents=True)
+    path.write_text(config)
+    return path
+
+
+def test_plugin_config_from_file(tmp_path: Path) -> None:
+    config = PluginConfig.from_file(write_plugin(tmp_path, "files"))
+    assert config.name == "files"
+    assert config.bin_path == str(tmp_path / "files" / "files")
+    assert config.regex
+    assert config.regex.pattern == "^(/|~).*"
+    assert config.isolate
+    assert config.priority == 1
+    assert config.icon == "system-file-manager"
+
+
+def test_find_plugins_prefers_earlier_dirs(tmp_path: Path) -> None:
+    user_dir, system_dir = tmp_path / "user", tmp_path / "system"
+    write_plugin(user_dir, "files")
+    write_plugin(system_dir, "files", '(bin: (path: "other"))')
+    write_plugin(system_dir, "calc", '(bin: (path: "calc"), icon: Name("accessories-calculator"))')
+    write_plugin(system_dir, "broken", "(bin: ")
+    plugins = find_plugins([str(user_dir), str(system_dir), str(tmp_path / "missing")])
+    assert [(plugin.name, Path(plugin.bin_path).parent.parent.name) for plugin in plugins] == [
+        ("files", "user"),
+        ("calc", "system"),
+    ]
+    assert get_category_icons({"calc"}, [str(user_dir), str(system_dir)]) == {"accessories-calculator"}
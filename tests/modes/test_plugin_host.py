@@ -0,0 +1,193 @@
+"""
+PluginHost against stub plugin executables, on the GLib event loop
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from collections.abc import Callable, Coroutine, Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.events import GLibEventLoopPolicy  # noqa: E402
+
+from ulauncher.modes import PluginHost as plugin_host  # noqa: E402
+from ulauncher.modes.PluginHost import (  # noqa: E402
+    MAX_CRASHES,
+    MAX_UNFINISHED_SEARCHES,
+    PluginHost,
+    PluginProvider,
+)
+from ulauncher.utils import metrics  # noqa: E402
+
+# Logs the requests it gets to requests.log, and answers searches as configured
+STUB_PLUGIN = """\
+import json
+import sys
+from pathlib import Path
+
+log = Path(__file__).with_name("requests.log")
+for line in sys.stdin:
+    with log.open("a") as file:
+        file.write(line)
+    request = json.loads(line)
+    if {crash}:
+        sys.exit(1)
+    if "Search" in request and {answer}:
+        print(json.dumps({{"Append": {{"id": 0, "name": request["Search"], "description": ""}}}}), flush=True)
+        print(json.dumps("Finished"), flush=True)
+    if request == "Exit" and {exits}:
+        sys.exit(0)
+"""
+
+
+@pytest.fixture(autouse=True)
+def _glib_loop() -> Iterator[None]:
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
+    yield
+    asyncio.set_event_loop_policy(None)
+
+
+def make_plugin(tmp_path: Path, name: str, answer: bool = True, exits: bool = True, crash: bool = False) -> Path:
+    plugin_dir = tmp_path / name
+    plugin_dir.mkdir()
+    (plugin_dir / "plugin.ron").write_text(f'(name: "{name}", bin: (path: "plugin"))')
+    script = plugin_dir / "plugin"
+    script.write_text(f"#!{sys.executable}\n" + STUB_PLUGIN.format(answer=answer, exits=exits, crash=crash))
+    script.chmod(0o755)
+    return plugin_dir
+
+
+def get_requests(plugin_dir: Path) -> list[Any]:
+    log = plugin_dir / "requests.log"
+    return [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+
+
+def get_provider(tmp_path: Path, timeout_ms: int = 2000) -> PluginProvider:
+    host = PluginHost(lambda _response: None, timeout_ms, [str(tmp_path)])
+    assert len(host.providers) == 1
+    return host.providers[0]
+
+
+async def search(provider: PluginProvider, query: str) -> list[str]:
+    names: list[str] = []
+    async for results in provider.search(query):
+        names.extend(result.name for result in results)
+    return names
+
+
+async def wait_until(condition: Callable[[], Any], timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        await asyncio.sleep(0.01)
+
+
+def run(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    return asyncio.run(coroutine)
+
+
+def test_search(tmp_path: Path) -> None:
+    make_plugin(tmp_path, "stub")
+    provider = get_provider(tmp_path)
+
+    async def main() -> None:
+        assert await search(provider, "fire") == ["fire"]
+        assert await search(provider, "fox") == ["fox"]
+        provider.stop()
+
+    run(main())
+
+
+def test_search_times_out(tmp_path: Path) -> None:
+    make_plugin(tmp_path, "silent", answer=False)
+    provider = get_provider(tmp_path, timeout_ms=100)
+    timeouts = metrics.snapshot()["counters"].get("plugin.silent.timeouts", 0)
+
+    async def main() -> None:
+        started_at = time.monotonic()
+        assert await search(provider, "fire") == []
+        assert time.monotonic() - started_at < 1
+        provider.stop()
+
+    run(main())
+    assert metrics.snapshot()["counters"]["plugin.silent.timeouts"] == timeouts + 1
+
+
+def test_new_search_interrupts_the_previous_one(tmp_path: Path) -> None:
+    plugin_dir = make_plugin(tmp_path, "silent", answer=False)
+    provider = get_provider(tmp_path, timeout_ms=300)
+
+    async def main() -> None:
+        first = asyncio.create_task(search(provider, "f"))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(search(provider, "fi"))
+        await asyncio.gather(first, second)
+        await wait_until(lambda: len(get_requests(plugin_dir)) == 3)
+        provider.stop()
+
+    run(main())
+    assert get_requests(plugin_dir)[:3] == [{"Search": "f"}, "Interrupt", {"Search": "fi"}]
+
+
+def test_plugin_is_disabled_after_crashing_repeatedly(tmp_path: Path) -> None:
+    make_plugin(tmp_path, "crashing", crash=True)
+    provider = get_provider(tmp_path)
+
+    async def main() -> None:
+        for _ in range(MAX_CRASHES):
+            assert not provider.disabled
+            assert await search(provider, "fire") == []
+            await wait_until(lambda: provider.get_pid() is None)
+        assert provider.disabled
+        assert await search(provider, "fire") == []
+        assert provider.get_pid() is None
+
+    run(main())
+
+
+def test_slow_plugin_is_restarted_without_counting_as_a_crash(tmp_path: Path) -> None:
+    make_plugin(tmp_path, "slow", answer=False)
+    provider = get_provider(tmp_path, timeout_ms=50)
+    restarts = metrics.snapshot()["counters"].get("plugin.slow.restarts", 0)
+
+    async def main() -> None:
+        pids = set()
+        for _ in range(MAX_UNFINISHED_SEARCHES * MAX_CRASHES):
+            assert await search(provider, "fire") == []
+            if pid := provider.get_pid():
+                pids.add(pid)
+        # Restarted after every MAX_UNFINISHED_SEARCHES searches
+        assert len(pids) == MAX_CRASHES
+        provider.stop()
+
+    run(main())
+    assert metrics.snapshot()["counters"]["plugin.slow.restarts"] == restarts + MAX_CRASHES
+    assert not provider.disabled
+    assert not provider._crash_times
+
+
+def test_stop_kills_a_plugin_that_ignores_exit(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(plugin_host, "EXIT_TIMEOUT_SECONDS", 1)
+    plugin_dir = make_plugin(tmp_path, "stubborn", exits=False)
+    provider = get_provider(tmp_path)
+
+    async def main() -> None:
+        assert await search(provider, "fire") == ["fire"]
+        process = provider._process
+        assert process
+        provider.stop()
+        await wait_until(lambda: process.exited)
+        assert get_requests(plugin_dir)[-1] == "Exit"
+
+    run(main())
+    # Stopped, not crashed
+    assert not provider.disabled
+    assert not provider._crash_times
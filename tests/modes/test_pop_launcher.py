@@ -0,0 +1,65 @@
+"""
+The threaded reader of PopLauncherGLibImpl against a stub pop-launcher, on the GLib event loop
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from collections.abc import Iterator
+
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.events import GLibEventLoopPolicy  # noqa: E402
+
+from ulauncher.core.PopLauncherClient import TResponse  # noqa: E402
+from ulauncher.modes.PopLauncher import PopLauncherGLibImpl  # noqa: E402
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopResponse  # noqa: E402
+from ulauncher.utils import tracing  # noqa: E402
+
+RESPONSES = [{"Fill": "first"}, {"Fill": "second"}, "Close"]
+STUB_LAUNCHER = f"import sys\nsys.stdout.write({''.join(json.dumps(r) + chr(10) for r in RESPONSES)!r})\n"
+
+
+@pytest.fixture(autouse=True)
+def _glib_loop() -> Iterator[None]:
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
+    yield
+    asyncio.set_event_loop_policy(None)
+
+
+def read_threaded(fail_on: str | None = None) -> list[TResponse]:
+    received: list[TResponse] = []
+
+    def handler(response: TResponse) -> None:
+        received.append(response)
+        if isinstance(response, PopResponse.Fill) and response == fail_on:
+            msg = "handler failed"
+            raise RuntimeError(msg)
+
+    async def run() -> None:
+        PopLauncherGLibImpl(handler, [sys.executable, "-c", STUB_LAUNCHER], threaded=True)
+        for _ in range(200):
+            if received and isinstance(received[-1], PopResponse.Close):
+                return
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    return received
+
+
+def test_failing_handler_does_not_lose_the_next_responses() -> None:
+    received = read_threaded(fail_on="first")
+    assert [type(response) for response in received] == [PopResponse.Fill, PopResponse.Fill, PopResponse.Close]
+
+
+def test_decodes_are_traced_on_the_main_thread() -> None:
+    tracing.set_enabled(True)
+    try:
+        read_threaded()
+        assert tracing.get_histograms()["from_json"]["count"] == len(RESPONSES)
+    finally:
+        tracing.set_enabled(False)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import tracemalloc
+from collections.abc import Iterator
+
+import pytest
+
+from ulauncher.utils import allocations
+
+
+@pytest.fixture(autouse=True)
+def _enabled() -> Iterator[None]:
+    allocations.set_enabled(True)
+    yield
+    allocations.set_enabled(False)
+
+
+def test_stage_accounts_peak_and_retained_bytes() -> None:
+    with allocations.stage("outer", rows=10):
+        kept = bytearray(100_000)
+        transient = bytearray(200_000)
+        del transient
+    stats = allocations.get_stats()["outer"]
+    assert stats["count"] == 1
+    assert 90_000 <= stats["retained"] < 150_000
+    assert stats["peak"] >= 300_000
+    assert stats["peak_per_row"] == stats["peak"] / 10
+    assert kept
+
+
+def test_nested_stage_keeps_peak_of_outer_stage() -> None:
+    with allocations.stage("outer"):
+        transient = bytearray(500_000)
+        del transient
+        with allocations.stage("inner"):
+            inner = bytearray(100_000)
+        del inner
+    stats = allocations.get_stats()
+    assert stats["outer"]["peak"] >= 500_000
+    assert 100_000 <= stats["inner"]["peak"] < 500_000
+
+
+def test_outer_stage_peak_includes_inner_stage_peak() -> None:
+    with allocations.stage("outer"), allocations.stage("inner"):
+        transient = bytearray(500_000)
+        del transient
+    stats = allocations.get_stats()
+    assert stats["outer"]["peak"] >= 500_000
+    assert stats["inner"]["peak"] >= 500_000
+
+
+def test_disabled_stage_does_nothing() -> None:
+    allocations.set_enabled(False)
+    with allocations.stage("decode") as stage:
+        stage.rows = 10
+    assert allocations.get_stats() == {}
+
+
+def test_disabling_keeps_tracing_started_by_someone_else() -> None:
+    allocations.set_enabled(False)
+    tracemalloc.start()
+    try:
+        allocations.set_enabled(True)
+        allocations.set_enabled(False)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_disabling_stops_tracing_started_here() -> None:
+    assert tracemalloc.is_tracing()
+    allocations.set_enabled(False)
+    assert not tracemalloc.is_tracing()
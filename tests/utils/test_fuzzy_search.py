@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import random
+from difflib import SequenceMatcher
+
+from ulauncher.utils.fuzzy_search import _get_matching_blocks_native, get_score
+
+
+def test_native_matching_blocks_are_the_same_as_difflib() -> None:
+    rng = random.Random(1)
+    alphabet = "abcab cdé"
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        if rng.random() < 0.5:
+            query = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+        else:
+            start = rng.randint(0, len(text))
+            query = text[start : start + rng.randint(0, 10)]
+        assert _get_matching_blocks_native(query, text) == SequenceMatcher(None, query, text).get_matching_blocks()
+
+
+def test_native_matching_blocks_of_long_texts() -> None:
+    text = "a" * 150 + "b" * 150
+    assert _get_matching_blocks_native("ab", text) == SequenceMatcher(None, "ab", text).get_matching_blocks()
+
+
+def test_get_score() -> None:
+    assert get_score("", "Firefox") == 0
+    assert get_score("fire", "Firefox") > get_score("fire", "Campfire")
+    assert get_score("lbroffice", "LibreOffice Writer") > 50
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import pytest
+
+from ulauncher.utils.lru_cache import LruCache, lru_cache
+
+
+def make_cached(maxsize: int) -> tuple[list[int], LruCache[[int], int]]:
+    calls: list[int] = []
+
+    @lru_cache(maxsize=maxsize)
+    def double(value: int) -> int:
+        calls.append(value)
+        return value * 2
+
+    return calls, double
+
+
+def test_evicts_least_recently_used() -> None:
+    calls, double = make_cached(2)
+    double(1)
+    double(2)
+    double(1)
+    double(3)  # Evicts 2, which was used least recently
+    double(1)
+    double(2)
+    assert calls == [1, 2, 3, 2]
+    assert double.cache_info() == (2, 4, 2, 2)
+
+
+def test_keyword_arguments_are_separate_keys() -> None:
+    calls: list[tuple[int, int]] = []
+
+    @lru_cache(maxsize=10)
+    def add(a: int, b: int = 0) -> int:
+        calls.append((a, b))
+        return a + b
+
+    assert add(1, 2) == add(1, b=2) == 3
+    assert add(1, b=2) == 3
+    assert calls == [(1, 2), (1, 2)]
+
+
+def test_trim_keeps_most_recently_used_and_statistics() -> None:
+    calls, double = make_cached(10)
+    for value in range(5):
+        double(value)
+    double(0)
+    double.cache_trim(2)
+    assert double.cache_info() == (1, 5, 10, 2)
+    double(0)
+    double(4)
+    double(1)
+    assert calls == [0, 1, 2, 3, 4, 1]
+
+
+def test_exceptions_are_not_cached() -> None:
+    calls: list[str] = []
+
+    @lru_cache(maxsize=10)
+    def load(name: str) -> str:
+        calls.append(name)
+        raise LookupError(name)
+
+    for _ in range(2):
+        with pytest.raises(LookupError):
+            load("app")
+    assert calls == ["app", "app"]
+    assert load.cache_info().currsize == 0
+
+
+def test_clear_resets_statistics() -> None:
+    _calls, double = make_cached(10)
+    double(1)
+    double(1)
+    double.cache_clear()
+    assert double.cache_info() == (0, 0, 10, 0)
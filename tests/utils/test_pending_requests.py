@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+
+from ulauncher.utils.pending_requests import PendingRequests
+
+
+def test_concurrent_requests_share_the_answer() -> None:
+    async def run() -> tuple[list[str], list[int]]:
+        pending: PendingRequests[int, str] = PendingRequests()
+        sent: list[int] = []
+
+        def send() -> bool:
+            sent.append(1)
+            return True
+
+        tasks = [asyncio.create_task(pending.request(1, send, "")) for _ in range(3)]
+        await asyncio.sleep(0)
+        pending.resolve(1, "answer")
+        return list(await asyncio.gather(*tasks)), sent
+
+    answers, sent = asyncio.run(run())
+    assert answers == ["answer"] * 3
+    assert sent == [1]
+
+
+def test_giving_up_does_not_cancel_the_other_requests() -> None:
+    async def run() -> tuple[bool, str]:
+        pending: PendingRequests[int, str] = PendingRequests()
+        first = asyncio.create_task(pending.request(1, lambda: True, ""))
+        second = asyncio.create_task(pending.request(1, lambda: True, ""))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        pending.resolve(1, "answer")
+        return first.cancelled(), await second
+
+    assert asyncio.run(run()) == (True, "answer")
+
+
+def test_request_is_sent_again_when_all_callers_gave_up() -> None:
+    async def run() -> list[int]:
+        pending: PendingRequests[int, str] = PendingRequests()
+        sent: list[int] = []
+
+        def send() -> bool:
+            sent.append(1)
+            return True
+
+        try:
+            async with asyncio.timeout(0.01):
+                await pending.request(1, send, "")
+        except TimeoutError:
+            pass
+        task = asyncio.create_task(pending.request(1, send, ""))
+        await asyncio.sleep(0)
+        pending.resolve(1, "answer")
+        await task
+        return sent
+
+    assert asyncio.run(run()) == [1, 1]
+
+
+def test_unsent_and_resolved_requests_get_the_default() -> None:
+    async def run() -> tuple[str, str]:
+        pending: PendingRequests[int, str] = PendingRequests()
+        unsent = await pending.request(1, lambda: False, "default")
+        task = asyncio.create_task(pending.request(2, lambda: True, "default"))
+        await asyncio.sleep(0)
+        pending.resolve_all("default")
+        return unsent, await task
+
+    assert asyncio.run(run()) == ("default", "default")
@@ -0,0 +1,162 @@
+"""
+Lightweight client for activating an already running Ulauncher instance.
+
+Loading GTK costs far more than forwarding an activation to the daemon, so this module only uses Gio to call
+the org.freedesktop.Application D-Bus interface of the running Gtk.Application directly. When no instance is
+running (or the arguments are something only the full app understands) it falls back to the full startup.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+
+from gi.repository import Gio, GLib
+
+from ulauncher.config import APP_ID, get_options
+from ulauncher.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+APPLICATION_INTERFACE = "org.freedesktop.Application"
+
+
+def get_object_path(app_id: str) -> str:
+    """
+    Get the object path Gio.Application exports itself on, ex "io.ulauncher.Ulauncher" -> "/io/ulauncher/Ulauncher"
+    """
+    return "/" + app_id.replace(".", "/").replace("-", "_")
+
+
+def get_platform_data() -> dict[str, GLib.Variant]:
+    """
+    Forward the activation tokens so the compositor lets the running instance take focus
+    """
+    platform_data = {}
+    if activation_token := os.environ.get("XDG_ACTIVATION_TOKEN"):
+        platform_data["activation-token"] = GLib.Variant("s", activation_token)
+    if startup_id := os.environ.get("DESKTOP_STARTUP_ID"):
+        platform_data["desktop-startup-id"] = GLib.Variant("s", startup_id)
+    return platform_data
+
+
+def parse_query_argument(args: list[str]) -> tuple[bool, str | None]:
+    """
+    :returns: whether the client can handle the arguments, and the query to set (if any)
+    """
+    if not args:
+        return True, None
+    if len(args) == 2 and args[0] in ("-q", "--query"):  # noqa: PLR2004
+        return True, args[1]
+    return False, None
+
+
+def is_running(connection: Gio.DBusConnection) -> bool:
+    reply = connection.call_sync(
+        "org.freedesktop.DBus",
+        "/org/freedesktop/DBus",
+        "org.freedesktop.DBus",
+        "NameHasOwner",
+        GLib.Variant("(s)", (APP_ID,)),
+        GLib.VariantType("(b)"),
+        Gio.DBusCallFlags.NONE,
+        -1,
+        None,
+    )
+    return bool(reply.unpack()[0])
+
+
+def activate(query: str | None = None) -> bool:
+    """
+    Activate the running instance (setting the query if given)
+    :returns: False if there is no running instance to activate
+    """
+    try:
+        connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        if not is_running(connection):
+            return False
+
+        platform_data = get_platform_data()
+        if query is None:
+            method = "Activate"
+            parameters = GLib.Variant("(a{sv})", (platform_data,))
+        else:
+            method = "ActivateAction"
+            parameters = GLib.Variant("(sava{sv})", ("set-query", [GLib.Variant("s", query)], platform_data))
+
+        connection.call_sync(
+            APP_ID,
+            get_object_path(APP_ID),
+            APPLICATION_INTERFACE,
+            method,
+            parameters,
+            None,
+            Gio.DBusCallFlags.NO_AUTO_START,
+            -1,
+            None,
+        )
+    except GLib.Error:
+        logger.exception("Could not activate the running Ulauncher instance")
+        return False
+    return True
+
+
+def get_metrics() -> dict | None:
+    """
+    :returns: the runtime metrics of the running instance, or None if there is no running instance to get them from
+    """
+    try:
+        connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        if not is_running(connection):
+            return None
+        reply = connection.call_sync(
+            APP_ID,
+            get_object_path(APP_ID),
+            metrics.DBUS_INTERFACE,
+            "GetMetrics",
+            None,
+            GLib.VariantType("(s)"),
+            Gio.DBusCallFlags.NO_AUTO_START,
+            -1,
+            None,
+        )
+    except GLib.Error:
+        logger.exception("Could not get the metrics of the running Ulauncher instance")
+        return None
+    return json.loads(reply.unpack()[0])
+
+
+def print_metrics() -> None:
+    """
+    Print the runtime metrics of the running instance as JSON (for `ulauncher --metrics`)
+    """
+    runtime_metrics = get_metrics()
+    if runtime_metrics is None:
+        sys.exit("Ulauncher is not running")
+    sys.stdout.write(json.dumps(runtime_metrics, indent=2) + "\n")
+
+
+def main() -> None:
+    """
+    Forward the activation to the running instance if there is one, otherwise start Ulauncher
+    """
+    options = get_options()
+    if options.metrics:
+        print_metrics()
+        return
+
+    if options.json:
+        from ulauncher.headless import main as search_headless
+
+        search_headless(options.query)
+        return
+
+    can_handle, query = parse_query_argument(sys.argv[1:])
+    if can_handle and activate(query):
+        return
+
+    from ulauncher.main import main as start_ulauncher
+
+    start_ulauncher()
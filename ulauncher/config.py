@@ -35,6 +35,15 @@ def get_options():
         "--version", action="version", help=gettext("Show version number and exit"), version=f"Ulauncher {VERSION}"
     )
     parser.add_argument("--no-window", action="store_true", help=gettext("Hide window upon application startup"))
+    parser.add_argument("-q", "--query", help=gettext("Show the window with the given query"))
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help=gettext("Print the results for --query as JSON, without showing the window, and exit"),
+    )
+    parser.add_argument(
+        "--metrics", action="store_true", help=gettext("Print runtime metrics of the running instance and exit")
+    )
     parser.add_argument("--dev", action="store_true", help=gettext("Enables context menu in the Preferences UI"))
     parser.add_argument("--no-extensions", action="store_true", help=argparse.SUPPRESS)
     parser.add_argument("--no-window-shadow", action="store_true", help=argparse.SUPPRESS)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Collection
+from typing import Any
+
+from ulauncher.modes.poplauncher.poplauncher_ipc import (
+    ContextOption,
+    PopRequest,
+    PopResponse,
+    TPopRequest,
+    TPopResponse,
+)
+from ulauncher.modes.poplauncher.result import Result, ResultBatch, results_from_update
+from ulauncher.utils import allocations, metrics, tracing
+from ulauncher.utils.pending_requests import PendingRequests
+
+logger = logging.getLogger(__name__)
+
+# Responses as handed to the response callback. In threaded mode Updates arrive as prebuilt result batches
+TResponse = TPopResponse | ResultBatch
+
+
+class PopLauncherClient:
+    """
+    The pop-launcher protocol handling of the pop-launcher result provider (implements the "ResultProvider"
+    protocol), independent of how the process is run. Subclasses implement running the process.
+
+    pop-launcher answers every Search with one Update, in the order the searches were sent, so each
+    Update resolves the oldest pending search (a ResultBatch that replaced older Updates resolves as many,
+    and only the newest of those gets the results). Context responses resolve the pending context request of
+    their result. Other responses (Close, Fill, ...) are passed to on_response.
+
+    The results of the plugins replaced by in-process result providers are left out, by their category icon
+    (hidden_categories).
+
+    The pop-launcher process is started by start(), or by the first search, and (re)started again after
+    it has been stopped or has exited.
+    """
+
+    name = "pop-launcher"
+    priority = 0
+    immediate = False
+    on_response: Callable[[TResponse], None]
+    # The running process, as returned by _spawn()
+    process: Any = None
+
+    def __init__(self, on_response: Callable[[TResponse], None], hidden_categories: Collection[str] = ()) -> None:
+        self.on_response = on_response
+        self.hidden_categories = hidden_categories
+        # Counts the started and stopped processes, to ignore the responses of the previous ones
+        self._generation = 0
+        self._pending_searches: deque[asyncio.Future[tuple[Result, ...]]] = deque()
+        self._pending_contexts: PendingRequests[int, list[ContextOption]] = PendingRequests()
+
+    def _spawn(self, on_response: Callable[[TResponse], None]) -> Any:
+        """
+        Start a pop-launcher process that passes its responses to on_response
+        """
+        raise NotImplementedError
+
+    def _is_running(self, process: Any) -> bool:
+        raise NotImplementedError
+
+    def _send_request(self, process: Any, request: TPopRequest) -> None:
+        raise NotImplementedError
+
+    def _stop_process(self, process: Any) -> None:
+        """
+        Ask the process to exit (it stops its plugins), and kill it if it doesn't
+        """
+        raise NotImplementedError
+
+    def _get_pid(self, process: Any) -> int | None:
+        raise NotImplementedError
+
+    def start(self) -> Any:
+        """
+        Start the `pop-launcher` process (unless it's running)
+        """
+        if self.process is None or not self._is_running(self.process):
+            # Nothing pending can be answered by a new process
+            self._finish_pending()
+            self._generation += 1
+            generation = self._generation
+            self.process = self._spawn(lambda response: self._on_response(generation, response))
+        return self.process
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self._stop_process(self.process)
+            self.process = None
+            self._generation += 1
+        self._finish_pending()
+
+    def get_pids(self) -> list[int]:
+        pid = self._get_pid(self.process) if self.process is not None else None
+        return [pid] if pid else []
+
+    def _send(self, request: TPopRequest) -> bool:
+        """
+        Send a request about the current results. Those are from the running process, so it isn't restarted for it
+        """
+        if self.process is None or not self._is_running(self.process):
+            logger.warning("Can't send %s, pop-launcher is not running", request.to_json())
+            return False
+        self._send_request(self.process, request)
+        return True
+
+    def _finish_pending(self) -> None:
+        """
+        Resolve the pending requests without results
+        """
+        for future in self._pending_searches:
+            if not future.done():
+                future.set_result(())
+        self._pending_searches.clear()
+        self._pending_contexts.resolve_all([])
+
+    def _on_response(self, generation: int, response: TResponse) -> None:
+        if generation != self._generation:
+            return  # From a process that was stopped
+        if isinstance(response, PopResponse.Update | ResultBatch):
+            self._on_update(response)
+            return
+        if isinstance(response, PopResponse.Context):
+            self._pending_contexts.resolve(response.id, response.options)
+            return
+        self.on_response(response)
+
+    def _on_update(self, update: PopResponse.Update | ResultBatch) -> None:
+        updates = update.updates if isinstance(update, ResultBatch) else 1
+        metrics.increment("updates_received", updates)
+        answered = [self._pending_searches.popleft() for _ in range(min(updates, len(self._pending_searches)))]
+        for future in answered[:-1]:
+            # The Update of this search was replaced by a newer one before it was handled
+            if not future.done():
+                future.set_result(())
+        # A newer search has replaced the one answered by the newest Update
+        cancelled = bool(answered) and answered[-1].cancelled()
+        # Each dropped Update is counted here only: those replaced in the reader thread, and the cancelled one.
+        # Only the Updates that answered searches were for keystrokes
+        dropped = updates - 1 + cancelled
+        if dropped:
+            metrics.increment("updates_dropped", dropped)
+        if answered and (superseded := len(answered) - 1 + cancelled):
+            tracing.results_superseded(superseded)
+        if not answered:
+            # Update that doesn't answer a search
+            self.on_response(update)
+        elif not cancelled:
+            if isinstance(update, ResultBatch):
+                answered[-1].set_result(update.results)
+            else:
+                with allocations.stage("model", rows=len(update)):
+                    answered[-1].set_result(results_from_update(update, self.hidden_categories))
+
+    async def search(self, query: str) -> AsyncIterator[tuple[Result, ...]]:
+        """
+        Triggered when user changes the query text.
+        Yields the results.
+        """
+        future: asyncio.Future[tuple[Result, ...]] = asyncio.get_running_loop().create_future()
+        process = self.start()
+        self._pending_searches.append(future)
+        metrics.increment("searches_sent")
+        self._send_request(process, PopRequest.Search(query))
+        yield await future
+
+    def activate(self, result: Result) -> None:
+        """
+        Triggered when user presses enter.
+        """
+        self._send(PopRequest.Activate(result.id))
+
+    async def context(self, result: Result) -> list[ContextOption]:
+        """
+        Request the context options of a result
+        """
+        return await self._pending_contexts.request(result.id, lambda: self._send(PopRequest.Context(result.id)), [])
+
+    def activate_context(self, result: Result, option_id: int) -> None:
+        self._send(PopRequest.ActivateContext(id=result.id, context=option_id))
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Sequence
+
+from ulauncher.core.ResultProvider import ResultProvider
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption
+from ulauncher.modes.poplauncher.result import Result
+from ulauncher.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ResultFanout:
+    """
+    Queries several result providers in parallel and merges their results, implementing the ResultProvider
+    protocol itself.
+
+    Whatever has arrived by the deadline is shown, or right away when an immediate provider has results.
+    Results arriving later are merged in as they come (the window keeps the selected row in place for those).
+    Providers that take longer than the timeout are cancelled.
+    """
+
+    name = "fanout"
+    priority = 0
+    immediate = False
+
+    def __init__(self, providers: Sequence[ResultProvider], deadline_ms: int, timeout_ms: int):
+        self.providers = list(providers)
+        self.deadline = deadline_ms / 1000
+        self.timeout = timeout_ms / 1000
+        # The provider of each shown result (by object id), to activate it with the right provider
+        self._owners: dict[int, ResultProvider] = {}
+
+    async def search(self, query: str) -> AsyncIterator[list[Result]]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        batches: dict[int, Sequence[Result]] = {}
+        # (provider index, whether the provider is done)
+        updates: asyncio.Queue[tuple[int, bool]] = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self._collect(index, provider, query, batches, updates))
+            for index, provider in enumerate(self.providers)
+        ]
+        finished = 0
+        published = False
+        changed = False
+        try:
+            while finished < len(tasks):
+                timeout = None if published else max(0.0, deadline - loop.time())
+                try:
+                    index, done = await asyncio.wait_for(updates.get(), timeout)
+                except TimeoutError:
+                    # Deadline: show what has arrived (if nothing has, keep showing the previous results)
+                    published = True
+                    if batches:
+                        yield self._merge(batches)
+                        changed = False
+                    continue
+                if done:
+                    finished += 1
+                else:
+                    changed = True
+                    published = published or self.providers[index].immediate
+                if published and changed:
+                    yield self._merge(batches)
+                    changed = False
+            if changed:
+                yield self._merge(batches)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _collect(
+        self,
+        index: int,
+        provider: ResultProvider,
+        query: str,
+        batches: dict[int, Sequence[Result]],
+        updates: asyncio.Queue[tuple[int, bool]],
+    ) -> None:
+        started_at = time.monotonic()
+        first_batch = True
+        try:
+            async with asyncio.timeout(self.timeout):
+                async for results in provider.search(query):
+                    if first_batch:
+                        metrics.observe(f"provider.{provider.name}.latency", (time.monotonic() - started_at) * 1000)
+                        first_batch = False
+                    batches[index] = results
+                    updates.put_nowait((index, False))
+        except TimeoutError:
+            metrics.increment(f"provider.{provider.name}.timeouts")
+            logger.warning("Result provider %s timed out for query %r", provider.name, query)
+        except Exception:
+            metrics.increment(f"provider.{provider.name}.errors")
+            logger.exception("Result provider %s failed for query %r", provider.name, query)
+        finally:
+            updates.put_nowait((index, True))
+
+    def _merge(self, batches: dict[int, Sequence[Result]]) -> list[Result]:
+        """
+        Rank the results by provider priority, then by their rank within their provider
+        (interleaving providers with the same priority)
+        """
+        ranked = []
+        owners = {}
+        for index, provider in enumerate(self.providers):
+            for position, result in enumerate(batches.get(index, ())):
+                ranked.append((-provider.priority, position, index, result))
+                owners[id(result)] = provider
+        ranked.sort(key=lambda item: item[:3])
+        self._owners = owners
+        return [item[3] for item in ranked]
+
+    def get_provider(self, result: Result) -> ResultProvider | None:
+        """
+        :returns: the provider of a result from the latest merged results
+        """
+        return self._owners.get(id(result))
+
+    def activate(self, result: Result) -> None:
+        provider = self.get_provider(result)
+        if provider is None:
+            logger.warning("Can't activate result %s, it's not from the current results", result.name)
+            return
+        provider.activate(result)
+
+    async def context(self, result: Result) -> list[ContextOption]:
+        provider = self.get_provider(result)
+        if provider is None:
+            return []
+        return await provider.context(result)
+
+    def activate_context(self, result: Result, option_id: int) -> None:
+        provider = self.get_provider(result)
+        if provider is None:
+            logger.warning("Can't activate the context of %s, it's not from the current results", result.name)
+            return
+        provider.activate_context(result, option_id)
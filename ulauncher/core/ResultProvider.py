@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Sequence
+from typing import Protocol
+
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption
+from ulauncher.modes.poplauncher.result import Result
+
+
+class ResultProvider(Protocol):
+    """
+    Provides results for queries. Searches run as asyncio tasks (on the GLib main loop in the window, or on the
+    plain asyncio loop of the search core worker), so concurrent providers, timeouts and dropping outdated searches
+    are expressed with tasks instead of callbacks.
+    """
+
+    name: str
+    # Results of providers with a higher priority are ranked first when results are merged
+    priority: int
+    # Show the results of the provider as soon as they arrive, instead of waiting for the search deadline
+    # (for providers that answer within the same frame)
+    immediate: bool
+
+    def search(self, query: str) -> AsyncIterator[Sequence[Result]]:
+        """
+        Stream the results for the query. Each batch replaces the previous one.
+        The search is cancelled (by cancelling the task iterating it) when the query changes.
+        """
+        ...
+
+    def activate(self, result: Result) -> None:
+        """
+        Activate a result returned by this provider
+        """
+        ...
+
+    async def context(self, result: Result) -> list[ContextOption]:
+        """
+        Get the context options (alternative actions) of a result returned by this provider
+        """
+        ...
+
+    def activate_context(self, result: Result, option_id: int) -> None:
+        """
+        Activate a context option of a result returned by this provider
+        """
+        ...
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import subprocess
+import threading
+from collections.abc import Callable, Collection
+
+from ulauncher.core.PopLauncherClient import PopLauncherClient, TResponse
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopRequest, PopResponse, TPopRequest
+from ulauncher.utils import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+# pop-launcher is killed if it hasn't exited this long after it was asked to
+EXIT_TIMEOUT_SECONDS = 2
+
+
+class StdioPopLauncherProcess:
+    """
+    A pop-launcher process run with the standard library, for asyncio loops without GLib. Requests are written
+    to its stdin, and a reader thread decodes the responses and hands them over to the event loop.
+    """
+
+    # Asked to exit by stop()
+    stopping = False
+
+    def __init__(self, command: list[str], on_response: Callable[[TResponse], None]) -> None:
+        self.on_response = on_response
+        self.loop = asyncio.get_running_loop()
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, encoding="utf-8")
+        metrics.increment("backend_starts")
+        threading.Thread(target=self._read_in_thread, name="pop-launcher-reader", daemon=True).start()
+
+    @property
+    def running(self) -> bool:
+        return not self.stopping and self.process.poll() is None
+
+    def send_request(self, request: TPopRequest) -> None:
+        assert self.process.stdin
+        with tracing.span("send_request"):
+            try:
+                self.process.stdin.write(request.to_json() + "\n")
+                self.process.stdin.flush()
+            except OSError:
+                logger.warning("Could not send %s, pop-launcher has exited", request.to_json())
+
+    def stop(self) -> None:
+        """
+        Ask pop-launcher to exit (it stops its plugins), and kill it if it doesn't
+        """
+        if not self.running:
+            return
+        self.stopping = True
+        self.send_request(PopRequest.Exit())
+        self.loop.call_later(EXIT_TIMEOUT_SECONDS, self._kill)
+
+    def wait(self) -> int:
+        """
+        Wait for the process to exit (blocking)
+        """
+        return self.process.wait()
+
+    def _kill(self) -> None:
+        if self.process.poll() is None:
+            logger.warning("pop-launcher didn't exit when asked to, killing it")
+            self.process.kill()
+
+    def _read_in_thread(self) -> None:
+        """
+        Blocking read loop of the reader thread. Runs until EOF
+        """
+        assert self.process.stdout
+        for line in self.process.stdout:
+            try:
+                with tracing.span("from_json"):
+                    response = PopResponse.from_json(line)
+            except ValueError:
+                logger.exception("Invalid output from pop-launcher. Expected JSON, received: %s", line)
+                continue
+            self.loop.call_soon_threadsafe(self.on_response, response)
+        returncode = self.process.wait()
+        metrics.increment("backend_exits")
+        if not self.stopping:
+            logger.error("pop-launcher exited with status %i", returncode)
+
+
+class StdioPopLauncherProvider(PopLauncherClient):
+    """
+    The pop-launcher result provider of the search core worker, running pop-launcher with the standard library
+    (see PopLauncherClient for the protocol handling). It must be used from a running asyncio loop.
+    """
+
+    process: StdioPopLauncherProcess | None
+
+    def __init__(
+        self, on_response: Callable[[TResponse], None], command: list[str], hidden_categories: Collection[str] = ()
+    ) -> None:
+        super().__init__(on_response, hidden_categories)
+        self.command = command
+
+    def _spawn(self, on_response: Callable[[TResponse], None]) -> StdioPopLauncherProcess:
+        return StdioPopLauncherProcess(self.command, on_response)
+
+    def _is_running(self, process: StdioPopLauncherProcess) -> bool:
+        return process.running
+
+    def _send_request(self, process: StdioPopLauncherProcess, request: TPopRequest) -> None:
+        process.send_request(request)
+
+    def _stop_process(self, process: StdioPopLauncherProcess) -> None:
+        process.stop()
+
+    def _get_pid(self, process: StdioPopLauncherProcess) -> int | None:
+        return process.process.pid
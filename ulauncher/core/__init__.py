@@ -0,0 +1,15 @@
+"""
+The search core: result providers, the pop-launcher protocol handling, result ranking and the query history.
+
+Nothing in this package may import from gi.repository (GTK, GLib or Gio), so that it runs without a display and
+without a GLib main loop: in the window process, in the search core worker process
+(`python -m ulauncher.core.worker`), in benchmarks and in tests.
+
+Besides the standard library, the core depends on these modules, which must stay GTK-free too
+(tests/core/test_imports.py checks that):
+- ulauncher.modes.poplauncher.jsonproto, poplauncher_ipc and result: the pop-launcher protocol and result model
+- ulauncher.modes.poplauncher.plugins: the pop-launcher plugin configs, to hide the results of replaced plugins
+- ulauncher.config, ulauncher.paths and ulauncher.utils.Settings: paths and settings
+- ulauncher.utils.allocations, metrics, tracing, json_utils and logging_pipeline: instrumentation and logging
+- ulauncher.utils.pending_requests: the requests awaiting an answer from another process
+"""
@@ -0,0 +1,60 @@
+"""
+The messages between the window and the search core worker: one JSON array per line, with the message type first.
+
+window -> worker:
+    ["search", serial, query]               search, replacing the previous search
+    ["activate", key]
+    ["context", key]
+    ["activate_context", key, option_id]
+    ["exit"]
+
+worker -> window:
+    ["results", serial, [row, ...]]         results for the search, replacing its previous results
+    ["done", serial]                        the search is finished
+    ["context", key, [option, ...]]         the context options of a result
+    ["response", json]                      pop-launcher responses that don't answer a request (Close, Fill, ...)
+
+Results are sent as [key, name, description, icon, flags] rows. The key identifies the result in the worker,
+and is the id of the result on the window side.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from ulauncher.modes.poplauncher.result import Result
+
+SEARCHABLE = 1
+COMPACT = 2
+HIGHLIGHTABLE = 4
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def encode(message: list[Any]) -> str:
+    return _encoder.encode(message) + "\n"
+
+
+def decode(line: str | bytes) -> list[Any]:
+    message = json.loads(line)
+    if not isinstance(message, list) or not message:
+        msg = f"Invalid message: {line!r}"
+        raise ValueError(msg)
+    return message
+
+
+def encode_result(key: int, result: Result) -> list[Any]:
+    flags = (
+        (SEARCHABLE if result.searchable else 0)
+        | (COMPACT if result.compact else 0)
+        | (HIGHLIGHTABLE if result.highlightable else 0)
+    )
+    return [key, result.name, result.description, result.icon, flags]
+
+
+def decode_result(row: list[Any]) -> Result:
+    key, name, description, icon, flags = row
+    return Result(
+        key, name, description, icon, bool(flags & SEARCHABLE), bool(flags & COMPACT), bool(flags & HIGHLIGHTABLE)
+    )
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from ulauncher.config import PATHS
+from ulauncher.modes.poplauncher.result import Result
+from ulauncher.utils.json_utils import json_load, json_save
+
+query_history_path = f"{PATHS.STATE}/query_history.json"
+# Module state, like the settings singleton: loaded when first needed, and dropped to release memory
+_query_history: dict[str, str] | None = None
+
+
+def get_query_history() -> dict[str, str]:
+    """
+    The result picked last for each query (loaded when first needed, and again after it was released)
+    """
+    global _query_history  # noqa: PLW0603
+    if _query_history is None:
+        _query_history = json_load(query_history_path)
+    return _query_history
+
+
+def release_query_history() -> None:
+    global _query_history  # noqa: PLW0603
+    _query_history = None
+
+
+def remember_pick(query: str, result: Result) -> None:
+    """
+    Remember the result picked for the query, to select it by default next time
+    """
+    if query and result.searchable:
+        query_history = get_query_history()
+        query_history[str(query)] = result.name
+        json_save(query_history, query_history_path)
+
+
+def get_default_index(results: Sequence[Result], query: str) -> int:
+    """
+    Get the index of the result that should be selected: the one picked last for the query (0 by default)
+    """
+    previous_pick = get_query_history().get(query)
+
+    for index, result in enumerate(results):
+        if result.searchable and result.name == previous_pick:
+            return index
+    return 0
@@ -0,0 +1,160 @@
+"""
+The search core as a worker process: `python -m ulauncher.core.worker`
+
+Runs pop-launcher (with the standard library transport), decodes its responses, builds and ranks the results
+on its own asyncio loop, so that this work doesn't compete with rendering on the main loop of the window.
+It speaks the channel protocol (see ulauncher.core.channel) on stdin and stdout, and exits when stdin is
+closed. The window side is ulauncher.modes.CoreWorkerProvider.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import shlex
+import sys
+from collections import deque
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from ulauncher.core import channel
+from ulauncher.core.PopLauncherClient import TResponse
+from ulauncher.core.ResultFanout import ResultFanout
+from ulauncher.core.ResultProvider import ResultProvider
+from ulauncher.core.StdioPopLauncher import StdioPopLauncherProvider
+from ulauncher.modes.poplauncher.plugins import get_category_icons, get_replaced_plugins
+from ulauncher.modes.poplauncher.result import Result, ResultBatch
+from ulauncher.utils.logging_pipeline import LOG_FORMAT
+from ulauncher.utils.Settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Results of the latest batches sent are kept to be activated, the window may still show the previous batch
+KEPT_BATCHES = 2
+
+
+class SearchWorker:
+    """
+    Handles the messages from the window with a result provider
+    """
+
+    def __init__(self, result_provider: ResultProvider, send: Callable[[list[Any]], None]) -> None:
+        self.result_provider = result_provider
+        self.send = send
+        self._search_task: asyncio.Task | None = None
+        # Context requests, referenced until they're done
+        self._tasks: set[asyncio.Task] = set()
+        # The results of the latest batches sent, by key
+        self._batches: deque[dict[int, Result]] = deque(maxlen=KEPT_BATCHES)
+        self._next_key = 0
+
+    def handle(self, message: list[Any]) -> bool:
+        """
+        :returns: False if the window asked the worker to exit
+        """
+        match message:
+            case ["search", int(serial), str(query)]:
+                if self._search_task:
+                    self._search_task.cancel()
+                self._search_task = asyncio.create_task(self._search(serial, query))
+            case ["activate", int(key)]:
+                if result := self._get_result(key):
+                    self.result_provider.activate(result)
+            case ["context", int(key)]:
+                task = asyncio.create_task(self._context(key))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            case ["activate_context", int(key), int(option_id)]:
+                if result := self._get_result(key):
+                    self.result_provider.activate_context(result, option_id)
+            case ["exit"]:
+                return False
+            case _:
+                logger.warning("Invalid message from the window: %s", message)
+        return True
+
+    async def _search(self, serial: int, query: str) -> None:
+        try:
+            async for results in self.result_provider.search(query):
+                self.send(["results", serial, self._encode(results)])
+        finally:
+            self.send(["done", serial])
+
+    async def _context(self, key: int) -> None:
+        result = self._get_result(key)
+        options = await self.result_provider.context(result) if result else []
+        self.send(["context", key, options])
+
+    def _encode(self, results: Sequence[Result]) -> list[list[Any]]:
+        batch = {}
+        rows = []
+        for key, result in enumerate(results, self._next_key):
+            batch[key] = result
+            rows.append(channel.encode_result(key, result))
+        self._next_key += len(rows)
+        self._batches.append(batch)
+        return rows
+
+    def _get_result(self, key: int) -> Result | None:
+        for batch in reversed(self._batches):
+            if result := batch.get(key):
+                return result
+        logger.warning("Result %i is not from the latest results", key)
+        return None
+
+
+def _send(message: list[Any]) -> None:
+    sys.stdout.write(channel.encode(message))
+    sys.stdout.flush()
+
+
+def _forward_response(response: TResponse) -> None:
+    # The standard library transport hands over decoded responses, never prebuilt result batches
+    assert not isinstance(response, ResultBatch)
+    _send(["response", response.to_json()])
+
+
+async def serve(pop_launcher_command: list[str]) -> None:
+    """
+    Handle the messages from stdin until it's closed, or until the window asks the worker to exit
+    """
+    settings = get_settings()
+    hidden_categories = get_category_icons(get_replaced_plugins(settings))
+    pop_launcher = StdioPopLauncherProvider(_forward_response, pop_launcher_command, hidden_categories)
+    fanout = ResultFanout(
+        [pop_launcher], deadline_ms=settings.search_deadline_ms, timeout_ms=settings.search_timeout_ms
+    )
+    worker = SearchWorker(fanout, _send)
+    pop_launcher.start()
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    try:
+        while line := await reader.readline():
+            try:
+                message = channel.decode(line)
+            except ValueError:
+                logger.warning("Invalid message from the window: %r", line)
+                continue
+            if not worker.handle(message):
+                break
+    finally:
+        process = pop_launcher.process
+        pop_launcher.stop()
+        if process:
+            await asyncio.to_thread(process.wait)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ulauncher search core worker")
+    parser.add_argument("--pop-launcher-command", help="Defaults to the pop_launcher_command setting")
+    args = parser.parse_args()
+    # stderr is shared with the window process
+    logging.basicConfig(level=logging.WARNING, format=f"core-worker | {LOG_FORMAT}")
+    asyncio.run(serve(shlex.split(args.pop_launcher_command or get_settings().pop_launcher_command)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Headless search: `ulauncher --query "fire" --json`
+
+Runs the query through the same result providers, ranking and query history as the window, but without
+creating a window, and prints the results with their timings as JSON. For scripting, and for measuring the
+latency of the search pipeline without the GTK rendering.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import Any
+
+from gi.events import GLibEventLoopPolicy
+
+from ulauncher.core.history import get_default_index
+from ulauncher.core.PopLauncherClient import TResponse
+from ulauncher.modes.providers import create_result_provider
+from ulauncher.utils import metrics
+from ulauncher.utils.Settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Same as the window, when there are no jump keys
+DEFAULT_RESULT_LIMIT = 25
+
+
+def _on_response(response: TResponse) -> None:
+    logger.debug("Ignoring response %s, there is no window to handle it", response)
+
+
+async def search(query: str) -> dict[str, Any]:
+    """
+    Search like the window does, but wait for all result providers (or their timeout) to finish
+    """
+    settings = get_settings()
+    started_at = time.monotonic()
+    result_provider, backend = create_result_provider(settings, _on_response)
+    ready_at = time.monotonic()
+    # When each merged update would have been shown by the window
+    updates = []
+    results: list = []
+    try:
+        async for results in result_provider.search(query):
+            updates.append({"elapsed_ms": round((time.monotonic() - ready_at) * 1000, 2), "results": len(results)})
+    finally:
+        backend.stop()
+    searched_at = time.monotonic()
+
+    results = results[: len(settings.get_jump_keys()) or DEFAULT_RESULT_LIMIT]
+    provider_latencies = {
+        name.removeprefix("provider.").removesuffix(".latency"): round(summary["max"], 2)
+        for name, summary in metrics.snapshot()["histograms_ms"].items()
+        if name.startswith("provider.") and name.endswith(".latency")
+    }
+    return {
+        "query": query,
+        "results": [
+            {
+                "name": result.name,
+                "description": result.description,
+                "icon": result.icon,
+                "provider": provider.name if (provider := result_provider.get_provider(result)) else None,
+            }
+            for result in results
+        ],
+        # The result the window would select, by the query history
+        "selected": get_default_index(results, query) if results else None,
+        "timings_ms": {
+            "setup": round((ready_at - started_at) * 1000, 2),
+            "first_update": updates[0]["elapsed_ms"] if updates else None,
+            "search": round((searched_at - ready_at) * 1000, 2),
+            "providers": provider_latencies,
+            "updates": updates,
+        },
+    }
+
+
+def main(query: str | None) -> None:
+    if query is None:
+        sys.exit("--json requires a --query")
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
+    output = asyncio.run(search(query))
+    sys.stdout.write(json.dumps(output, indent=2) + "\n")
@@ -1,15 +1,20 @@
+import asyncio
 import contextlib
 import logging
 import signal
 import sys
 
 import gi
+from gi.events import GLibEventLoopPolicy
 from gi.repository import GLib, Gtk
 
+from ulauncher.client import print_metrics
 from ulauncher.config import API_VERSION, PATHS, VERSION, get_options
+from ulauncher.headless import main as search_headless
 from ulauncher.ui.UlauncherApp import UlauncherApp
 from ulauncher.utils.environment import DESKTOP_NAME, DISTRO, IS_X11_COMPATIBLE, XDG_SESSION_TYPE
-from ulauncher.utils.logging_color_formatter import ColoredFormatter
+from ulauncher.utils.logging_pipeline import setup_logging
+from ulauncher.utils.Settings import get_settings
 
 # from ulauncher.ui import LayerShell
 
@@ -29,22 +34,19 @@ def main() -> None:
         # --no-window flag prevents the app from starting.
         print("The --hide-window argument has been renamed to --no-window")  # noqa: T201
         sys.exit(2)
+    # The same as the client does, when started without it (ex with `pdm start --query fire --json`)
+    if options.metrics:
+        print_metrics()
+        return
+    if options.json:
+        search_headless(options.query)
+        return
 
-    # Set up global logging for stdout and file
-    file_handler = logging.FileHandler(f"{PATHS.STATE}/last.log", mode="w+")
-    stream_handler = logging.StreamHandler()
-    stream_handler.setLevel(logging.DEBUG if options.verbose else logging.WARNING)
-    stream_handler.setFormatter(ColoredFormatter())
-
-    logging.root.handlers = []
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s | %(levelname)s | %(message)s | %(module)s.%(funcName)s():%(lineno)s",
-        handlers=[file_handler, stream_handler],
-    )
+    # Set up global logging for stdout and file, written by a background thread
+    log_listener = setup_logging(f"{PATHS.STATE}/last.log", options.verbose, get_settings().log_levels)
 
     # Logger for actual use in this file
-    logger = logging.getLogger()
+    logger = logging.getLogger(__name__)
 
     logger.info("Ulauncher version %s", VERSION)
     logger.info("Extension API version %s", API_VERSION)
@@ -77,6 +79,8 @@ def main() -> None:
 
     sys.excepthook = except_hook
 
+    # Run asyncio tasks on the GLib main loop
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
     app = UlauncherApp.get_instance()
 
     def handler():
@@ -85,5 +89,9 @@ def main() -> None:
 
     GLib.unix_signal_add(priority=GLib.PRIORITY_DEFAULT, signum=signal.SIGTERM, handler=handler)
 
-    with contextlib.suppress(KeyboardInterrupt):
-        app.run(sys.argv)
+    try:
+        with contextlib.suppress(KeyboardInterrupt):
+            app.run(sys.argv)
+    finally:
+        # Write the queued records
+        log_listener.stop()
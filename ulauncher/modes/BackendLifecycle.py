@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Literal, Protocol
+
+from gi.repository import GLib
+
+from ulauncher.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+TPolicy = Literal["always-on", "idle-shutdown", "on-demand"]
+POLICIES: tuple[TPolicy, ...] = ("always-on", "idle-shutdown", "on-demand")
+# With on-demand, the backend is stopped this long after the window is hidden, because the activated
+# result is handled by the backend after the window was hidden
+ON_DEMAND_STOP_DELAY_SECONDS = 10
+
+
+class Backend(Protocol):
+    """
+    The result backend processes (pop-launcher, or the hosted pop-launcher plugins)
+    """
+
+    def start(self) -> None:
+        ...
+
+    def stop(self) -> None:
+        ...
+
+    def get_pids(self) -> list[int]:
+        ...
+
+
+class BackendLifecycle:
+    """
+    Decides when the result backend runs:
+    - always-on: from startup on
+    - idle-shutdown: from startup, stopped when the window has been hidden for idle_minutes, and started
+      again when the window is shown
+    - on-demand: started when the window is shown, and stopped shortly after it's hidden
+
+    While the window is hidden, the resident memory and the context switches of the daemon and the backend
+    are tracked, and logged when it's shown again, to weigh the idle cost of the policy against its time to
+    first result (which the window measures).
+    """
+
+    def __init__(self, backend: Backend, policy: str, idle_minutes: int) -> None:
+        if policy not in POLICIES:
+            logger.warning("Invalid backend_lifecycle %r, expected one of %s", policy, ", ".join(POLICIES))
+            policy = "always-on"
+        self.backend = backend
+        self.policy = policy
+        self.idle_minutes = idle_minutes
+        self.running = False
+        self._stop_source_id = 0
+        self._hidden_at: float | None = None
+        # Context switches by process when the window was hidden
+        self._hidden_context_switches: dict[int, int] = {}
+        if policy != "on-demand":
+            self._start()
+
+    def on_shown(self) -> bool:
+        """
+        :returns: True if the backend had to be started again (so the shown results are outdated)
+        """
+        if self._stop_source_id:
+            GLib.source_remove(self._stop_source_id)
+            self._stop_source_id = 0
+        if self._hidden_at is not None:
+            self._log_hidden_usage(time.monotonic() - self._hidden_at)
+            self._hidden_at = None
+        if self.running:
+            return False
+        self._start()
+        return True
+
+    def on_hidden(self) -> None:
+        if self._hidden_at is not None:
+            return
+        self._hidden_at = time.monotonic()
+        self._hidden_context_switches = {pid: usage[1] for pid, usage in self._get_usage().items()}
+        if self.running and not self._stop_source_id:
+            if self.policy == "on-demand":
+                self._stop_source_id = GLib.timeout_add_seconds(ON_DEMAND_STOP_DELAY_SECONDS, self._stop)
+            elif self.policy == "idle-shutdown" and self.idle_minutes > 0:
+                self._stop_source_id = GLib.timeout_add_seconds(self.idle_minutes * 60, self._stop)
+
+    def _start(self) -> None:
+        self.running = True
+        self.backend.start()
+
+    def _stop(self) -> bool:
+        self._stop_source_id = 0
+        self.running = False
+        resident = sum(usage[0] for usage in self._get_backend_usage().values())
+        self.backend.stop()
+        metrics.increment("backend_idle_stops")
+        logger.info("Stopped the backend (%s), releasing %.1f MB resident memory", self.policy, resident / 1024 / 1024)
+        return GLib.SOURCE_REMOVE
+
+    def _get_backend_usage(self) -> dict[int, tuple[int, int]]:
+        return {pid: metrics.get_process_usage(pid) for pid in self.backend.get_pids()}
+
+    def _get_usage(self) -> dict[int, tuple[int, int]]:
+        """
+        :returns: resident memory and context switches of the daemon and each backend process (with descendants)
+        """
+        # The backend processes are children of the daemon, but counted separately
+        daemon_usage = metrics.get_process_usage(os.getpid(), include_children=False)
+        return {os.getpid(): daemon_usage, **self._get_backend_usage()}
+
+    def _log_hidden_usage(self, hidden_seconds: float) -> None:
+        usage = self._get_usage()
+        # Processes that exited meanwhile can't be counted anymore
+        context_switches = sum(
+            switches - self._hidden_context_switches.get(pid, 0) for pid, (_resident, switches) in usage.items()
+        )
+        backend_resident = sum(resident for pid, (resident, _switches) in usage.items() if pid != os.getpid())
+        metrics.increment("hidden_context_switches", context_switches)
+        logger.info(
+            "Hidden for %.0f s with the %s backend: %i context switches (%.2f/s), resident memory %.1f MB "
+            "(backend %.1f MB)",
+            hidden_seconds,
+            self.policy,
+            context_switches,
+            context_switches / hidden_seconds if hidden_seconds else 0,
+            sum(resident for resident, _switches in usage.values()) / 1024 / 1024,
+            backend_resident / 1024 / 1024,
+        )
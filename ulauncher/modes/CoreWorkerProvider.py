@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+from gi.repository import Gio, GLib
+
+from ulauncher.core import channel
+from ulauncher.core.PopLauncherClient import TResponse
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption, PopResponse
+from ulauncher.modes.poplauncher.result import Result
+from ulauncher.utils import metrics
+from ulauncher.utils.pending_requests import PendingRequests
+
+logger = logging.getLogger(__name__)
+
+
+class CoreWorkerProcess:
+    """
+    The search core worker process (`python -m ulauncher.core.worker`), with its messages read asynchronously
+    on the main loop
+    """
+
+    # Asked to exit by stop()
+    stopping = False
+
+    def __init__(self, on_message: Callable[[list[Any]], None], on_exit: Callable[[], None]) -> None:
+        self.on_message = on_message
+        self.on_exit = on_exit
+        self.cancellable = Gio.Cancellable()
+        self.process = Gio.Subprocess.new(
+            [sys.executable, "-m", "ulauncher.core.worker"],
+            Gio.SubprocessFlags.STDIN_PIPE | Gio.SubprocessFlags.STDOUT_PIPE,
+        )
+        metrics.increment("backend_starts")
+        self.stdin = self.process.get_stdin_pipe()
+        self.stdout = Gio.DataInputStream.new(self.process.get_stdout_pipe())
+        self.process.wait_async(cancellable=self.cancellable, callback=self._on_finished)
+        self._queue_read()
+
+    @property
+    def running(self) -> bool:
+        return not self.stopping and not self.cancellable.is_cancelled()
+
+    def send(self, message: list[Any]) -> bool:
+        """
+        :returns: False if the worker could not be written to (it has exited)
+        """
+        try:
+            self.stdin.write_all(channel.encode(message).encode("utf-8"), self.cancellable)
+        except GLib.Error:
+            logger.warning("Could not send %s to the search core worker", message[0])
+            return False
+        return True
+
+    def get_pid(self) -> int | None:
+        pid = self.process.get_identifier()
+        return int(pid) if pid else None
+
+    def stop(self) -> None:
+        """
+        Ask the worker to exit (it stops pop-launcher), without reporting it as a crash
+        """
+        self.send(["exit"])
+        self.stopping = True
+
+    def _queue_read(self) -> None:
+        self.stdout.read_line_async(
+            io_priority=GLib.PRIORITY_DEFAULT,
+            cancellable=self.cancellable,
+            callback=self._read_callback,
+        )
+
+    def _read_callback(self, _source: Gio.DataInputStream, result: Gio.AsyncResult) -> None:
+        try:
+            line, _length = self.stdout.read_line_finish_utf8(result)
+        except GLib.Error:
+            return  # Cancelled
+        if line is None:
+            return  # EOF, the exit is handled by _on_finished
+        try:
+            message = channel.decode(line)
+        except ValueError:
+            logger.warning("Invalid output from the search core worker: %s", line)
+        else:
+            try:
+                self.on_message(message)
+            except Exception:
+                logger.exception("Error handling message from the search core worker: %s", line)
+        self._queue_read()
+
+    def _on_finished(self, process: Gio.Subprocess, result: Gio.AsyncResult) -> None:
+        try:
+            process.wait_finish(result)
+        except GLib.Error:
+            return  # Cancelled
+        metrics.increment("backend_exits")
+        self.cancellable.cancel()
+        if not self.stopping:
+            logger.error("The search core worker exited with status %i", process.get_exit_status())
+        self.on_exit()
+
+
+class CoreWorkerProvider:
+    """
+    Provides the results of the search core worker (implements the "ResultProvider" and "Backend" protocols).
+
+    The worker runs pop-launcher, and decodes and ranks its results in another process, so only the compact
+    result rows are decoded on the main loop. Results arrive in batches for the search they answer (by serial),
+    and batches for searches that were replaced are dropped. The id of a result from the worker is its key
+    in the worker, which identifies it for activation.
+
+    The worker is started by start(), or by the first search, and started again after it has been stopped or
+    has exited.
+    """
+
+    name = "core-worker"
+    priority = 0
+    immediate = False
+
+    def __init__(self, on_response: Callable[[TResponse], None]) -> None:
+        self.on_response = on_response
+        self._process: CoreWorkerProcess | None = None
+        self._serial = 0
+        # The result batches of the running searches by serial, None when the search is done
+        self._searches: dict[int, asyncio.Queue[tuple[Result, ...] | None]] = {}
+        self._pending_contexts: PendingRequests[int, list[ContextOption]] = PendingRequests()
+
+    def start(self) -> CoreWorkerProcess:
+        if not self._process or not self._process.running:
+            self._finish_pending()
+            process = CoreWorkerProcess(
+                lambda message: self._on_message(process, message), lambda: self._on_exit(process)
+            )
+            self._process = process
+        return self._process
+
+    def stop(self) -> None:
+        if self._process:
+            self._process.stop()
+            self._process = None
+        self._finish_pending()
+
+    def get_pids(self) -> list[int]:
+        pid = self._process and self._process.get_pid()
+        return [pid] if pid else []
+
+    def _send(self, message: list[Any]) -> bool:
+        """
+        Send a request about the current results. Those are from the running worker, so it isn't restarted for it
+        """
+        if not self._process or not self._process.running:
+            logger.warning("Can't send %s, the search core worker is not running", message[0])
+            return False
+        return self._process.send(message)
+
+    async def search(self, query: str) -> AsyncIterator[tuple[Result, ...]]:
+        process = self.start()
+        self._serial += 1
+        serial = self._serial
+        batches: asyncio.Queue[tuple[Result, ...] | None] = asyncio.Queue()
+        self._searches[serial] = batches
+        try:
+            if not process.send(["search", serial, query]):
+                return
+            while (results := await batches.get()) is not None:
+                yield results
+        finally:
+            del self._searches[serial]
+
+    def activate(self, result: Result) -> None:
+        self._send(["activate", result.id])
+
+    async def context(self, result: Result) -> list[ContextOption]:
+        return await self._pending_contexts.request(result.id, lambda: self._send(["context", result.id]), [])
+
+    def activate_context(self, result: Result, option_id: int) -> None:
+        self._send(["activate_context", result.id, option_id])
+
+    def _on_message(self, process: CoreWorkerProcess, message: list[Any]) -> None:
+        if process is not self._process:
+            return  # From a worker that was stopped
+        match message:
+            case ["results", int(serial), list(rows)]:
+                batches = self._searches.get(serial)
+                if batches is None:
+                    # A newer search has replaced this one
+                    metrics.increment("updates_dropped")
+                    return
+                metrics.increment("updates_received")
+                batches.put_nowait(tuple(map(channel.decode_result, rows)))
+            case ["done", int(serial)]:
+                if (batches := self._searches.get(serial)) is not None:
+                    batches.put_nowait(None)
+            case ["context", int(key), list(options)]:
+                self._pending_contexts.resolve(key, options)
+            case ["response", str(response)]:
+                self.on_response(PopResponse.from_json(response))
+            case _:
+                logger.warning("Invalid message from the search core worker: %s", message)
+
+    def _finish_pending(self) -> None:
+        """
+        End the running searches and resolve the pending context requests without results
+        """
+        for batches in self._searches.values():
+            batches.put_nowait(None)
+        self._pending_contexts.resolve_all([])
+
+    def _on_exit(self, process: CoreWorkerProcess) -> None:
+        if process is self._process:
+            self._process = None
+            self._finish_pending()
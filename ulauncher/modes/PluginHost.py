@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Collection
+
+from gi.repository import Gio, GLib
+
+from ulauncher.modes.poplauncher.plugin_ipc import PluginRequest, PluginResponse, TPluginRequest, TPluginResponse
+from ulauncher.modes.poplauncher.plugins import PluginConfig, find_plugins
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption
+from ulauncher.modes.poplauncher.result import Result, get_icon_name
+from ulauncher.utils import metrics
+from ulauncher.utils.pending_requests import PendingRequests
+
+logger = logging.getLogger(__name__)
+
+# A plugin that crashes this many times within the window is not restarted anymore
+MAX_CRASHES = 3
+CRASH_WINDOW_SECONDS = 60
+# A plugin with this many unfinished searches has stopped answering, and is restarted
+MAX_UNFINISHED_SEARCHES = 3
+# A plugin is killed if it hasn't exited this long after it was asked to
+EXIT_TIMEOUT_SECONDS = 2
+
+
+class PluginProcess:
+    """
+    A running plugin executable, with its responses read asynchronously on the main loop
+    """
+
+    # Asked to exit by stop()
+    stopping = False
+    # The process has exited (or was killed)
+    exited = False
+
+    def __init__(
+        self,
+        config: PluginConfig,
+        on_response: Callable[[TPluginResponse], None],
+        on_exit: Callable[[], None],
+    ) -> None:
+        self.config = config
+        self.on_response = on_response
+        self.on_exit = on_exit
+        self.cancellable = Gio.Cancellable()
+        self.process = Gio.Subprocess.new(
+            [config.bin_path], Gio.SubprocessFlags.STDIN_PIPE | Gio.SubprocessFlags.STDOUT_PIPE
+        )
+        self.stdin = self.process.get_stdin_pipe()
+        self.stdout = Gio.DataInputStream.new(self.process.get_stdout_pipe())
+        self.process.wait_async(cancellable=self.cancellable, callback=self._on_finished)
+        self._queue_read()
+
+    def send(self, request: TPluginRequest) -> bool:
+        """
+        :returns: False if the plugin could not be written to (it has exited)
+        """
+        try:
+            self.stdin.write_all((request.to_json() + "\n").encode("utf-8"), self.cancellable)
+        except GLib.Error:
+            logger.warning("Could not send %s to the pop-launcher plugin %s", request.to_json(), self.config.name)
+            return False
+        return True
+
+    def kill(self) -> None:
+        """
+        Kill the plugin, without reporting it as a crash
+        """
+        self.stopping = True
+        self.process.force_exit()
+
+    def get_pid(self) -> int | None:
+        pid = self.process.get_identifier()
+        return int(pid) if pid else None
+
+    def stop(self) -> None:
+        """
+        Ask the plugin to exit, without reporting it as a crash, and kill it if it doesn't
+        """
+        self.stopping = True
+        self.send(PluginRequest.Exit())
+        GLib.timeout_add_seconds(EXIT_TIMEOUT_SECONDS, self._kill)
+
+    def _kill(self) -> bool:
+        if not self.exited:
+            logger.warning("pop-launcher plugin %s didn't exit when asked to, killing it", self.config.name)
+            self.kill()
+        return GLib.SOURCE_REMOVE
+
+    def _queue_read(self) -> None:
+        self.stdout.read_line_async(
+            io_priority=GLib.PRIORITY_DEFAULT,
+            cancellable=self.cancellable,
+            callback=self._read_callback,
+        )
+
+    def _read_callback(self, _source: Gio.DataInputStream, result: Gio.AsyncResult) -> None:
+        try:
+            line, _length = self.stdout.read_line_finish_utf8(result)
+        except GLib.Error:
+            return  # Cancelled
+        if line is None:
+            return  # EOF, the exit is handled by _on_finished
+        if self.stopping:
+            return  # Nothing waits for the responses anymore
+        try:
+            response = PluginResponse.from_json(line)
+        except ValueError:
+            logger.warning("Invalid output from the pop-launcher plugin %s: %s", self.config.name, line)
+        else:
+            try:
+                self.on_response(response)
+            except Exception:
+                logger.exception("Error handling response from the pop-launcher plugin %s: %s", self.config.name, line)
+        self._queue_read()
+
+    def _on_finished(self, process: Gio.Subprocess, result: Gio.AsyncResult) -> None:
+        try:
+            process.wait_finish(result)
+        except GLib.Error:
+            return  # Cancelled
+        self.exited = True
+        if not self.stopping:
+            self.on_exit()
+
+
+class _PluginSearch:
+    __slots__ = ("future", "results")
+
+    def __init__(self, future: asyncio.Future[tuple[Result, ...]]) -> None:
+        self.future = future
+        self.results: list[Result] = []
+
+
+class PluginProvider:
+    """
+    Provides the results of one pop-launcher plugin (implements the "ResultProvider" protocol).
+
+    The plugin streams the results of each search (Append) until it's Finished. Searches are answered in the
+    order they were sent, so the responses belong to the oldest unfinished search. A plugin that exits is
+    restarted for the next search, unless it keeps crashing.
+    """
+
+    def __init__(
+        self,
+        host: PluginHost,
+        config: PluginConfig,
+        on_response: Callable[[TPluginResponse], None],
+        timeout_ms: int,
+    ) -> None:
+        self.host = host
+        self.config = config
+        self.name = f"plugin.{config.name}"
+        self.priority = config.priority
+        self.immediate = False
+        self.on_response = on_response
+        self.timeout = timeout_ms / 1000
+        self.disabled = False
+        self._process: PluginProcess | None = None
+        self._searches: deque[_PluginSearch] = deque()
+        self._pending_contexts: PendingRequests[int, list[ContextOption]] = PendingRequests()
+        self._crash_times: deque[float] = deque(maxlen=MAX_CRASHES)
+
+    def start(self) -> PluginProcess | None:
+        if self._process is None and not self.disabled:
+            try:
+                self._process = PluginProcess(self.config, self._on_response, self._on_exit)
+            except GLib.Error:
+                logger.exception("Could not start the pop-launcher plugin %s", self.config.name)
+                self._on_crash()
+            else:
+                metrics.increment(f"{self.name}.starts")
+        return self._process
+
+    def stop(self) -> None:
+        if self._process:
+            self._process.stop()
+            self._process = None
+        self._finish_all()
+
+    def get_pid(self) -> int | None:
+        return self._process.get_pid() if self._process else None
+
+    async def search(self, query: str) -> AsyncIterator[tuple[Result, ...]]:
+        if not self.host.is_searched(self.config, query):
+            return
+        process = self.start()
+        if process is None:
+            return
+        if self._searches:
+            # The previous search is outdated, so the plugin can finish it early
+            process.send(PluginRequest.Interrupt())
+        search = _PluginSearch(asyncio.get_running_loop().create_future())
+        self._searches.append(search)
+        if not process.send(PluginRequest.Search(query)):
+            self._searches.remove(search)
+            return
+        try:
+            async with asyncio.timeout(self.timeout):
+                results = await search.future
+        except TimeoutError:
+            metrics.increment(f"{self.name}.timeouts")
+            logger.warning("pop-launcher plugin %s timed out for query %r", self.config.name, query)
+            results = tuple(search.results)
+            if len(self._searches) >= MAX_UNFINISHED_SEARCHES:
+                logger.warning("pop-launcher plugin %s stopped answering, restarting it", self.config.name)
+                self._restart(process)
+        yield results
+
+    def activate(self, result: Result) -> None:
+        if not self._process or not self._process.send(PluginRequest.Activate(result.id)):
+            logger.warning("Can't activate %s, the pop-launcher plugin %s is not running", result.name, self.name)
+
+    async def context(self, result: Result) -> list[ContextOption]:
+        process = self._process
+        if not process:
+            return []
+        return await self._pending_contexts.request(
+            result.id, lambda: process.send(PluginRequest.Context(result.id)), []
+        )
+
+    def activate_context(self, result: Result, option_id: int) -> None:
+        if not self._process or not self._process.send(PluginRequest.ActivateContext(id=result.id, context=option_id)):
+            logger.warning("Can't activate the context of %s, the plugin %s is not running", result.name, self.name)
+
+    def _on_response(self, response: TPluginResponse) -> None:
+        match response:
+            case PluginResponse.Append(id=id, name=name, description=description, icon=icon):
+                if self._searches:
+                    self._searches[0].results.append(Result(id, name, description, get_icon_name(icon)))
+            case PluginResponse.Clear():
+                if self._searches:
+                    self._searches[0].results.clear()
+            case PluginResponse.Finished():
+                if self._searches:
+                    self._finish(self._searches.popleft())
+            case PluginResponse.Context(id=id, options=options):
+                self._pending_contexts.resolve(id, options)
+            case _:
+                # Responses to activation
+                self.on_response(response)
+
+    def _finish(self, search: _PluginSearch) -> None:
+        # The future is cancelled if the search timed out or a newer search replaced it
+        if not search.future.done():
+            search.future.set_result(tuple(search.results))
+
+    def _finish_all(self) -> None:
+        # Unblock the waiting searches with the results the plugin managed to send, and the context requests
+        while self._searches:
+            self._finish(self._searches.popleft())
+        self._pending_contexts.resolve_all([])
+
+    def _restart(self, process: PluginProcess) -> None:
+        """
+        Kill a plugin that is too slow to answer. It's restarted for the next search, and isn't counted as a crash
+        (only crashes disable a plugin)
+        """
+        metrics.increment(f"{self.name}.restarts")
+        process.kill()
+        if self._process is process:
+            self._process = None
+        self._finish_all()
+
+    def _on_exit(self) -> None:
+        self._process = None
+        self._finish_all()
+        self._on_crash()
+
+    def _on_crash(self) -> None:
+        metrics.increment(f"{self.name}.crashes")
+        now = time.monotonic()
+        self._crash_times.append(now)
+        if len(self._crash_times) == MAX_CRASHES and now - self._crash_times[0] < CRASH_WINDOW_SECONDS:
+            self.disabled = True
+            logger.error(
+                "pop-launcher plugin %s crashed %i times in %is, not restarting it",
+                self.config.name,
+                MAX_CRASHES,
+                CRASH_WINDOW_SECONDS,
+            )
+        else:
+            logger.warning("pop-launcher plugin %s exited, restarting it for the next search", self.config.name)
+
+
+class PluginHost:
+    """
+    Runs the pop-launcher plugin executables directly instead of through the pop-launcher daemon, which saves
+    a process hop and a serialization round per search. Each plugin is a long-lived process with its own
+    result provider, so they're searched concurrently, with per-plugin timeouts, by the result fan-out.
+    The plugins are started by start(), or by their first search. The plugins that in-process result providers
+    replace (replaced_plugins) aren't run.
+    """
+
+    def __init__(
+        self,
+        on_response: Callable[[TPluginResponse], None],
+        timeout_ms: int,
+        plugin_dirs: list[str] | None = None,
+        replaced_plugins: Collection[str] = (),
+    ) -> None:
+        self.plugins = [config for config in find_plugins(plugin_dirs) if config.name not in replaced_plugins]
+        self.providers = [PluginProvider(self, config, on_response, timeout_ms) for config in self.plugins]
+        logger.info("Found pop-launcher plugins: %s", ", ".join(config.name for config in self.plugins))
+        self._query: str | None = None
+        self._searched: list[PluginConfig] = []
+
+    def start(self) -> None:
+        for provider in self.providers:
+            provider.start()
+
+    def is_searched(self, config: PluginConfig, query: str) -> bool:
+        """
+        Plugins with a regex are only searched when the query matches it, and isolated plugins
+        are then the only plugin searched (like pop-launcher does)
+        """
+        if query != self._query:
+            matching = [plugin for plugin in self.plugins if plugin.regex is None or plugin.regex.search(query)]
+            isolated = [plugin for plugin in matching if plugin.regex and plugin.isolate]
+            self._query = query
+            self._searched = isolated[:1] or [plugin for plugin in matching if not (plugin.regex and plugin.isolate)]
+        return any(plugin is config for plugin in self._searched)
+
+    def stop(self) -> None:
+        for provider in self.providers:
+            provider.stop()
+
+    def get_pids(self) -> list[int]:
+        return [pid for provider in self.providers if (pid := provider.get_pid())]
@@ -1,9 +1,24 @@
+import contextlib
 import json
-from collections.abc import Callable
+import logging
+import shlex
+import threading
+import time
+from collections.abc import Callable, Collection
 
 from gi.repository import Gio, GLib
 
-from ulauncher.modes.poplauncher.poplauncher_ipc import PopRequest, PopResponse, TPopRequest, TPopResponse
+from ulauncher.core.PopLauncherClient import PopLauncherClient, TResponse
+from ulauncher.modes.poplauncher.plugins import get_category_icons, get_replaced_plugins
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopRequest, PopResponse, TPopRequest
+from ulauncher.modes.poplauncher.result import ResultBatch, results_from_update
+from ulauncher.utils import allocations, metrics, tracing
+from ulauncher.utils.Settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# pop-launcher is killed if it hasn't exited this long after it was asked to
+EXIT_TIMEOUT_SECONDS = 2
 
 
 class PopLauncherGLibImpl:
@@ -13,20 +28,35 @@ class PopLauncherGLibImpl:
 
   Uses Glib for triggering read callbacks on the main thread and not
   be stuck in a blocking read call.
+
+  With threaded=True a reader thread does the blocking reads instead, decodes the responses and
+  builds the result model of Updates (as ResultBatch, without the results of the hidden categories), and hands
+  them over to the main loop. If the main loop falls behind, only the newest result batch is kept, counting the
+  Updates it replaced.
   """
-  handler: Callable[[TPopResponse], None]
+  handler: Callable[[TResponse], None]
   stdin: Gio.OutputStream
   stdout: Gio.DataInputStream
+  # Asked to exit by stop()
+  stopping = False
 
-  def __init__(self, response_callback: Callable[[TPopResponse], None]):
+  def __init__(
+    self,
+    response_callback: Callable[[TResponse], None],
+    command: list[str] | None = None,
+    threaded: bool = False,
+    hidden_categories: Collection[str] = (),
+  ):
     self.handler = response_callback
+    self.hidden_categories = hidden_categories
     self.cancellable = Gio.Cancellable()
     flags = Gio.SubprocessFlags.STDOUT_PIPE | Gio.SubprocessFlags.STDIN_PIPE
     self.process = Gio.Subprocess.new(
-      ["pop-launcher"],
+      command or ["pop-launcher"],
       flags
     )
-    self.process.wait_check_async(
+    metrics.increment("backend_starts")
+    self.process.wait_async(
       cancellable=self.cancellable,
       callback=self._on_finished,
     )
@@ -42,26 +72,61 @@ class PopLauncherGLibImpl:
       raise RuntimeError(errmsg)
     self.stdin = stdin
 
-    self._queue_read()
+    if threaded:
+      # Everything below is shared between the reader thread and the main thread, so it's guarded by the lock
+      self._lock = threading.Lock()
+      self._pending: list[TResponse] = []
+      # The (start, end, thread id) of the decodes. They're traced on the main thread, since tracing isn't thread safe
+      self._decode_spans: list[tuple[int, int, int]] = []
+      self._flush_scheduled = False
+      threading.Thread(target=self._read_in_thread, name="pop-launcher-reader", daemon=True).start()
+    else:
+      self._queue_read()
 
   def _on_finished(self, proc, results):
     """
     Callback triggered when the process finishes.
     """
     assert proc is self.process
-    self.process.wait_check_finish(results)
+    metrics.increment("backend_exits")
+    with contextlib.suppress(GLib.Error):
+      self.process.wait_finish(results)
+    if not self.stopping and not self.process.get_successful():
+      logger.error("pop-launcher exited with wait status %i", self.process.get_status())
     self.cancellable.cancel()
 
+  @property
+  def running(self) -> bool:
+    return not self.stopping and not self.cancellable.is_cancelled()
+
+  def stop(self):
+    """
+    Ask pop-launcher to exit (it stops its plugins), and kill it if it doesn't
+    """
+    if not self.running:
+      return
+    self.stopping = True
+    with contextlib.suppress(GLib.Error):  # Exited already
+      self.send_request(PopRequest.Exit())
+    GLib.timeout_add_seconds(EXIT_TIMEOUT_SECONDS, self._kill)
+
+  def _kill(self):
+    if not self.cancellable.is_cancelled():
+      logger.warning("pop-launcher didn't exit when asked to, killing it")
+      self.process.force_exit()
+    return GLib.SOURCE_REMOVE
+
   def send_request(self, request: TPopRequest):
     """
     Send a request to the PopLauncher process.
     """
     # Write to self.process stdin
-    text = request.to_json() + "\n"
-    self.stdin.write_all(
-      buffer=text.encode("utf-8"),
-      cancellable=self.cancellable,
-    )
+    with tracing.span("send_request"):
+      text = request.to_json() + "\n"
+      self.stdin.write_all(
+        buffer=text.encode("utf-8"),
+        cancellable=self.cancellable,
+      )
 
   def _queue_read(self):
     """
@@ -79,49 +144,120 @@ class PopLauncherGLibImpl:
     """
     assert _source is self.stdout
 
-    line = None
     try:
       line, _length = self.stdout.read_line_finish_utf8(result)
+    except GLib.Error:
+      return  # Cancelled, because the process finished
+    if line is None:
+      if not self.stopping:
+        logger.error("pop-launcher closed its output without exiting")
+      return
+    try:
+      with tracing.span("read_callback"):
+        try:
+          with tracing.span("from_json"), allocations.stage("decode") as stage:
+            response = PopResponse.from_json(line)
+            if isinstance(response, PopResponse.Update):
+              stage.rows = len(response)
+        except json.decoder.JSONDecodeError as e:
+          e.add_note(f"Invalid output from pop-launcher. Expected JSON, received: {line}")
+          raise e
+        try:
+          self.handler(response)
+        except Exception as e:
+          e.add_note(f"Error handling response from pop-launcher: {response}")
+          raise e
+    finally:
+      self._queue_read()
+
+
+  def _read_in_thread(self):
+    """
+    Blocking read loop of the reader thread. Runs until EOF or until the process finishes
+    """
+    while True:
+      try:
+        line, _length = self.stdout.read_line_utf8(self.cancellable)
+      except GLib.Error:
+        return  # Cancelled because the process finished
       if line is None:
-        errmsg = (
-          "Tried reading from pop-launcher but got None. Did the process give EOF without cancelling the read task?"
-        )
-        raise RuntimeError(errmsg)
+        return
+      started_at = time.monotonic_ns()
       try:
         response = PopResponse.from_json(line)
-      except json.decoder.JSONDecodeError as e:
-        e.add_note(f"Invalid output from pop-launcher. Expected JSON, received: {line}")
-        raise e
+        if isinstance(response, PopResponse.Update):
+          response = ResultBatch(results_from_update(response, self.hidden_categories))
+      except ValueError:
+        logger.exception("Invalid output from pop-launcher. Expected JSON, received: %s", line)
+        continue
+      decode_span = (started_at, time.monotonic_ns(), threading.get_native_id()) if tracing.is_enabled() else None
+      self._hand_over(response, decode_span)
+
+  def _hand_over(self, response: TResponse, decode_span: tuple[int, int, int] | None):
+    """
+    Queue a response from the reader thread to be handled on the main thread
+    """
+    with self._lock:
+      if decode_span:
+        self._decode_spans.append(decode_span)
+      if isinstance(response, ResultBatch) and self._pending and isinstance(self._pending[-1], ResultBatch):
+        # The previous results haven't been rendered yet, and never need to be now. The batch still answers
+        # the Updates it replaces, because each of them answers a Search (the drops are counted by the provider)
+        response.updates += self._pending[-1].updates
+        self._pending[-1] = response
+      else:
+        self._pending.append(response)
+      if self._flush_scheduled:
+        return
+      self._flush_scheduled = True
+    GLib.idle_add(self._flush)
+
+  def _flush(self):
+    """
+    Handle the queued responses on the main thread
+    """
+    with self._lock:
+      pending, self._pending = self._pending, []
+      decode_spans, self._decode_spans = self._decode_spans, []
+      self._flush_scheduled = False
+    for start_ns, end_ns, tid in decode_spans:
+      tracing.record("from_json", start_ns, end_ns, tid=tid)
+    for response in pending:
+      # One failing response must not lose the ones after it, which searches may be waiting for
       try:
         self.handler(response)
-      except Exception as e:
-        e.add_note(f"Error handling response from pop-launcher: {response}")
-        raise e
-    finally:
-      self._queue_read()
+      except Exception:
+        logger.exception("Error handling response from pop-launcher: %s", response)
+    return GLib.SOURCE_REMOVE
 
 
-class PopLauncherProvider:
+class PopLauncherProvider(PopLauncherClient):
   """
-  PopLauncherProvider is a class that provides a list of results and
-  implements the "ResultProvider" protocol.
+  The pop-launcher result provider of the window, running pop-launcher with Gio (see PopLauncherClient
+  for the protocol handling)
   """
-  on_response: Callable[[TPopResponse], None]
-
-  def __init__(self, on_response: Callable[[TPopResponse], None]):
-    self.on_response = on_response
-    # Start the `pop-launcher` process and get pipes to stdin and stdout.
-    self.glib_impl = PopLauncherGLibImpl(self.on_response)
-
-  def on_query_change(self, query: str) -> None:
-      """
-      Triggered when user changes the query text.
-      Returns a list of results.
-      """
-      self.glib_impl.send_request(PopRequest.Search(query))
-
-  def on_enter(self, id: int) -> None:
-      """
-      Triggered when user presses enter.
-      """
-      self.glib_impl.send_request(PopRequest.Activate(id))
+  process: PopLauncherGLibImpl | None
+
+  def __init__(self, on_response: Callable[[TResponse], None]):
+    settings = get_settings()
+    super().__init__(on_response, get_category_icons(get_replaced_plugins(settings)))
+    self.command = shlex.split(settings.pop_launcher_command)
+    self.threaded = settings.threaded_response_parsing
+
+  def _spawn(self, on_response: Callable[[TResponse], None]) -> PopLauncherGLibImpl:
+    return PopLauncherGLibImpl(
+      on_response, self.command, threaded=self.threaded, hidden_categories=self.hidden_categories
+    )
+
+  def _is_running(self, glib_impl: PopLauncherGLibImpl) -> bool:
+    return glib_impl.running
+
+  def _send_request(self, glib_impl: PopLauncherGLibImpl, request: TPopRequest) -> None:
+    glib_impl.send_request(request)
+
+  def _stop_process(self, glib_impl: PopLauncherGLibImpl) -> None:
+    glib_impl.stop()
+
+  def _get_pid(self, glib_impl: PopLauncherGLibImpl) -> int | None:
+    pid = glib_impl.process.get_identifier()
+    return int(pid) if pid else None
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import os
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import Future
+
+from gi.repository import Gio, GLib
+
+from ulauncher.config import PATHS
+from ulauncher.modes.apps.app_index import AppEntry, AppIndex, get_application_dirs, get_desktop_filter
+from ulauncher.modes.apps.launch_app import launch_app
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption
+from ulauncher.modes.poplauncher.result import Result
+from ulauncher.utils import metrics, tracing
+from ulauncher.utils.Settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Wait for bursts of file changes (package installs) to end before writing the store
+SAVE_DELAY_SECONDS = 5
+MAX_RESULTS = 25
+
+
+class AppProvider:
+    """
+    Searches the installed applications in-process (implements the "ResultProvider" protocol).
+    The index is loaded in a thread, and then kept up to date with file monitors on the applications dirs.
+    """
+
+    name = "apps"
+    priority = 0
+    immediate = False
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        blacklisted_dirs = {os.path.abspath(path) for path in settings.blacklisted_desktop_dirs.split(":") if path}
+        dirs = [app_dir for app_dir in get_application_dirs() if os.path.abspath(app_dir) not in blacklisted_dirs]
+        should_show = get_desktop_filter(settings.disable_desktop_filters)
+        # None until the applications dirs have been scanned
+        self.index: AppIndex | None = None
+        self._monitors: dict[str, Gio.FileMonitor] = {}
+        self._save_source_id = 0
+        # Entries of the results of the recent searches by result id. Results can be activated after a newer
+        # search has finished, but before its results are shown
+        self._result_ids = itertools.count()
+        self._recent_results: deque[dict[int, AppEntry]] = deque(maxlen=2)
+        # Scanning takes a while with many desktop files (or a cold disk cache), so it's kept off the startup path
+        self._loading: Future[AppIndex] = Future()
+        # Running futures can't be cancelled, by a search cancelled while waiting for it
+        self._loading.set_running_or_notify_cancel()
+        self._loading.add_done_callback(lambda loading: GLib.idle_add(self._on_loaded, loading))
+        threading.Thread(target=self._load_index, args=(dirs, should_show), name="app-index", daemon=True).start()
+
+    def _load_index(self, dirs: list[str], should_show: Callable[[AppEntry], bool]) -> None:
+        """
+        Load and refresh the index in a thread
+        """
+        try:
+            index = AppIndex(dirs, store_path=f"{PATHS.STATE}/app_index.json", should_show=should_show)
+            with tracing.span("app_index_refresh"):
+                parsed = index.refresh()
+            logger.info("Indexed %i applications (parsed %i desktop files)", len(index), parsed)
+            index.save()
+        except Exception as error:
+            logger.exception("Could not index the applications")
+            self._loading.set_exception(error)
+        else:
+            self._loading.set_result(index)
+
+    def _on_loaded(self, loading: Future[AppIndex]) -> bool:
+        """
+        Start using the loaded index on the main loop (once)
+        """
+        if self.index is None and not loading.exception():
+            self.index = loading.result()
+            for app_dir in self.index.dirs:
+                self._monitor_dir(app_dir)
+        return GLib.SOURCE_REMOVE
+
+    async def search(self, query: str) -> AsyncIterator[list[Result]]:
+        if self.index is None:
+            # Searches wait for the index only right after startup
+            with contextlib.suppress(Exception):
+                await asyncio.wrap_future(self._loading)
+            self._on_loaded(self._loading)
+        if self.index is None:
+            yield []
+            return
+        with tracing.span("app_index_query"):
+            matches = self.index.query(query, MAX_RESULTS)
+        entries = {next(self._result_ids): entry for _score, entry in matches}
+        self._recent_results.append(entries)
+        yield [Result(result_id, entry.name, entry.description, entry.icon) for result_id, entry in entries.items()]
+
+    def activate(self, result: Result) -> None:
+        entry = next((entries[result.id] for entries in self._recent_results if result.id in entries), None)
+        if entry is None:
+            logger.warning("Can't activate %s, it's not from the recent results", result.name)
+            return
+        launch_app(entry.path)
+
+    async def context(self, _result: Result) -> list[ContextOption]:
+        return []
+
+    def activate_context(self, _result: Result, _option_id: int) -> None:
+        pass
+
+    def _monitor_dir(self, app_dir: str) -> None:
+        """
+        Monitor the dir and its subdirs (file monitors aren't recursive)
+        """
+        if app_dir in self._monitors or not os.path.isdir(app_dir):
+            return
+        try:
+            monitor = Gio.File.new_for_path(app_dir).monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.Error:
+            logger.warning("Could not monitor %s for application changes", app_dir)
+            return
+        monitor.connect("changed", self._on_dir_changed)
+        self._monitors[app_dir] = monitor
+        with os.scandir(app_dir) as dir_entries:
+            for dir_entry in dir_entries:
+                if dir_entry.is_dir():
+                    self._monitor_dir(dir_entry.path)
+
+    def _on_dir_changed(
+        self, _monitor: Gio.FileMonitor, file: Gio.File, other_file: Gio.File | None, event: Gio.FileMonitorEvent
+    ) -> None:
+        if event not in (
+            Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+            Gio.FileMonitorEvent.CREATED,
+            Gio.FileMonitorEvent.DELETED,
+            Gio.FileMonitorEvent.MOVED_IN,
+            Gio.FileMonitorEvent.MOVED_OUT,
+            Gio.FileMonitorEvent.RENAMED,
+        ):
+            return
+        assert self.index
+        for changed_file in (file, other_file):
+            path = changed_file and changed_file.get_path()
+            if not path:
+                continue
+            if os.path.isdir(path):
+                self.index.update_dir(path)
+                self._monitor_dir(path)
+            elif path in self._monitors:
+                # A monitored subdir was removed
+                self._monitors.pop(path).cancel()
+                self.index.update_dir(path)
+            else:
+                self.index.update_file(path)
+        metrics.increment("app_index_updates")
+        if not self._save_source_id:
+            self._save_source_id = GLib.timeout_add_seconds(SAVE_DELAY_SECONDS, self._save)
+
+    def _save(self) -> bool:
+        self._save_source_id = 0
+        assert self.index
+        self.index.save()
+        return GLib.SOURCE_REMOVE
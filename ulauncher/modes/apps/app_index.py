@@ -0,0 +1,396 @@
+"""
+In-process index of the installed applications (desktop entries).
+
+The XDG applications dirs are scanned into a compact store that is persisted between runs, so later scans
+only parse the desktop files that have changed (by mtime). Queries are answered from an in-memory trigram
+index: the entries sharing the most trigrams with the query are fuzzy scored, and the best ones are picked
+with a heap, so the cost of a query barely depends on the number of installed applications. The entries of
+the common trigrams are kept as bit masks, so that the shared trigrams of all the entries are counted with a
+few big integer operations instead of one dict update per entry.
+This module doesn't use GTK or Gio, the file monitoring is in AppProvider.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import os
+from collections.abc import Callable, Iterable
+from dataclasses import astuple, dataclass
+from pathlib import Path
+
+from ulauncher.utils.fuzzy_search import get_score
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+# Number of entries (with the most trigrams in common with the query) to fuzzy score for each query
+MAX_CANDIDATES = 30
+# Only fuzzy score the names and keywords that share at least a third of the trigrams of the query
+MIN_SHARED_DIVISOR = 3
+# Filter out irrelevant results
+MIN_SCORE = 50
+KEYWORD_WEIGHT = 0.8
+
+
+@dataclass(slots=True)
+class AppEntry:
+    """
+    The fields of a desktop entry needed for searching, filtering and showing it
+    """
+
+    path: str
+    mtime: int
+    name: str
+    description: str
+    icon: str
+    keywords: str
+    is_app: bool = True
+    no_display: bool = False
+    hidden: bool = False
+    only_show_in: str = ""
+    not_show_in: str = ""
+
+
+def get_application_dirs() -> list[str]:
+    """
+    :returns: the XDG applications dirs, in the order of precedence
+    """
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    app_dirs = [os.path.join(data_dir, "applications") for data_dir in [data_home, *data_dirs] if data_dir]
+    return list(dict.fromkeys(app_dirs))
+
+
+def get_locale_keys() -> list[str]:
+    """
+    :returns: the localized key suffixes to look for, most specific first, ex ["fi_FI", "fi"]
+    """
+    locale = os.environ.get("LC_ALL") or os.environ.get("LC_MESSAGES") or os.environ.get("LANG") or ""
+    locale = locale.split(".")[0].split("@")[0]
+    if not locale or locale in ("C", "POSIX"):
+        return []
+    language = locale.split("_")[0]
+    return list(dict.fromkeys([locale, language]))
+
+
+def parse_desktop_entry(path: str, mtime: int, locale_keys: list[str]) -> AppEntry | None:
+    """
+    Parse the [Desktop Entry] group of a desktop file
+    """
+    values: dict[str, str] = {}
+    try:
+        with open(path, encoding="utf-8", errors="replace") as desktop_file:
+            in_entry_group = False
+            for line in desktop_file:
+                if line.startswith("["):
+                    if in_entry_group:
+                        break
+                    in_entry_group = line.strip() == "[Desktop Entry]"
+                elif in_entry_group and "=" in line and not line.startswith("#"):
+                    key, value = line.split("=", 1)
+                    values[key.strip()] = value.strip()
+    except OSError:
+        logger.warning("Could not read desktop entry %s", path)
+        return None
+
+    def get(key: str) -> str:
+        for locale_key in locale_keys:
+            if value := values.get(f"{key}[{locale_key}]"):
+                return value
+        return values.get(key, "")
+
+    name = get("Name")
+    if not name:
+        return None
+    return AppEntry(
+        path=path,
+        mtime=mtime,
+        name=name,
+        description=get("Comment") or get("GenericName"),
+        icon=values.get("Icon", ""),
+        keywords=" ".join(keyword for keyword in get("Keywords").split(";") if keyword),
+        is_app=values.get("Type") == "Application",
+        no_display=values.get("NoDisplay") == "true",
+        hidden=values.get("Hidden") == "true",
+        only_show_in=values.get("OnlyShowIn", ""),
+        not_show_in=values.get("NotShowIn", ""),
+    )
+
+
+def get_desktop_filter(disable_desktop_filters: bool) -> Callable[[AppEntry], bool]:
+    """
+    :returns: a function telling whether an entry should be shown in the current desktop environment
+    """
+    desktops = {desktop for desktop in os.environ.get("XDG_CURRENT_DESKTOP", "").split(":") if desktop}
+
+    def should_show(entry: AppEntry) -> bool:
+        # Hidden means that the entry is deleted, so it's never shown
+        if not entry.is_app or entry.hidden:
+            return False
+        if disable_desktop_filters:
+            return True
+        if entry.no_display:
+            return False
+        if entry.only_show_in and not desktops.intersection(entry.only_show_in.split(";")):
+            return False
+        return not desktops.intersection(entry.not_show_in.split(";"))
+
+    return should_show
+
+
+def get_trigrams(text: str) -> set[str]:
+    text = f" {text.lower()} "
+    return {text[index : index + 3] for index in range(len(text) - 2)}
+
+
+def get_mask(indices: list[int]) -> int:
+    """
+    :returns: a bit mask with the bits of the (ascending) indices set
+    """
+    if not indices:
+        return 0
+    bits = bytearray(indices[-1] // 8 + 1)
+    for index in indices:
+        bits[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(bits, "little")
+
+
+def get_counted(masks: list[int], limit: int) -> list[int]:
+    """
+    :returns: up to limit of the indices set in the most masks, ordered by that count (then by index)
+    """
+    # The count of each index, as a binary number with one mask per digit (lowest first)
+    digits: list[int] = []
+    for mask in masks:
+        carry = mask
+        for position, digit in enumerate(digits):
+            digits[position], carry = digit ^ carry, digit & carry
+            if not carry:
+                break
+        if carry:
+            digits.append(carry)
+    indices: list[int] = []
+    # Counts above the highest digit would match indices with lower counts
+    for count in range(min(len(masks), (1 << len(digits)) - 1), 0, -1):
+        # The indices counted exactly count times
+        matching = -1
+        for position, digit in enumerate(digits):
+            matching &= digit if count >> position & 1 else ~digit
+        while matching:
+            lowest = matching & -matching
+            indices.append(lowest.bit_length() - 1)
+            if len(indices) == limit:
+                return indices
+            matching ^= lowest
+    return indices
+
+
+class AppIndex:
+    """
+    Desktop entries of the given applications dirs, searchable with fuzzy queries.
+    Entries in earlier dirs override entries with the same desktop file id in later dirs.
+    """
+
+    def __init__(
+        self,
+        dirs: Iterable[str],
+        store_path: str | Path | None = None,
+        should_show: Callable[[AppEntry], bool] | None = None,
+    ) -> None:
+        self.dirs = [os.path.abspath(app_dir) for app_dir in dirs]
+        self.store_path = Path(store_path) if store_path else None
+        self.should_show = should_show or get_desktop_filter(disable_desktop_filters=False)
+        self._locale_keys = get_locale_keys()
+        # All parsed desktop files by path (including the ones that aren't shown)
+        self._entries: dict[str, AppEntry] = {}
+        self._store_changed = False
+        # Search index, rebuilt on the first query after the entries have changed
+        self._dirty = True
+        self._shown: list[AppEntry] = []
+        # The entries of each trigram, as a bit mask if it's common (the mask is smaller than the list then)
+        self._trigrams: dict[str, int | list[int]] = {}
+        self._initials: dict[str, list[int]] = {}
+        self.load()
+
+    def __len__(self) -> int:
+        self._ensure_search_index()
+        return len(self._shown)
+
+    def load(self) -> None:
+        """
+        Load the entries from the store (without checking if they are up to date)
+        """
+        if not self.store_path or not self.store_path.is_file():
+            return
+        try:
+            store = json.loads(self.store_path.read_text())
+            if store.get("version") == STORE_VERSION:
+                self._entries = {row[0]: AppEntry(*row) for row in store["entries"]}
+                self._dirty = True
+        except (ValueError, TypeError, KeyError):
+            logger.warning("Ignoring invalid app index store %s", self.store_path)
+
+    def save(self) -> None:
+        """
+        Write the entries to the store if they have changed since it was loaded or saved
+        """
+        if not self.store_path or not self._store_changed:
+            return
+        store = {"version": STORE_VERSION, "entries": [astuple(entry) for entry in self._entries.values()]}
+        try:
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.store_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(store, separators=(",", ":")))
+            tmp_path.replace(self.store_path)
+            self._store_changed = False
+        except OSError:
+            logger.exception("Could not write the app index store %s", self.store_path)
+
+    def refresh(self) -> int:
+        """
+        Scan the applications dirs, parsing only new and changed desktop files
+        :returns: the number of desktop files parsed
+        """
+        seen: set[str] = set()
+        parsed = 0
+        for app_dir in self.dirs:
+            for path, mtime in self._scan_dir(app_dir):
+                seen.add(path)
+                entry = self._entries.get(path)
+                if entry is None or entry.mtime != mtime:
+                    self._set_entry(path, parse_desktop_entry(path, mtime, self._locale_keys))
+                    parsed += 1
+        for path in self._entries.keys() - seen:
+            self._set_entry(path, None)
+        return parsed
+
+    def update_file(self, path: str) -> None:
+        """
+        Re-read a desktop file that has been created, changed or deleted
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._set_entry(path, None)
+            return
+        if not path.endswith(".desktop") or self._get_dir(path) is None:
+            return
+        self._set_entry(path, parse_desktop_entry(path, mtime, self._locale_keys))
+
+    def update_dir(self, app_dir: str) -> None:
+        """
+        Re-scan a (sub)directory that has been created, moved or deleted
+        """
+        app_dir = app_dir.rstrip("/") + "/"
+        seen = set()
+        for path, mtime in self._scan_dir(app_dir):
+            seen.add(path)
+            entry = self._entries.get(path)
+            if entry is None or entry.mtime != mtime:
+                self._set_entry(path, parse_desktop_entry(path, mtime, self._locale_keys))
+        for path in [path for path in self._entries if path.startswith(app_dir) and path not in seen]:
+            self._set_entry(path, None)
+
+    def query(self, query: str, limit: int = 10) -> list[tuple[float, AppEntry]]:
+        """
+        :returns: the best matching (score, entry) pairs, best first
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        self._ensure_search_index()
+        if len(query) < 3:  # noqa: PLR2004
+            # Too short for trigrams (other than the ones padded with spaces), match the start of words instead
+            candidates = self._initials.get(query[:2], self._initials.get(query[0], []))
+            trigrams: set[str] = set()
+        else:
+            trigrams = get_trigrams(query)
+            masks = []
+            for trigram in trigrams:
+                if entries := self._trigrams.get(trigram):
+                    masks.append(entries if isinstance(entries, int) else get_mask(entries))
+            candidates = get_counted(masks, MAX_CANDIDATES)
+        # Fuzzy scoring is the slow part of a query, so the trigram prefilter also applies to the name and the
+        # keywords of the candidates on their own
+        min_shared = len(trigrams) // MIN_SHARED_DIVISOR
+
+        def should_score(text: str) -> bool:
+            if not trigrams:
+                return True
+            padded_text = f" {text.lower()} "
+            return sum(trigram in padded_text for trigram in trigrams) >= min_shared
+
+        scored = []
+        for index in candidates[:MAX_CANDIDATES]:
+            entry = self._shown[index]
+            score = get_score(query, entry.name) if should_score(entry.name) else 0
+            if entry.keywords and score < MIN_SCORE and should_score(entry.keywords):
+                score = max(score, KEYWORD_WEIGHT * get_score(query, entry.keywords))
+            if score >= MIN_SCORE:
+                # The index breaks ties without comparing the entries
+                scored.append((score, -index, entry))
+        return [(score, entry) for score, _index, entry in heapq.nlargest(limit, scored)]
+
+    def _scan_dir(self, app_dir: str) -> Iterable[tuple[str, int]]:
+        """
+        :returns: the paths and mtimes of the desktop files in the dir, recursively
+        """
+        try:
+            with os.scandir(app_dir) as dir_entries:
+                for dir_entry in dir_entries:
+                    try:
+                        if dir_entry.is_dir():
+                            yield from self._scan_dir(dir_entry.path)
+                        elif dir_entry.name.endswith(".desktop"):
+                            yield dir_entry.path, dir_entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+        except OSError:
+            return
+
+    def _get_dir(self, path: str) -> str | None:
+        return next((app_dir for app_dir in self.dirs if path.startswith(app_dir + "/")), None)
+
+    def _set_entry(self, path: str, entry: AppEntry | None) -> None:
+        if entry is None:
+            if self._entries.pop(path, None) is None:
+                return
+        else:
+            self._entries[path] = entry
+        self._store_changed = True
+        self._dirty = True
+
+    def _ensure_search_index(self) -> None:
+        if not self._dirty:
+            return
+        by_id: dict[str, tuple[int, AppEntry]] = {}
+        for path, entry in self._entries.items():
+            app_dir = self._get_dir(path)
+            if app_dir is None:
+                continue
+            # The desktop file id, ex "kde-kate.desktop" for kde/kate.desktop
+            desktop_id = path[len(app_dir) + 1 :].replace("/", "-")
+            precedence = self.dirs.index(app_dir)
+            if desktop_id not in by_id or precedence < by_id[desktop_id][0]:
+                by_id[desktop_id] = (precedence, entry)
+
+        self._shown = sorted((entry for _, entry in by_id.values() if self.should_show(entry)), key=lambda e: e.name)
+        trigrams: dict[str, list[int]] = {}
+        self._initials = {}
+        for index, entry in enumerate(self._shown):
+            text = f"{entry.name} {entry.keywords}".lower()
+            for trigram in get_trigrams(text):
+                trigrams.setdefault(trigram, []).append(index)
+            for word in text.split():
+                for prefix in (word[0], word[:2]):
+                    initials = self._initials.setdefault(prefix, [])
+                    if not initials or initials[-1] != index:
+                        initials.append(index)
+        # A list takes 8 bytes per entry, a mask 1 bit per shown entry
+        dense = len(self._shown) // 64
+        self._trigrams = {
+            trigram: get_mask(indices) if len(indices) > dense else indices for trigram, indices in trigrams.items()
+        }
+        self._dirty = False
@@ -1,57 +1,196 @@
 import logging
+import os
+import threading
+import time
+from typing import Literal
 
-from gi.repository import Gdk, Gio
+from gi.repository import Gdk, Gio, GLib
 
-logger = logging.getLogger()
+from ulauncher.utils import metrics
+from ulauncher.utils.lru_cache import lru_cache
 
+logger = logging.getLogger(__name__)
 
-def launch_app(desktop_entry_name: str, uris=None):
+# Used when switcheroo-control isn't available. Mesa's PRIME offloading (nouveau, amdgpu, intel).
+# The NVIDIA proprietary driver needs its own variables, but setting those without the driver breaks GLX,
+# so they only come from switcheroo-control, which knows the drivers
+DEFAULT_NON_DEFAULT_GPU_ENV = {"DRI_PRIME": "1"}
+
+
+@lru_cache(maxsize=50)
+def _load_app_info(desktop_entry: str, _mtime: int) -> Gio.DesktopAppInfo:
+    """
+    The mtime is part of the cache key, so changed desktop files are loaded again. Apps that aren't found raise
+    LookupError instead of returning None, because exceptions aren't cached (the app may be installed later)
+    """
+    try:
+        if desktop_entry.startswith("/"):
+            app_info = Gio.DesktopAppInfo.new_from_filename(desktop_entry)
+        else:
+            app_info = Gio.DesktopAppInfo.new(desktop_entry)
+    except TypeError:
+        # PyGObject raises this when the constructor returns NULL
+        app_info = None
+    if not app_info:
+        raise LookupError(desktop_entry)
+    return app_info
+
+
+def get_app_info(desktop_entry: str) -> Gio.DesktopAppInfo | None:
     """
-    Launch an application using its desktop entry name.
+    Get the (cached) app info of a desktop entry.
 
     Args:
-        desktop_entry_name: The desktop file name (with or without .desktop suffix)
-        uris: Optional list of URIs to pass as arguments to the application
+        desktop_entry: The path of the .desktop file, or its desktop file id (with or without .desktop suffix)
+    """
+    if desktop_entry.startswith("/"):
+        try:
+            mtime = os.stat(desktop_entry).st_mtime_ns
+        except OSError:
+            return None
+    else:
+        mtime = 0
+        if not desktop_entry.endswith(".desktop"):
+            desktop_entry = f"{desktop_entry}.desktop"
+    try:
+        return _load_app_info(desktop_entry, mtime)
+    except LookupError:
+        return None
 
-    Returns:
-        bool: True if launch was successful, False otherwise
+
+def get_launch_env(app_info: Gio.AppInfo, files: list[Gio.File] | None) -> dict[str, str]:
+    """
+    Get the startup notification/activation token for the launched app, so the compositor lets it take focus.
+    This has to be done on the main thread, because GDK isn't thread safe.
+    """
+    display = Gdk.Display.get_default()
+    if not display:
+        return {}
+    token = display.get_app_launch_context().get_startup_notify_id(app_info, files)
+    if not token:
+        return {}
+    return {"XDG_ACTIVATION_TOKEN": token, "DESKTOP_STARTUP_ID": token}
+
+
+@lru_cache(maxsize=1)
+def get_switcheroo_gpus() -> list[dict] | None:
+    """
+    Get the GPUs from switcheroo-control (net.hadess.SwitcherooControl), like GNOME Shell does
+    :returns: list of {"Name": str, "Environment": [key, value, ...], "Default": bool}, or None if not available
     """
     try:
-        # Handle desktop file name - add .desktop suffix if not present
-        if desktop_entry_name.endswith(".desktop"):
-            desktop_file_name = desktop_entry_name
-        else:
-            desktop_file_name = f"{desktop_entry_name}.desktop"
+        proxy = Gio.DBusProxy.new_for_bus_sync(
+            Gio.BusType.SYSTEM,
+            Gio.DBusProxyFlags.DO_NOT_CONNECT_SIGNALS,
+            None,
+            "net.hadess.SwitcherooControl",
+            "/net/hadess/SwitcherooControl",
+            "net.hadess.SwitcherooControl",
+            None,
+        )
+    except GLib.Error:
+        return None
+    gpus = proxy.get_cached_property("GPUs")
+    return gpus.unpack() if gpus else None
 
-        # Create DesktopAppInfo from the desktop file
-        app_info = Gio.DesktopAppInfo.new(desktop_file_name)
 
-        if not app_info:
-            logger.error(f"No such application: {desktop_entry_name}")
-            return False
+def get_gpu_env(prefers_non_default_gpu: bool, gpus: list[dict] | None) -> dict[str, str]:
+    """
+    Get the environment variables to run an app on the non-default (usually discrete) GPU
+
+    Args:
+        prefers_non_default_gpu: Whether the app should run on the non-default GPU
+        gpus: The GPUs as reported by switcheroo-control, or None if it isn't available
+    """
+    if not prefers_non_default_gpu:
+        return {}
+    if gpus is None:
+        return dict(DEFAULT_NON_DEFAULT_GPU_ENV)
+    for gpu in gpus:
+        if not gpu.get("Default"):
+            environment = gpu.get("Environment", [])
+            return dict(zip(environment[::2], environment[1::2], strict=True))
+    # Only one GPU
+    return {}
+
 
-        # Prepare URI list if provided
-        file_list = None
-        if uris:
-            file_list = []
-            for uri in uris:
-                file_obj = Gio.File.new_for_commandline_arg(uri)
-                file_list.append(file_obj)
+def _launch(
+    app_info: Gio.DesktopAppInfo,
+    files: list[Gio.File] | None,
+    env: dict[str, str],
+    started_at: float,
+    prefers_non_default_gpu: bool,
+    action_name: str | None,
+) -> None:
+    """
+    Launch the app in a worker thread, and report the outcome on the main thread
+    """
+    launch_context = Gio.AppLaunchContext()
+    env = {**env, **get_gpu_env(prefers_non_default_gpu, get_switcheroo_gpus() if prefers_non_default_gpu else None)}
+    for name, value in env.items():
+        launch_context.setenv(name, value)
+    error = None
+    try:
+        if action_name:
+            # Doesn't report failures, except by logging them
+            app_info.launch_action(action_name, launch_context)
+        elif not app_info.launch(files, launch_context):
+            error = "launch failed"
+    except GLib.Error as e:
+        error = e.message
+    GLib.idle_add(_report_launch, app_info.get_id() or app_info.get_name(), error, started_at)
 
-        # Get the default display and create launch context
-        display = Gdk.Display.get_default()
-        launch_context = display.get_app_launch_context() if display else Gio.AppLaunchContext()
 
-        # Launch the application
-        success = app_info.launch(file_list, launch_context)
+def _report_launch(app_id: str, error: str | None, started_at: float) -> bool:
+    elapsed_ms = (time.monotonic() - started_at) * 1000
+    metrics.observe("launch", elapsed_ms)
+    if error:
+        metrics.increment("launch_errors")
+        logger.error("Failed to launch application %s: %s", app_id, error)
+    else:
+        logger.info("Launched application %s in %.1f ms", app_id, elapsed_ms)
+    return GLib.SOURCE_REMOVE
 
-        if not success:
-            logger.error(f"Failed to launch application: {desktop_entry_name}")
-            return False
 
-        logger.info(f"Successfully launched application: {desktop_entry_name}")
-        return True
+def launch_app(
+    desktop_entry: str,
+    uris=None,
+    gpu_preference: Literal["Default", "NonDefault"] = "Default",
+    action_name: str | None = None,
+) -> bool:
+    """
+    Launch an application in the background. The outcome is logged when the launch has finished.
 
-    except Exception as e:
-        logger.error(f"Error launching application {desktop_entry_name}: {e}")
+    Args:
+        desktop_entry: The path of the .desktop file, or its desktop file id (with or without .desktop suffix)
+        uris: Optional list of URIs to pass as arguments to the application
+        gpu_preference: "NonDefault" to run the app on the discrete GPU. Apps with PrefersNonDefaultGPU=true
+            in their desktop entry always are
+        action_name: Launch this desktop action of the app instead of the app itself
+
+    Returns:
+        bool: False if the application was not found, True if it's being launched
+    """
+    started_at = time.monotonic()
+    app_info = get_app_info(desktop_entry)
+    if not app_info:
+        logger.error("No such application: %s", desktop_entry)
         return False
+
+    files = [Gio.File.new_for_commandline_arg(uri) for uri in uris] if uris else None
+    if action_name and not app_info.has_action(action_name):
+        logger.error("Application %s has no action %s", desktop_entry, action_name)
+        return False
+
+    env = get_launch_env(app_info, files)
+    prefers_non_default_gpu = gpu_preference == "NonDefault" or app_info.get_boolean("PrefersNonDefaultGPU")
+    threading.Thread(
+        target=_launch,
+        args=(app_info, files, env, started_at, prefers_non_default_gpu, action_name),
+        name="launch-app",
+        daemon=True,
+    ).start()
+    return True
+
+
+metrics.register_cache("app_info", _load_app_info)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+
+from gi.repository import Gdk
+
+from ulauncher.modes.calc.calc import HeavyExpression, evaluate, evaluate_in_worker, format_number, get_expression
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption
+from ulauncher.modes.poplauncher.result import Result
+from ulauncher.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CalcProvider:
+    """
+    Evaluates arithmetic queries in-process (implements the "ResultProvider" protocol).
+
+    Simple expressions are evaluated right away, so the result is shown in the same frame as the keystroke.
+    Expressions that could take long or use a lot of memory are evaluated in a worker process.
+    """
+
+    name = "calc"
+    # Ranked above the other results, and shown without waiting for the other providers
+    priority = 10
+    immediate = True
+
+    async def search(self, query: str) -> AsyncIterator[list[Result]]:
+        expression = get_expression(query)
+        if expression is None:
+            return
+        try:
+            value: str | None = format_number(evaluate(expression))
+        except HeavyExpression:
+            metrics.increment("calc_worker_evaluations")
+            value = await asyncio.get_running_loop().run_in_executor(None, evaluate_in_worker, expression)
+        except (ValueError, ArithmeticError, SyntaxError, TypeError):
+            return
+        if value is not None:
+            yield [Result(0, value, "Enter to copy to the clipboard", "accessories-calculator", searchable=False)]
+
+    def activate(self, result: Result) -> None:
+        display = Gdk.Display.get_default()
+        if display:
+            display.get_clipboard().set(result.name)
+
+    async def context(self, _result: Result) -> list[ContextOption]:
+        return []
+
+    def activate_context(self, _result: Result, _option_id: int) -> None:
+        pass
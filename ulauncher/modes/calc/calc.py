@@ -0,0 +1,219 @@
+"""
+Safe evaluation of arithmetic expressions.
+
+Expressions are parsed with the ast module and only numbers, arithmetic operators and a whitelist of math
+functions and constants are evaluated. Operations that could produce huge numbers (powers and products of
+big integers) are estimated first. If they're too big to evaluate inline, HeavyExpression is raised and the
+expression can be evaluated in a worker process instead, with hard CPU time and memory limits:
+    python -m ulauncher.modes.calc.calc "9**9**9"
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import math
+import operator
+import re
+import resource
+import subprocess
+import sys
+from collections.abc import Callable
+from typing import Any
+
+# Estimated size of an integer result (in bits) that is still cheap to compute in the main loop
+MAX_INLINE_BITS = 10_000
+# The worker refuses results bigger than this (~12 MB)
+MAX_WORKER_BITS = 100_000_000
+WORKER_TIMEOUT_S = 2
+WORKER_MEMORY_LIMIT = 512 * 1024 * 1024
+MAX_EXPRESSION_LENGTH = 200
+
+# Only queries made of these characters, with at least one digit and an operator or function call
+_EXPRESSION_RE = re.compile(r"^[\d\s.+\-*/%^()a-z,_]*$")
+_CALC_HINT_RE = re.compile(r"\d.*[+\-*/%^]|[+\-*/%^].*\d|[a-z]+\s*\(")
+
+FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "abs": abs,
+    "round": round,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "log2": math.log2,
+    "log10": math.log10,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "factorial": math.factorial,
+}
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+
+class HeavyExpression(Exception):
+    """
+    The expression is too expensive to evaluate in the main loop
+    """
+
+
+def get_expression(query: str) -> str | None:
+    """
+    :returns: the query as a Python expression if it looks like arithmetic, otherwise None
+    """
+    query = query.strip().lower()
+    if len(query) > MAX_EXPRESSION_LENGTH or not _EXPRESSION_RE.match(query) or not _CALC_HINT_RE.search(query):
+        return None
+    if not any(char.isdigit() for char in query):
+        return None
+    return query.replace("^", "**")
+
+
+def _get_bits(value: Any) -> float:
+    """
+    Estimated size of a number in bits (floats are limited to 64 bits anyway)
+    """
+    if isinstance(value, int):
+        return value.bit_length()
+    return 64
+
+
+class _Evaluator:
+    def __init__(self, max_bits: int) -> None:
+        self.max_bits = max_bits
+        self.functions = {**FUNCTIONS, "factorial": self.factorial, "round": self.round_number}
+
+    def check(self, estimated_bits: float) -> None:
+        if estimated_bits > self.max_bits:
+            raise HeavyExpression
+
+    def pow(self, base: Any, exponent: Any) -> Any:
+        if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+            self.check(exponent * math.log2(abs(base)))
+        result = operator.pow(base, exponent)
+        if isinstance(result, complex):
+            # Fractional powers of negative numbers
+            msg = "Complex results are not supported"
+            raise TypeError(msg)
+        return result
+
+    def mul(self, left: Any, right: Any) -> Any:
+        self.check(_get_bits(left) + _get_bits(right))
+        return operator.mul(left, right)
+
+    def factorial(self, value: Any) -> Any:
+        if isinstance(value, int) and value > 1:
+            self.check(value * math.log2(value))
+        return math.factorial(value)
+
+    def round_number(self, value: Any, ndigits: Any = None) -> Any:
+        if isinstance(value, int) and isinstance(ndigits, int) and ndigits < 0:
+            # Rounding an integer to -n digits computes 10**n
+            self.check(-ndigits * math.log2(10))
+        return round(value, ndigits)
+
+    def evaluate(self, node: ast.AST) -> Any:  # noqa: PLR0911
+        match node:
+            case ast.Expression(body=body):
+                return self.evaluate(body)
+            case ast.Constant(value=value) if isinstance(value, int | float) and not isinstance(value, bool):
+                return value
+            case ast.Name(id=name) if name in CONSTANTS:
+                return CONSTANTS[name]
+            case ast.UnaryOp(op=ast.USub(), operand=operand):
+                return -self.evaluate(operand)
+            case ast.UnaryOp(op=ast.UAdd(), operand=operand):
+                return +self.evaluate(operand)
+            case ast.BinOp(left=left, op=op, right=right):
+                return self._get_operator(op)(self.evaluate(left), self.evaluate(right))
+            case ast.Call(func=ast.Name(id=name), args=args, keywords=[]) if name in FUNCTIONS:
+                return self.functions[name](*[self.evaluate(arg) for arg in args])
+        msg = f"Unsupported expression: {ast.dump(node)}"
+        raise ValueError(msg)
+
+    def _get_operator(self, op: ast.operator) -> Callable[[Any, Any], Any]:  # noqa: PLR0911
+        match op:
+            case ast.Add():
+                return operator.add
+            case ast.Sub():
+                return operator.sub
+            case ast.Mult():
+                return self.mul
+            case ast.Div():
+                return operator.truediv
+            case ast.FloorDiv():
+                return operator.floordiv
+            case ast.Mod():
+                return operator.mod
+            case ast.Pow():
+                return self.pow
+        msg = f"Unsupported operator: {type(op).__name__}"
+        raise ValueError(msg)
+
+
+def evaluate(expression: str, max_bits: int = MAX_INLINE_BITS) -> int | float:
+    """
+    Evaluate an arithmetic expression
+    :raises HeavyExpression: if the result would be too big to compute within max_bits
+    :raises ValueError, ArithmeticError, SyntaxError, TypeError: if the expression is invalid, or its result isn't
+      a real number
+    """
+    value = _Evaluator(max_bits).evaluate(ast.parse(expression, mode="eval"))
+    if not isinstance(value, int | float):
+        msg = f"Unsupported result: {value!r}"
+        raise TypeError(msg)
+    return value
+
+
+def format_number(value: float) -> str:
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:  # noqa: PLR2004
+            return str(int(value))
+        return f"{value:.12g}"
+    if abs(value) < 10**21:
+        return str(value)
+    # str() of huge integers is slow (and limited by sys.get_int_max_str_digits)
+    log10 = math.log10(abs(value))
+    exponent = math.floor(log10)
+    mantissa = 10 ** (log10 - exponent)
+    return f"{'-' if value < 0 else ''}{mantissa:.10g}e+{exponent}"
+
+
+def evaluate_in_worker(expression: str) -> str | None:
+    """
+    Evaluate a heavy expression in a worker process, with a hard time and memory limit.
+    Blocks, so it needs to be run in a thread.
+    :returns: the formatted result, or None if the expression could not be evaluated within the limits
+    """
+    try:
+        output = subprocess.run(
+            # The module only uses the standard library, so it's run as a plain script in isolated mode
+            [sys.executable, "-I", __file__, expression],
+            capture_output=True,
+            text=True,
+            timeout=WORKER_TIMEOUT_S,
+            check=True,
+        ).stdout
+        return json.loads(output).get("value")
+    except (subprocess.SubprocessError, ValueError, OSError):
+        return None
+
+
+def main() -> None:
+    """
+    Worker entry point: evaluate the expression given as the argument and print the result as JSON
+    """
+    resource.setrlimit(resource.RLIMIT_AS, (WORKER_MEMORY_LIMIT, WORKER_MEMORY_LIMIT))
+    resource.setrlimit(resource.RLIMIT_CPU, (WORKER_TIMEOUT_S, WORKER_TIMEOUT_S))
+    try:
+        result = {"value": format_number(evaluate(sys.argv[1], MAX_WORKER_BITS))}
+    except (HeavyExpression, ValueError, ArithmeticError, SyntaxError, TypeError, MemoryError) as e:
+        result = {"error": type(e).__name__}
+    sys.stdout.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
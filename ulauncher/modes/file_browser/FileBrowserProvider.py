@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+
+from gi.repository import Gdk, Gio, GLib
+
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption
+from ulauncher.modes.poplauncher.result import Result
+from ulauncher.utils import memory, metrics
+
+logger = logging.getLogger(__name__)
+
+ATTRIBUTES = "standard::name,standard::display-name,standard::type,standard::is-hidden,standard::fast-content-type"
+# Number of files enumerated (and streamed to the results) at a time
+BATCH_SIZE = 1000
+MAX_CACHED_DIRS = 20
+MAX_RESULTS = 25
+
+
+def parse_path_query(query: str) -> tuple[str, str] | None:
+    """
+    Split a path query into the directory to list and the filter for the file names,
+    ex "~/Doc" -> ("/home/user", "Doc"), "/usr/" -> ("/usr", "")
+    :returns: None if the query isn't a path
+    """
+    if not query.startswith(("/", "~")):
+        return None
+    path = os.path.expanduser(query if query != "~" else "~/")
+    if path.startswith("~"):
+        return None  # Unknown user
+    dir_path, name_filter = os.path.split(path)
+    return dir_path or "/", name_filter
+
+
+def _get_mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+@dataclass(slots=True)
+class _FileEntry:
+    name: str
+    display_name: str
+    lower_name: str
+    is_dir: bool
+    is_hidden: bool
+    content_type: str
+
+    @classmethod
+    def from_info(cls, info: Gio.FileInfo) -> _FileEntry:
+        display_name = info.get_display_name()
+        return cls(
+            info.get_name(),
+            display_name,
+            display_name.lower(),
+            info.get_file_type() == Gio.FileType.DIRECTORY,
+            info.get_is_hidden(),
+            info.get_attribute_string("standard::fast-content-type") or "",
+        )
+
+    def get_icon_name(self) -> str:
+        if self.is_dir:
+            return "folder"
+        return Gio.content_type_get_generic_icon_name(self.content_type) or "text-x-generic"
+
+
+class DirListing:
+    """
+    The entries of a directory, enumerated asynchronously in batches on the main loop.
+    Searches can use the entries enumerated so far, and wait for the next batch.
+    Entries are only ever appended, so searches can filter just the ones added since they last looked.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.mtime = _get_mtime(path)
+        self.entries: list[_FileEntry] = []
+        self.complete = False
+        # The directory has changed since it was listed (the listing is replaced for the next search)
+        self.stale = False
+        self._updated: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._cancellable = Gio.Cancellable()
+        gfile = Gio.File.new_for_path(path)
+        self._monitor = gfile.monitor_directory(Gio.FileMonitorFlags.NONE, self._cancellable)
+        self._monitor.connect("changed", self._on_changed)
+        self._task = asyncio.create_task(self._enumerate(gfile))
+
+    async def wait_for_update(self) -> None:
+        # Shielded, because cancelling one search must not cancel the future the other searches wait for
+        await asyncio.shield(self._updated)
+
+    def close(self) -> None:
+        self._cancellable.cancel()
+        self._monitor.cancel()
+        self._task.cancel()
+        self._set_complete()
+
+    async def _enumerate(self, gfile: Gio.File) -> None:
+        started_at = time.monotonic()
+        try:
+            enumerator = await gfile.enumerate_children_async(
+                ATTRIBUTES, Gio.FileQueryInfoFlags.NONE, GLib.PRIORITY_DEFAULT, self._cancellable
+            )
+            while infos := await enumerator.next_files_async(BATCH_SIZE, GLib.PRIORITY_DEFAULT, self._cancellable):
+                self.entries.extend(map(_FileEntry.from_info, infos))
+                self._notify()
+            await enumerator.close_async(GLib.PRIORITY_DEFAULT, self._cancellable)
+            metrics.observe("file_browser_enumerate", (time.monotonic() - started_at) * 1000)
+        except GLib.Error as e:
+            if not self._cancellable.is_cancelled():
+                logger.warning("Could not list the directory %s: %s", self.path, e.message)
+        finally:
+            self._set_complete()
+
+    def _on_changed(self, *_args: object) -> None:
+        self.stale = True
+
+    def _notify(self) -> None:
+        self._updated.set_result(None)
+        self._updated = asyncio.get_running_loop().create_future()
+
+    def _set_complete(self) -> None:
+        if not self.complete:
+            self.complete = True
+            self._notify()
+
+
+class FileBrowserProvider:
+    """
+    Lists the files in the directory of path queries (starting with "/" or "~"), implementing the
+    "ResultProvider" protocol.
+
+    The results are streamed while the directory is being enumerated, so even huge directories show their
+    first files right away. Listings are cached per directory, and replaced by the next search after the
+    directory has changed (by file monitor, or by mtime for changes the monitor could have missed).
+    """
+
+    name = "files"
+    priority = 5
+    immediate = True
+
+    def __init__(self) -> None:
+        self._listings: OrderedDict[str, DirListing] = OrderedDict()
+        # Paths of the results of the recent searches by result id
+        self._result_ids = itertools.count()
+        self._recent_results: deque[dict[int, str]] = deque(maxlen=2)
+        memory.add_release_callback(self.release_listings)
+
+    async def search(self, query: str) -> AsyncIterator[list[Result]]:
+        parsed = parse_path_query(query)
+        if parsed is None:
+            return
+        dir_path, name_filter = parsed
+        listing = self._get_listing(dir_path)
+        if listing is None:
+            return
+        previous: list[str] | None = None
+        entries: list[_FileEntry] = []
+        filtered = 0
+        while True:
+            complete = listing.complete
+            # Only the entries added since the last batch need to be filtered
+            new_entries = listing.entries[filtered:]
+            filtered += len(new_entries)
+            entries = self._filter(new_entries, name_filter, entries)
+            names = [entry.name for entry in entries]
+            # Batches that don't change the top results don't need to be rendered again
+            if names != previous:
+                yield self._get_results(dir_path, entries)
+                previous = names
+            if complete:
+                return
+            await listing.wait_for_update()
+
+    def activate(self, result: Result) -> None:
+        path = next((paths[result.id] for paths in self._recent_results if result.id in paths), None)
+        if path is None:
+            logger.warning("Can't open %s, it's not from the recent results", result.name)
+            return
+        display = Gdk.Display.get_default()
+        launch_context = display.get_app_launch_context() if display else None
+
+        def on_launched(_source: None, task: Gio.AsyncResult) -> None:
+            try:
+                Gio.AppInfo.launch_default_for_uri_finish(task)
+            except GLib.Error as e:
+                logger.warning("Could not open %s: %s", path, e.message)
+
+        uri = Gio.File.new_for_path(path).get_uri()
+        Gio.AppInfo.launch_default_for_uri_async(uri, launch_context, None, on_launched)
+
+    async def context(self, _result: Result) -> list[ContextOption]:
+        return []
+
+    def activate_context(self, _result: Result, _option_id: int) -> None:
+        pass
+
+    def release_listings(self) -> None:
+        for listing in self._listings.values():
+            listing.close()
+        self._listings.clear()
+
+    def _get_listing(self, path: str) -> DirListing | None:
+        listing = self._listings.get(path)
+        if listing and (listing.stale or (listing.complete and listing.mtime != _get_mtime(path))):
+            del self._listings[path]
+            listing.close()
+            listing = None
+        if listing:
+            metrics.increment("file_browser_cache_hits")
+            self._listings.move_to_end(path)
+            return listing
+
+        metrics.increment("file_browser_cache_misses")
+        if not os.path.isdir(path):
+            return None
+        try:
+            listing = DirListing(path)
+        except GLib.Error as e:
+            logger.warning("Could not list the directory %s: %s", path, e.message)
+            return None
+        self._listings[path] = listing
+        while len(self._listings) > MAX_CACHED_DIRS:
+            self._listings.popitem(last=False)[1].close()
+        return listing
+
+    def _filter(
+        self, entries: Sequence[_FileEntry], name_filter: str, best: Sequence[_FileEntry] = ()
+    ) -> list[_FileEntry]:
+        """
+        :returns: the best matches for the filter among the entries and the best matches of the previous entries:
+          names starting with it first, then names containing it
+        """
+        lower_filter = name_filter.lower()
+        show_hidden = lower_filter.startswith(".")
+        matches = (
+            entry for entry in entries if lower_filter in entry.lower_name and (show_hidden or not entry.is_hidden)
+        )
+        return heapq.nsmallest(
+            MAX_RESULTS,
+            itertools.chain(best, matches),
+            key=lambda entry: (not entry.lower_name.startswith(lower_filter), entry.lower_name),
+        )
+
+    def _get_results(self, dir_path: str, entries: list[_FileEntry]) -> list[Result]:
+        paths = {}
+        results = []
+        for entry in entries:
+            result_id = next(self._result_ids)
+            path = os.path.join(dir_path, entry.name)
+            paths[result_id] = path
+            name = f"{entry.display_name}/" if entry.is_dir else entry.display_name
+            results.append(Result(result_id, name, path, entry.get_icon_name(), searchable=False))
+        self._recent_results.append(paths)
+        return results
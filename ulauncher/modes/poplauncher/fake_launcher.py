@@ -0,0 +1,228 @@
+"""
+Stand-in for the pop-launcher binary, speaking the same JSON lines protocol on stdin/stdout.
+
+Point the "pop_launcher_command" setting to it to run Ulauncher without pop-launcher and its plugins.
+It has three modes:
+
+Synthetic responses with tunable latency, jitter, payload size and bursts:
+    python -m ulauncher.modes.poplauncher.fake_launcher --latency 20 --jitter 5 --items 50
+
+Record a real session (timestamped requests and responses) while proxying to the real backend:
+    python -m ulauncher.modes.poplauncher.fake_launcher --record session.jsonl -- pop-launcher
+
+Replay a recorded session, answering the Nth request of each kind (Search, Context, ...) with the responses
+recorded for the Nth request of that kind. Requests beyond the recording get empty answers:
+    python -m ulauncher.modes.poplauncher.fake_launcher --replay session.jsonl --speed max
+
+With --plugin it speaks the plugin protocol instead, to be run as a stub pop-launcher plugin by the plugin host.
+Plugin executables don't get arguments, so point the plugin.ron "bin" to a script like:
+    #!/bin/sh
+    exec python3 -m ulauncher.modes.poplauncher.fake_launcher --plugin --latency 20 --items 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import IO, Any
+
+from ulauncher.modes.poplauncher.plugin_ipc import PluginRequest, PluginResponse
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopRequest, PopResponse, SearchResult
+
+
+def write_line(line: str) -> None:
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+def make_results(query: str, items: int, description_length: int) -> list[SearchResult]:
+    description = ("Synthetic result " * (description_length // 17 + 1))[:description_length]
+    return [
+        {
+            "id": index,
+            "name": f"{query} {index}",
+            "description": description,
+            "icon": {"Name": "application-x-executable"},
+        }
+        for index in range(items)
+    ]
+
+
+def serve_synthetic(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    results: list[SearchResult] = []
+    for line in sys.stdin:
+        request = PopRequest.from_json(line)
+        delay = max(0.0, args.latency + rng.uniform(-args.jitter, args.jitter)) / 1000
+        if delay:
+            time.sleep(delay)
+
+        match request:
+            case PopRequest.Search(query):
+                # Slicing gives the plain str value (str() of a message gives its repr)
+                results = make_results(query[:], args.items, args.description_length)
+                for _ in range(args.burst):
+                    write_line(PopResponse.Update(results).to_json())
+            case PopRequest.Activate():
+                write_line(PopResponse.Close().to_json())
+            case PopRequest.Complete(id):
+                name = next((result["name"] for result in results if result["id"] == id), "")
+                write_line(PopResponse.Fill(name).to_json())
+            case PopRequest.Context(id):
+                write_line(PopResponse.Context(id=int(id), options=[]).to_json())
+            case PopRequest.Exit() | PopRequest.Quit():
+                return
+
+
+def serve_plugin(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    for line in sys.stdin:
+        request = PluginRequest.from_json(line)
+        match request:
+            case PluginRequest.Search(query):
+                delay = max(0.0, args.latency + rng.uniform(-args.jitter, args.jitter)) / 1000
+                if delay:
+                    time.sleep(delay)
+                for result in make_results(query[:], args.items, args.description_length):
+                    write_line(PluginResponse.Append(**result).to_json())
+                write_line(PluginResponse.Finished().to_json())
+            case PluginRequest.Activate():
+                write_line(PopResponse.Close().to_json())
+            case PluginRequest.Exit():
+                return
+
+
+def record_session(args: argparse.Namespace) -> None:
+    started_at = time.monotonic()
+    lock = threading.Lock()
+    with open(args.record, "w") as recording:
+
+        def log(direction: str, line: str) -> None:
+            entry = {"t": round(time.monotonic() - started_at, 6), "dir": direction, "line": line.rstrip("\n")}
+            with lock:
+                recording.write(json.dumps(entry) + "\n")
+                recording.flush()
+
+        with subprocess.Popen(args.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True) as backend:
+            assert backend.stdin
+            assert backend.stdout
+
+            def forward_requests(backend_stdin: IO[str]) -> None:
+                for line in sys.stdin:
+                    log("request", line)
+                    backend_stdin.write(line)
+                    backend_stdin.flush()
+                backend_stdin.close()
+
+            threading.Thread(target=forward_requests, args=(backend.stdin,), daemon=True).start()
+            for line in backend.stdout:
+                log("response", line)
+                write_line(line.rstrip("\n"))
+
+
+def get_message_name(line: str) -> str:
+    """
+    The name of a message, ex "Search" for {"Search": "fire"} or "Close" for "Close"
+    """
+    message = json.loads(line)
+    return message if isinstance(message, str) else next(iter(message))
+
+
+def load_exchanges(path: str) -> dict[str, deque[list[dict[str, Any]]]]:
+    """
+    Pair each recorded request with its responses, by request name.
+
+    Requests are sent ahead of their responses when typing, so the responses can't be attached to the request
+    just before them. pop-launcher answers the searches in order, so the Nth Update answers the Nth Search.
+    Other responses answer the oldest request that isn't a Search and wasn't answered yet, or else (Updates that
+    don't answer a search) belong to the latest request.
+    """
+    exchanges: dict[str, deque[list[dict[str, Any]]]] = defaultdict(deque)
+    unanswered_searches: deque[list[dict[str, Any]]] = deque()
+    unanswered_requests: deque[list[dict[str, Any]]] = deque()
+    latest: list[dict[str, Any]] | None = None
+    for line in Path(path).read_text().splitlines():
+        entry = json.loads(line)
+        name = get_message_name(entry["line"])
+        if entry["dir"] == "request":
+            latest = [entry]
+            exchanges[name].append(latest)
+            (unanswered_searches if name == "Search" else unanswered_requests).append(latest)
+        elif name == "Update" and unanswered_searches:
+            unanswered_searches.popleft().append(entry)
+        elif name != "Update" and unanswered_requests:
+            unanswered_requests.popleft().append(entry)
+        elif latest:
+            latest.append(entry)
+    return exchanges
+
+
+def get_empty_answer(line: str) -> str | None:
+    """
+    The answer to a request that isn't in the recording, for the requests that expect one
+    """
+    match PopRequest.from_json(line):
+        case PopRequest.Search():
+            return PopResponse.Update([]).to_json()
+        case PopRequest.Context(id):
+            return PopResponse.Context(id=int(id), options=[]).to_json()
+    return None
+
+
+def replay_session(args: argparse.Namespace) -> None:
+    exchanges = load_exchanges(args.replay)
+    for line in sys.stdin:
+        received_at = time.monotonic()
+        name = get_message_name(line)
+        if name in ("Exit", "Quit"):
+            return
+        if not exchanges[name]:
+            if answer := get_empty_answer(line):
+                write_line(answer)
+            continue
+        request, *responses = exchanges[name].popleft()
+        for response in responses:
+            if args.speed != "max":
+                due = received_at + (response["t"] - request["t"]) / float(args.speed)
+                time.sleep(max(0.0, due - time.monotonic()))
+            write_line(response["line"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0, help="Response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="Random +/- variation of the latency in ms")
+    parser.add_argument("--items", type=int, default=10, help="Number of results per Update")
+    parser.add_argument("--description-length", type=int, default=40, help="Length of each result description")
+    parser.add_argument("--burst", type=int, default=1, help="Number of Updates sent for each search")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the jitter, for reproducible runs")
+    parser.add_argument("--plugin", action="store_true", help="Act as a pop-launcher plugin")
+    parser.add_argument("--record", metavar="FILE", help="Record the session with the given backend command")
+    parser.add_argument("--replay", metavar="FILE", help="Replay a recorded session")
+    parser.add_argument("--speed", default="1", help='Replay speed multiplier, or "max" to not wait at all')
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Backend command to record (after --)")
+    args = parser.parse_args()
+    if args.command and args.command[0] == "--":
+        args.command = args.command[1:]
+
+    if args.record:
+        if not args.command:
+            parser.error("--record requires the backend command to record, ex: --record FILE -- pop-launcher")
+        record_session(args)
+    elif args.replay:
+        replay_session(args)
+    elif args.plugin:
+        serve_plugin(args)
+    else:
+        serve_synthetic(args)
+
+
+if __name__ == "__main__":
+    main()
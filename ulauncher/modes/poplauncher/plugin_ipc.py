@@ -0,0 +1,95 @@
+"""
+Messages between a launcher and the pop-launcher plugin executables it runs
+(the same JSON lines protocol pop-launcher uses to talk to its plugins)
+"""
+
+from ulauncher.modes.poplauncher.jsonproto import JsonProtocol, Msg
+from ulauncher.modes.poplauncher.poplauncher_ipc import PopResponse
+
+
+class PluginRequest(JsonProtocol):
+    class Activate(Msg, int):
+        ...
+
+    class ActivateContext(Msg.obj):
+        id: int
+        context: int
+
+    class Complete(Msg, int):
+        ...
+
+    class Context(Msg, int):
+        ...
+
+    class Exit(Msg):
+        ...
+
+    class Interrupt(Msg):
+        ...
+
+    class Quit(Msg, int):
+        ...
+
+    class Search(Msg, str):
+        ...
+
+
+TPluginRequest = (
+    PluginRequest.Activate
+    | PluginRequest.ActivateContext
+    | PluginRequest.Complete
+    | PluginRequest.Context
+    | PluginRequest.Exit
+    | PluginRequest.Interrupt
+    | PluginRequest.Quit
+    | PluginRequest.Search
+)
+
+
+class PluginResponse(JsonProtocol):
+    class Append(Msg.obj):
+        """
+        One search result. The id is only unique within the plugin
+        """
+
+        id: int
+        name: str
+        description: str
+        keywords: list[str] | None = None
+        icon: dict[str, str] | None = None
+        exec: str | None = None
+        window: tuple[int, int] | None = None
+
+    class Clear(Msg):
+        ...
+
+    class Finished(Msg):
+        ...
+
+    # Responses to activation are the same as the ones pop-launcher sends, so they're handled the same way
+    Close = PopResponse.Close
+    Context = PopResponse.Context
+    DesktopEntry = PopResponse.DesktopEntry
+    Fill = PopResponse.Fill
+
+
+TPluginResponse = (
+    PluginResponse.Append
+    | PluginResponse.Clear
+    | PluginResponse.Finished
+    | PopResponse.Close
+    | PopResponse.Context
+    | PopResponse.DesktopEntry
+    | PopResponse.Fill
+)
+
+if __name__ == "__main__":
+    assert PluginRequest.from_json('"Interrupt"').to_json() == '"Interrupt"'
+    assert PluginRequest.from_json('{"Search": "fire"}').to_json() == '{"Search": "fire"}'
+    append = PluginResponse.from_json('{"Append": {"id": 1, "name": "name", "description": "desc"}}')
+    assert isinstance(append, PluginResponse.Append)
+    assert append.id == 1
+    assert append.icon is None
+    assert isinstance(PluginResponse.from_json('"Finished"'), PluginResponse.Finished)
+    assert isinstance(PluginResponse.from_json('"Close"'), PopResponse.Close)
+    assert isinstance(PluginResponse.from_json('{"Fill": "str"}'), PopResponse.Fill)
@@ -0,0 +1,215 @@
+"""
+Discovery of pop-launcher plugins, and a minimal parser for their plugin.ron config files.
+
+Only the subset of RON (Rusty Object Notation) that plugin configs use is supported:
+structs and tuples, lists, strings, numbers, booleans, unit values and enum variants like Name("icon").
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ulauncher.modes.poplauncher.result import get_icon_name
+from ulauncher.utils.Settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Ranking of the plugin results, higher first
+PRIORITIES = {"High": 1, "Default": 0, "Low": -1}
+# The application search plugin, replaced by the in-process app index
+DESKTOP_ENTRIES_PLUGIN = "desktop_entries"
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<space>(?:\s+|//[^\n]*|/\*.*?\*/)+)
+    | (?P<string>"(?:[^"\\]|\\.)*")
+    | (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+    | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<punct>[()\[\]{}:,])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def get_plugin_dirs() -> list[str]:
+    """
+    :returns: the dirs pop-launcher looks for plugins in, in the order of precedence
+    """
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return [f"{data_home}/pop-launcher/plugins", "/etc/pop-launcher/plugins", "/usr/lib/pop-launcher/plugins"]
+
+
+def _tokenize(text: str) -> list[tuple[str, str]]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match:
+            msg = f"Unexpected character {text[position]!r} at position {position}"
+            raise ValueError(msg)
+        kind = match.lastgroup or ""
+        if kind != "space":
+            tokens.append((kind, match.group()))
+        position = match.end()
+    return tokens
+
+
+class _RonParser:
+    def __init__(self, text: str) -> None:
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def peek(self) -> str:
+        return self.tokens[self.position][1] if self.position < len(self.tokens) else ""
+
+    def next(self) -> tuple[str, str]:
+        if self.position >= len(self.tokens):
+            msg = "Unexpected end of input"
+            raise ValueError(msg)
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expect(self, value: str) -> None:
+        _kind, token = self.next()
+        if token != value:
+            msg = f"Expected {value!r}, got {token!r}"
+            raise ValueError(msg)
+
+    def parse_value(self) -> Any:
+        kind, token = self.next()
+        if kind == "string":
+            # RON strings use the same escapes as JSON for everything plugin configs contain
+            return json.loads(token)
+        if kind == "number":
+            return float(token) if any(char in token for char in ".eE") else int(token)
+        if token == "[":
+            return self.parse_sequence("]")
+        if token == "(":
+            return self.parse_struct()
+        if kind == "ident":
+            return self.parse_ident(token)
+        msg = f"Unexpected token {token!r}"
+        raise ValueError(msg)
+
+    def parse_ident(self, token: str) -> Any:
+        """
+        Parse a boolean, an option, or an enum variant (as its name, or as {name: value} if it has a value)
+        """
+        if token in ("true", "false"):
+            return token == "true"
+        if token == "None":
+            return None
+        if self.peek() != "(":
+            return token
+        self.next()
+        value = self.parse_struct()
+        return value if token == "Some" else {token: value}
+
+    def parse_sequence(self, end: str) -> list[Any]:
+        values = []
+        while self.peek() != end:
+            values.append(self.parse_value())
+            if self.peek() == ",":
+                self.next()
+        self.next()
+        return values
+
+    def parse_struct(self) -> Any:
+        """
+        Parse the contents of parentheses: named fields as a dict, a single value as itself,
+        and several values as a list
+        """
+        is_named = self.position + 1 < len(self.tokens) and self.tokens[self.position + 1][1] == ":"
+        if not is_named:
+            values = self.parse_sequence(")")
+            return values[0] if len(values) == 1 else values
+        fields = {}
+        while self.peek() != ")":
+            _kind, name = self.next()
+            self.expect(":")
+            fields[name] = self.parse_value()
+            if self.peek() == ",":
+                self.next()
+        self.next()
+        return fields
+
+
+def parse_ron(text: str) -> Any:
+    parser = _RonParser(text)
+    value = parser.parse_value()
+    if parser.position != len(parser.tokens):
+        msg = f"Unexpected token {parser.peek()!r} after the value"
+        raise ValueError(msg)
+    return value
+
+
+@dataclass
+class PluginConfig:
+    # Name of the plugin dir
+    name: str
+    # Absolute path of the plugin executable
+    bin_path: str
+    # Only search the plugin for queries matching this regex (if given)
+    regex: re.Pattern[str] | None = None
+    # Search only this plugin when the regex matches
+    isolate: bool = False
+    priority: int = 0
+    # Name of the icon pop-launcher gives the plugin results as their category icon
+    icon: str = ""
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> PluginConfig:
+        path = Path(path)
+        config = parse_ron(path.read_text())
+        query = config.get("query") or {}
+        regex = query.get("regex")
+        return cls(
+            name=path.parent.name,
+            bin_path=str(path.parent / config["bin"]["path"]),
+            regex=re.compile(regex) if regex else None,
+            isolate=bool(query.get("isolate")),
+            priority=PRIORITIES.get(query.get("priority", "Default"), 0),
+            icon=get_icon_name(config.get("icon")),
+        )
+
+
+def find_plugins(plugin_dirs: list[str] | None = None) -> list[PluginConfig]:
+    """
+    Find the plugins in the plugin dirs. A plugin in an earlier dir overrides one with the same dir name in later dirs
+    """
+    plugins: dict[str, PluginConfig] = {}
+    for plugin_dir in plugin_dirs or get_plugin_dirs():
+        if not os.path.isdir(plugin_dir):
+            continue
+        for entry in sorted(os.scandir(plugin_dir), key=lambda entry: entry.name):
+            config_path = os.path.join(entry.path, "plugin.ron")
+            if entry.name in plugins or not os.path.isfile(config_path):
+                continue
+            try:
+                plugins[entry.name] = PluginConfig.from_file(config_path)
+            except (OSError, ValueError, KeyError, TypeError, re.error):
+                logger.exception("Could not load the pop-launcher plugin config %s", config_path)
+    return list(plugins.values())
+
+
+def get_replaced_plugins(settings: Settings) -> set[str]:
+    """
+    :returns: the names of the plugins that in-process result providers replace
+    """
+    if settings.enable_application_mode and settings.in_process_app_index:
+        return {DESKTOP_ENTRIES_PLUGIN}
+    return set()
+
+
+def get_category_icons(plugin_names: set[str], plugin_dirs: list[str] | None = None) -> set[str]:
+    """
+    :returns: the category icons of the results of the plugins, which tell their results apart in pop-launcher Updates
+    """
+    return {config.icon for config in find_plugins(plugin_dirs) if config.name in plugin_names and config.icon}
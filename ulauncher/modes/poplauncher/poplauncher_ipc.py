@@ -17,6 +17,9 @@ class PopRequest(JsonProtocol):
     class Context(Msg, int):
         ...
 
+    class Exit(Msg):
+        ...
+
     class Quit(Msg, int):
         ...
 
@@ -24,7 +27,16 @@ class PopRequest(JsonProtocol):
         ...
 
 
-TPopRequest = PopRequest.Activate | PopRequest.ActivateContext | PopRequest.Complete | PopRequest.Context | PopRequest.Quit | PopRequest.Search
+TPopRequest = (
+    PopRequest.Activate
+    | PopRequest.ActivateContext
+    | PopRequest.Complete
+    | PopRequest.Context
+    | PopRequest.Exit
+    | PopRequest.Quit
+    | PopRequest.Search
+)
+
 
 class _IconSourceName(TypedDict):
     Name: str
@@ -1,35 +1,75 @@
 from __future__ import annotations
 
+from collections.abc import Collection
 from dataclasses import dataclass
-from typing import Any
 
-DEFAULT_ACTION = True  #  keep window open and do nothing
+from ulauncher.modes.poplauncher.poplauncher_ipc import SearchResult
 
-@dataclass
+
+def get_icon_name(icon_source: dict[str, str] | None) -> str:
+    """
+    Get the icon name from a pop-launcher IconSource ({"Name": name} or {"Mime": mime type})
+    """
+    if not icon_source:
+        return ""
+    if "Name" in icon_source:
+        return icon_source["Name"]
+    # Icon themes name the mime type icons like the mime type, but with "-" instead of "/"
+    return icon_source.get("Mime", "").replace("/", "-")
+
+
+# Not frozen, because that makes the construction ~3x slower. Results are never modified after they're built
+@dataclass(slots=True)
 class Result:
-    on_enter: Any
+    # The pop-launcher id of the result. Activation is dispatched with it through the result provider
+    id: int = 0
+    name: str = ""
+    description: str = ""
+    icon: str = ""
     # Controls whether the title will be highligthed based on the query.
     searchable: bool = True
     compact: bool = False
     highlightable: bool = False
-    name: str = ""
-    description: str = ""
-    # keyword: str = ""
-    icon: str = ""
-    # context: tuple[ResultContext, ...] = ()
+
+    @classmethod
+    def from_search_result(cls, search_result: SearchResult) -> Result:
+        return cls(
+            search_result["id"],
+            search_result["name"],
+            search_result["description"],
+            get_icon_name(search_result.get("icon")),  # type: ignore[arg-type]
+        )
 
     def get_highlightable_input(self, query: str) -> str | None:
         # if self.keyword and self.keyword == query.keyword:
         #     return query.argument
         return str(query)
 
-
-    def on_activation(self, query: str, alt: bool = False) -> Any:
-        """
-        Handle the main action
-        """
-        handler = getattr(self, "on_alt_enter" if alt else "on_enter", DEFAULT_ACTION)
-        return handler(query) if callable(handler) else handler
-
     def get_description(self, _query: str) -> str:
         return self.description
+
+
+@dataclass(slots=True)
+class ResultBatch:
+    """
+    The result model of an Update, built by the threaded pop-launcher reader. When the main loop falls behind,
+    the reader replaces the unhandled batch with the newer one, so a batch can stand for several Updates
+    (each answering its own Search), of which only the newest results are kept.
+    """
+
+    results: tuple[Result, ...]
+    # The number of Updates this batch answers
+    updates: int = 1
+
+
+def results_from_update(update: list[SearchResult], hidden_categories: Collection[str] = ()) -> tuple[Result, ...]:
+    """
+    Build the (immutable) result model of an Update, without the results with the hidden category icons
+    """
+    if hidden_categories:
+        update = [
+            row
+            for row in update
+            if get_icon_name(row.get("category_icon")) not in hidden_categories  # type: ignore[arg-type]
+        ]
+    return tuple(map(Result.from_search_result, update))
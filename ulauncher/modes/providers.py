@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+
+from ulauncher.core.PopLauncherClient import TResponse
+from ulauncher.core.ResultFanout import ResultFanout
+from ulauncher.core.ResultProvider import ResultProvider
+from ulauncher.modes.apps.AppProvider import AppProvider
+from ulauncher.modes.BackendLifecycle import Backend
+from ulauncher.modes.calc.CalcProvider import CalcProvider
+from ulauncher.modes.CoreWorkerProvider import CoreWorkerProvider
+from ulauncher.modes.file_browser.FileBrowserProvider import FileBrowserProvider
+from ulauncher.modes.PluginHost import PluginHost
+from ulauncher.modes.PopLauncher import PopLauncherProvider
+from ulauncher.modes.poplauncher.plugins import get_replaced_plugins
+from ulauncher.utils.Settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def create_result_provider(
+    settings: Settings, on_response: Callable[[TResponse], None]
+) -> tuple[ResultFanout, Backend]:
+    """
+    Create the result providers enabled in the settings, merged by a ResultFanout
+
+    Args:
+        on_response: Handles the responses of the backend that don't answer a request (Close, Fill, ...)
+
+    Returns:
+        The fan-out, and the backend processes behind it (pop-launcher, the hosted plugins, or the search core worker)
+    """
+    providers: list[ResultProvider]
+    backend: Backend
+    if settings.search_core == "worker":
+        if settings.host_pop_launcher_plugins:
+            logger.warning("The search core worker runs pop-launcher, host_pop_launcher_plugins is ignored")
+        worker = CoreWorkerProvider(on_response)
+        providers = [worker]
+        backend = worker
+    elif settings.host_pop_launcher_plugins:
+        plugin_host = PluginHost(
+            on_response, settings.plugin_timeout_ms, replaced_plugins=get_replaced_plugins(settings)
+        )
+        providers = list(plugin_host.providers)
+        backend = plugin_host
+    else:
+        pop_launcher = PopLauncherProvider(on_response)
+        providers = [pop_launcher]
+        backend = pop_launcher
+    if settings.enable_application_mode and settings.in_process_app_index:
+        providers.append(AppProvider())
+    if settings.enable_calculator:
+        providers.append(CalcProvider())
+    if settings.enable_file_browser:
+        providers.append(FileBrowserProvider())
+    fanout = ResultFanout(providers, deadline_ms=settings.search_deadline_ms, timeout_ms=settings.search_timeout_ms)
+    return fanout, backend
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from ulauncher.config import PATHS
-from ulauncher.ui.ResultWidget import ResultWidget
-from ulauncher.utils.json_utils import json_load, json_save
+from collections.abc import Callable
 
-query_history_path = f"{PATHS.STATE}/query_history.json"
-query_history = json_load(query_history_path)
+from ulauncher.core.history import get_default_index, release_query_history, remember_pick
+from ulauncher.modes.poplauncher.result import Result
+from ulauncher.ui.ResultWidget import ResultWidget
+from ulauncher.utils import memory
 
 
 class ItemNavigation:
@@ -17,8 +17,9 @@ class ItemNavigation:
 
     index = 0
 
-    def __init__(self, result_widgets: list[ResultWidget]) -> None:
+    def __init__(self, result_widgets: list[ResultWidget], on_select: Callable[[Result], None] | None = None) -> None:
         self.result_widgets = result_widgets
+        self.on_select = on_select
 
     @property
     def selected_item(self) -> ResultWidget | None:
@@ -30,12 +31,7 @@ class ItemNavigation:
         """
         Get the index of the result that should be selected (0 by default)
         """
-        previous_pick = query_history.get(query)
-
-        for index, widget in enumerate(self.result_widgets):
-            if widget.result.searchable and widget.result.name == previous_pick:
-                return index
-        return 0
+        return get_default_index([widget.result for widget in self.result_widgets], query)
 
     def select_default(self, query: str) -> None:
         self.select(self.get_default(query))
@@ -49,6 +45,8 @@ class ItemNavigation:
 
         self.index = index
         self.result_widgets[index].select()
+        if self.on_select:
+            self.on_select(self.result_widgets[index].result)
 
     def go_up(self) -> None:
         self.select((self.index or len(self.result_widgets)) - 1)
@@ -57,14 +55,16 @@ class ItemNavigation:
         next_result = (self.index or 0) + 1
         self.select(next_result if next_result < len(self.result_widgets) else 0)
 
-    def activate(self, query: str, alt: bool = False) -> bool:
+    def activate(self, query: str, alt: bool = False) -> Result:
         """
-        Return boolean - True if Ulauncher window should be kept open
+        Remember the selected result for the query and return it, for the caller to activate
         """
         assert self.selected_item
         result = self.selected_item.result
-        if query and not alt and result.searchable:
-            query_history[str(query)] = result.name
-            json_save(query_history, query_history_path)
+        if not alt:
+            remember_pick(query, result)
+
+        return result
+
 
-        return result.on_activation(query, alt)
+memory.add_release_callback(release_query_history)
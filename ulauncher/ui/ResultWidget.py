@@ -13,7 +13,7 @@ from ulauncher.utils.wm import get_text_scaling_factor
 
 ELLIPSIZE_MIN_LENGTH = 6
 ELLIPSIZE_FORCE_AT_LENGTH = 20
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 
 
 class ResultWidget(Gtk.Box):
@@ -39,7 +39,7 @@ class ResultWidget(Gtk.Box):
         self.add_css_class("item-frame")
 
         # Create click gesture for mouse clicks
-        click_gesture = Gtk.GestureClick()
+        click_gesture = Gtk.GestureClick(button=0)  # any button, right click opens the context options
         click_gesture.connect("released", self.on_click)
         self.add_controller(click_gesture)
 
@@ -158,11 +158,7 @@ class ResultWidget(Gtk.Box):
         window = self.get_root()
         window.select_result(self.index)  # type: ignore[attr-defined]
         alt = gesture.get_current_button() != 1  # right click
-        result = window.results_nav.activate(self.query, alt=alt)  # type: ignore[attr-defined]
-        if result is False:
-            window.hide_and_clear_input()  # type: ignore[attr-defined]
-        elif result is not None:
-            window.handle_event(result)  # type: ignore[attr-defined]
+        window.activate_selected(alt=alt)  # type: ignore[attr-defined]
 
     def on_mouse_hover(self, _controller: Gtk.EventControllerMotion, _x: float, _y: float) -> None:
         # GTK4: Simplified mouse hover handling
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import json
 import logging
+import time
 from functools import cache
 
-from gi.repository import Gio, Gtk
+from gi.repository import Gio, GLib, Gtk
 
-from ulauncher.config import APP_ID
+from ulauncher.config import APP_ID, PATHS
 from ulauncher.ui.windows.UlauncherWindow import UlauncherWindow
+from ulauncher.utils import allocations, metrics, profiler, tracing
+from ulauncher.utils.Settings import get_settings
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 
 
 class UlauncherApp(Gtk.Application):
@@ -20,6 +24,8 @@ class UlauncherApp(Gtk.Application):
     # new instances sends the signals to the registered one
     # So all methods except __init__ runs on the main app
     _query = ""
+    _activations = 0
+    _metrics_registration_id = 0
     window: UlauncherWindow | None = None
 
     @classmethod
@@ -46,29 +52,112 @@ class UlauncherApp(Gtk.Application):
     def do_startup(self):
         Gtk.Application.do_startup(self)
         Gio.ActionMap.add_action_entries(
-            self, [("set-query", self.activate_query, "s")]
+            self,
+            [
+                ("set-query", self.activate_query, "s"),
+                # Boolean state without parameter: `gapplication action <app-id> tracing` toggles it
+                ("tracing", None, None, "false", self.change_tracing),
+                ("allocations", None, None, "false", self.change_allocation_tracking),
+                # CPU profilers of the main thread: deterministic (pstats) and sampling (collapsed stacks)
+                ("profile", None, None, "false", self.change_profiling),
+                ("sample", None, None, "false", self.change_sampling),
+            ],
         )
 
+    def do_dbus_register(self, connection, object_path):
+        Gtk.Application.do_dbus_register(self, connection, object_path)
+        node_info = Gio.DBusNodeInfo.new_for_xml(metrics.DBUS_INTROSPECTION_XML)
+        self._metrics_registration_id = connection.register_object(
+            object_path, node_info.interfaces[0], self.on_metrics_method_call, None, None
+        )
+        return True
+
+    def do_dbus_unregister(self, connection, object_path):
+        if self._metrics_registration_id:
+            connection.unregister_object(self._metrics_registration_id)
+            self._metrics_registration_id = 0
+        Gtk.Application.do_dbus_unregister(self, connection, object_path)
+
+    def on_metrics_method_call(self, _connection, _sender, _path, _interface, _method, _params, invocation):
+        invocation.return_value(GLib.Variant("(s)", (json.dumps(metrics.snapshot()),)))
+
     def do_activate(self, *_args, **_kwargs):
         self.show_launcher()
 
     def do_command_line(self, *args, **_kwargs):
         # We need to use "--no-window" from the unique CLI invocation here,
         # Can't use config.get_options(), because that's the daemon's initial cli arguments
-        if "--no-window" not in args[0].get_arguments():
+        arguments = args[0].get_arguments()
+        if "--no-window" not in arguments:
             self.activate()
+            for flag in ("-q", "--query"):
+                if flag in arguments[:-1]:
+                    self.query = arguments[arguments.index(flag) + 1]
 
         return 0
 
     def setup(self, _):
         self.hold()  # Keep the app running even without a window
+        if get_settings().preload_window:
+            self.window = UlauncherWindow(application=self)
+            self.window.preload()
 
     def show_launcher(self):
+        activated_at = time.monotonic()
+        mode = "warm" if self._activations else "preloaded" if self.window else "cold"
+        self._activations += 1
         if not self.window:
             self.window = UlauncherWindow(application=self)
         self.window.show()
 
+        def log_first_frame():
+            elapsed_ms = (time.monotonic() - activated_at) * 1000
+            log_level = logging.DEBUG if mode == "warm" else logging.INFO
+            logger.log(log_level, "Activation to first frame (%s): %.1f ms", mode, elapsed_ms)
+
+        self.window.call_after_next_paint(log_first_frame)
+
     def activate_query(self, _action, variant, *_):
         self.activate()
         self.query = variant.get_string()
 
+    def change_tracing(self, action, value, *_):
+        action.set_state(value)
+        enabled = value.get_boolean()
+        tracing.set_enabled(enabled)
+        if enabled:
+            logger.info("Tracing enabled")
+            return
+        trace_path = f"{PATHS.STATE}/trace-{int(time.time())}.json"
+        tracing.dump_chrome_trace(trace_path)
+        logger.info("Tracing disabled. Wrote Chrome trace to %s", trace_path)
+        for name, summary in tracing.get_histograms().items():
+            logger.info("Latency %s (ms): %s", name, summary)
+
+    def change_allocation_tracking(self, action, value, *_):
+        action.set_state(value)
+        enabled = value.get_boolean()
+        if not enabled:
+            for stage, stats in allocations.get_stats().items():
+                logger.info("Allocations in %s: %s", stage, stats)
+        allocations.set_enabled(enabled)
+
+    def change_profiling(self, action, value, *_):
+        action.set_state(value)
+        if value.get_boolean():
+            profiler.start_profile()
+            logger.info("Profiling enabled")
+            return
+        profile_path = f"{PATHS.STATE}/profile-{int(time.time())}.prof"
+        summary = profiler.stop_profile(profile_path)
+        logger.info("Profiling disabled. Wrote pstats to %s\n%s", profile_path, summary)
+
+    def change_sampling(self, action, value, *_):
+        action.set_state(value)
+        if value.get_boolean():
+            profiler.start_sampling()
+            logger.info("Sampling profiler enabled")
+            return
+        samples_path = f"{PATHS.STATE}/samples-{int(time.time())}.folded"
+        samples = profiler.stop_sampling(samples_path)
+        logger.info("Sampling profiler disabled. Wrote %i samples as collapsed stacks to %s", samples, samples_path)
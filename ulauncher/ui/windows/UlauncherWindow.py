@@ -1,21 +1,33 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from collections.abc import Callable, Sequence
 from typing import Any
 
-from gi.repository import Gdk, Gtk
+from gi.repository import Gdk, GLib, Gtk
 
+from ulauncher.core.PopLauncherClient import TResponse
+from ulauncher.core.ResultFanout import ResultFanout
 from ulauncher.modes.apps.launch_app import launch_app
-from ulauncher.modes.PopLauncher import PopLauncherProvider
-from ulauncher.modes.poplauncher.poplauncher_ipc import PopResponse, TPopResponse
-from ulauncher.modes.poplauncher.result import Result
+from ulauncher.modes.BackendLifecycle import BackendLifecycle
+from ulauncher.modes.poplauncher.poplauncher_ipc import ContextOption, PopResponse
+from ulauncher.modes.poplauncher.result import Result, ResultBatch, results_from_update
+from ulauncher.modes.providers import create_result_provider
 from ulauncher.ui.ItemNavigation import ItemNavigation
 from ulauncher.ui.ResultWidget import ResultWidget
+from ulauncher.utils import allocations, memory, metrics, tracing
+from ulauncher.utils.load_icon_surface import DEFAULT_EXE_ICON, load_icon_paintable
 from ulauncher.utils.Settings import get_settings
 from ulauncher.utils.Theme import get_theme_css
 from ulauncher.utils.wm import get_monitor, get_text_scaling_factor
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
+
+# Prefetch the context options of the selected result when the selection has stayed on it this long
+CONTEXT_PREFETCH_DELAY_MS = 150
+CONTEXT_TIMEOUT_S = 2
 
 
 class UlauncherWindow(Gtk.ApplicationWindow):
@@ -24,9 +36,18 @@ class UlauncherWindow(Gtk.ApplicationWindow):
     is_dragging = False
     # layer_shell_enabled = False
     settings = get_settings()
-    _result_provider: PopLauncherProvider # ResultProvider
-
-    def handle_event(self: UlauncherWindow, event: bool | list | str | dict[str, Any] | TPopResponse) -> None:
+    _result_provider: ResultFanout
+    _search_task: asyncio.Task | None = None
+    # The result whose context options are shown instead of the results
+    _context_result: Result | None = None
+    _prefetch_source_id = 0
+    _shown_results: Sequence[Result] = ()
+    # The result widgets were dropped to release memory, and need to be rendered again when shown
+    _results_released = False
+    # The next search is the first one since the window was shown
+    _first_search_since_shown = False
+
+    def handle_event(self: UlauncherWindow, event: bool | list | str | dict[str, Any] | TResponse) -> None:
         """
         Handles event from mode or extension.
 
@@ -42,30 +63,28 @@ class UlauncherWindow(Gtk.ApplicationWindow):
             type="event:activate_custom" -> activates custom controller. Keeps window open if keep_app_open is True
             type="event:..." -> activates extension controller. Keeps window open if keep_app_open is True
         """
+        with tracing.span("handle_event"):
+            self._handle_event(event)
+
+    def _handle_event(self, event: bool | list | str | dict[str, Any] | TResponse) -> None:
         match event:
             case PopResponse.Close():
                 self.hide_and_clear_input()
-            case PopResponse.Context(id=id, options=options):
-                raise NotImplementedError("Context options are not implemented")
+            case PopResponse.Context(id=id):
+                # Context options are returned to the context request by the result provider
+                logger.debug("Ignoring context options of result %s that weren't requested", id)
             case PopResponse.DesktopEntry(path, gpu_preference, action_name):
-                # Launch the .desktop file
-                launch_app(path.rsplit("/",1)[1])
+                # Hide right away, the app is launched in the background
+                self.hide_and_clear_input()
+                launch_app(path, gpu_preference=gpu_preference, action_name=action_name)
             case PopResponse.Update(l):
-                def make_on_enter(id):
-                    def on_enter(query):
-                        self._result_provider.on_enter(id)
-                        return False  # Hide window after activation
-                    return on_enter
-                res = [
-                    Result(
-                        name=r["name"],
-                        description=r["description"],
-                        icon=r.get("icon", {}).get("Name", ""),
-                        on_enter=make_on_enter(r["id"])
-                    )
-                    for r in l
-                ]
-                self.show_results(res)
+                # Update that doesn't answer a search
+                with allocations.stage("model", rows=len(l)):
+                    res = results_from_update(l)
+                self.show_update(res)
+            case ResultBatch(results=res):
+                # Same, but already built into results by the pop-launcher reader thread
+                self.show_update(res)
             case PopResponse.Fill(txt):
                 # Replace the current query with the given text
                 self.app.query = txt
@@ -83,8 +102,14 @@ class UlauncherWindow(Gtk.ApplicationWindow):
         self.set_deletable(False)
         self.set_resizable(False)
         self.set_icon_name("ulauncher")
+        # Context options (being) fetched for the shown results, by result object id
+        self._context_options: dict[int, tuple[Result, asyncio.Task[list[ContextOption]]]] = {}
 
-        self._result_provider = PopLauncherProvider(self.handle_event)
+        self._result_provider, backend = create_result_provider(self.settings, self.handle_event)
+        self._memory_policy = memory.MemoryPolicy(self.release_memory, self.settings.release_memory_when_hidden_s)
+        self._backend_lifecycle = BackendLifecycle(
+            backend, self.settings.backend_lifecycle, self.settings.backend_idle_minutes
+        )
 
         # if LayerShell.is_supported():
         #     self.layer_shell_enabled = LayerShell.enable(self)
@@ -131,7 +156,8 @@ class UlauncherWindow(Gtk.ApplicationWindow):
 
         self.setup_event_controllers(input_box)
 
-        self.position_window()
+        # Positioning (and presenting) happens in show()
+        self.apply_theme()
 
         # this will trigger to show frequent apps if necessary
         self.show_results([])
@@ -183,19 +209,41 @@ class UlauncherWindow(Gtk.ApplicationWindow):
         """
         Triggered by user input
         """
-        self.app._query = self.input.get_text().lstrip()  # noqa: SLF001
-        if self.get_visible():
-            # input_changed can trigger when hiding window
-            self._result_provider.on_query_change(self.app.query)
+        with tracing.span("on_input_changed"):
+            self._context_result = None
+            self.app._query = self.input.get_text().lstrip()  # noqa: SLF001
+            if self.get_visible():
+                # input_changed can trigger when hiding window
+                tracing.keystroke_started()
+                self.start_search(self.app.query)
+
+    def start_search(self, query: str) -> None:
+        """
+        Search for the query, cancelling the search for the previous query if it's still running
+        """
+        if self._search_task:
+            self._search_task.cancel()
+        self._search_task = asyncio.create_task(self._search(query))
+
+    async def _search(self, query: str) -> None:
+        started_at = time.monotonic()
+        late = False
+        async for results in self._result_provider.search(query):
+            if self._first_search_since_shown:
+                # Includes starting the backend, unless it's always on
+                self._first_search_since_shown = False
+                policy = self._backend_lifecycle.policy
+                elapsed_ms = (time.monotonic() - started_at) * 1000
+                metrics.observe(f"first_result.{policy}", elapsed_ms)
+                logger.info("First results since shown (%s backend): %.1f ms", policy, elapsed_ms)
+            self.show_update(results, late=late)
+            late = True
 
     def on_input_activate(self, _):
         """
         Triggered by user input (Enter key)
         """
-        if self.results_nav:
-            result = self.results_nav.activate(self.app.query, alt=False)
-            if result is False:
-                self.hide_and_clear_input()
+        self.activate_selected()
 
     def on_input_key_press(self, _controller: Gtk.EventControllerKey, keyval: int, _keycode: int, state: Gdk.ModifierType) -> bool:
         """
@@ -216,7 +264,7 @@ class UlauncherWindow(Gtk.ApplicationWindow):
             )
 
         if keyname == "Escape":
-            self.hide()
+            self.go_back()
             return True
 
         if self.results_nav:
@@ -237,9 +285,7 @@ class UlauncherWindow(Gtk.ApplicationWindow):
                 return True
 
             if keyname in ("Return", "KP_Enter"):
-                result = self.results_nav.activate(self.app.query, alt=alt)
-                if result is False:
-                    self.hide_and_clear_input()
+                self.activate_selected(alt=alt)
                 return True
             if alt and Gdk.keyval_to_unicode(keyval):
                 event_string = chr(Gdk.keyval_to_unicode(keyval))
@@ -248,6 +294,15 @@ class UlauncherWindow(Gtk.ApplicationWindow):
                     return True
         return False
 
+    def go_back(self) -> None:
+        """
+        Go back from the context options to the results, or else hide the window
+        """
+        if self._context_result:
+            self.hide_context_options()
+        else:
+            self.hide()
+
     def on_mouse_down(self, gesture: Gtk.GestureClick, _n_press: int, x: float, y: float) -> None:
         """
         Move the window on drag
@@ -322,13 +377,47 @@ class UlauncherWindow(Gtk.ApplicationWindow):
             #     # GTK4 doesn't have move() for ApplicationWindow, use present() instead
             #     self.present()
 
+    def preload(self) -> None:
+        """
+        Realize the window without mapping it and warm up the caches used to render the first frame,
+        so the first activation only has to present it
+        """
+        self.realize()
+        load_icon_paintable(DEFAULT_EXE_ICON, self.get_scale_factor())
+        get_monitor(self.settings.render_on_screen != "default-monitor")
+
+    def call_after_next_paint(self, callback: Callable[[], None]) -> None:
+        """
+        Call callback once, after the next frame has been painted
+        """
+        frame_clock = self.get_frame_clock()
+        if not frame_clock:
+            return
+        handler_id = 0
+
+        def on_after_paint(clock: Gdk.FrameClock) -> None:
+            clock.disconnect(handler_id)
+            callback()
+
+        handler_id = frame_clock.connect("after-paint", on_after_paint)
+
     def show(self):
+        # Start the backend (if needed) first, so it starts while the window is being presented
+        backend_started = self._backend_lifecycle.on_shown()
+        self._first_search_since_shown = True
         self.present()
         self.position_window()
 
         if not self.app.query:
             # make sure frequent apps are shown if necessary
             self.show_results([])
+        elif backend_started:
+            # The shown results are from the backend process that was stopped
+            self.start_search(self.app.query)
+        elif self._results_released:
+            self.show_results(self._shown_results)
+        self._results_released = False
+        self._memory_policy.on_shown()
 
         self.input.grab_focus()
 
@@ -338,20 +427,173 @@ class UlauncherWindow(Gtk.ApplicationWindow):
             # GTK4 simplified ungrab
             pass
         super().hide(*args, **kwargs)
+        if self._context_result:
+            self.hide_context_options()
         if self.settings.clear_previous_query:
             self.app.query = ""
+        self._memory_policy.on_hidden()
+        self._backend_lifecycle.on_hidden()
+
+    def release_memory(self, reason: str) -> None:
+        """
+        Release the caches, and the result widgets if the window is hidden. The default icon is loaded again,
+        so the next activation can still render its first frame without loading icons
+        """
+        if not self.get_visible():
+            for _result, task in self._context_options.values():
+                task.cancel()
+            self._context_options.clear()
+            self._show_results([])
+            self._results_released = True
+        memory.release(reason)
+        load_icon_paintable(DEFAULT_EXE_ICON, self.get_scale_factor())
 
     def select_result(self, index):
         if self.results_nav:
             self.results_nav.select(index)
 
+    def activate_selected(self, alt: bool = False) -> None:
+        """
+        Activate the selected result through the result provider, and hide the window
+        """
+        if not self.results_nav:
+            return
+        if self._context_result:
+            result = self._context_result
+            option = self.results_nav.activate(self.app.query)
+            self.hide_and_clear_input()
+            self._result_provider.activate_context(result, option.id)
+            return
+        result = self.results_nav.activate(self.app.query, alt=alt)
+        if alt:
+            self.show_context_options(result)
+            return
+        # Hide before activating, so the window doesn't linger while the activation is being handled
+        self.hide_and_clear_input()
+        self._result_provider.activate(result)
+
     def hide_and_clear_input(self):
         self.input.set_text("")
         self.hide()
 
-    def show_results(self, results: list[Result]) -> None:
+    def on_result_selected(self, result: Result) -> None:
+        """
+        Prefetch the context options of the selected result once the selection has settled,
+        so showing them doesn't wait for the result provider
+        """
+        if self._prefetch_source_id:
+            GLib.source_remove(self._prefetch_source_id)
+        self._prefetch_source_id = GLib.timeout_add(CONTEXT_PREFETCH_DELAY_MS, self._prefetch_context_options, result)
+
+    def _prefetch_context_options(self, result: Result) -> bool:
+        self._prefetch_source_id = 0
+        if id(result) not in self._context_options:
+            metrics.increment("context_prefetches")
+            self._get_context_options(result)
+        return GLib.SOURCE_REMOVE
+
+    def _get_context_options(self, result: Result) -> asyncio.Task[list[ContextOption]]:
+        cached = self._context_options.get(id(result))
+        if cached:
+            return cached[1]
+        task = asyncio.create_task(self._fetch_context_options(result))
+        self._context_options[id(result)] = (result, task)
+        return task
+
+    async def _fetch_context_options(self, result: Result) -> list[ContextOption]:
+        try:
+            async with asyncio.timeout(CONTEXT_TIMEOUT_S):
+                return await self._result_provider.context(result)
+        except TimeoutError:
+            logger.warning("Timed out fetching the context options of %s", result.name)
+        except Exception:
+            logger.exception("Could not fetch the context options of %s", result.name)
+        return []
+
+    def show_context_options(self, result: Result) -> None:
+        """
+        Show the context options of the result in place of the results
+        """
+        cached = self._context_options.get(id(result))
+        if cached and cached[1].done():
+            metrics.increment("context_prefetch_hits")
+            self._show_context_options(result, cached[1].result())
+            return
+        metrics.increment("context_prefetch_misses")
+
+        def on_fetched(task: asyncio.Task[list[ContextOption]]) -> None:
+            selected_item = self.results_nav and self.results_nav.selected_item
+            # Only if the result is still selected (and the user hasn't moved on)
+            if not task.cancelled() and selected_item and selected_item.result is result:
+                self._show_context_options(result, task.result())
+
+        self._get_context_options(result).add_done_callback(on_fetched)
+
+    def _show_context_options(self, result: Result, options: list[ContextOption]) -> None:
+        if not options:
+            logger.info("%s has no context options", result.name)
+            return
+        self._context_result = result
+        icon = result.icon
+        self.show_results(
+            [Result(option["id"], option["name"], "", icon, searchable=False, compact=True) for option in options]
+        )
+
+    def hide_context_options(self) -> None:
+        """
+        Show the results again, with the result the context options were for selected
+        """
+        result = self._context_result
+        self._context_result = None
+        self.show_results(self._shown_results)
+        if self.results_nav:
+            index = next((i for i, shown in enumerate(self._shown_results) if shown is result), None)
+            if index is not None:
+                self.results_nav.select(index)
+
+    def show_update(self, results: Sequence[Result], late: bool = False) -> None:
+        """
+        Show the results of a search.
+        For late results (merged in after the first results for the query were shown) the selected row is kept
+        at the same position, so the result under the cursor doesn't change while the user is about to press enter.
+        """
+        if self._context_result:
+            if late:
+                # Keep showing the context options, and show the results when they're closed
+                self._shown_results = results
+                return
+            self._context_result = None
+        selected_index = self.results_nav.index if late and self.results_nav else 0
+        selected_item = self.results_nav.selected_item if late and self.results_nav else None
+        if selected_item and any(result is selected_item.result for result in results):
+            results = [result for result in results if result is not selected_item.result]
+            results.insert(min(selected_index, len(results)), selected_item.result)
+        else:
+            selected_item = None
+
+        # The prefetched context options only live as long as their results
+        shown = {id(result) for result in results}
+        for key in [key for key in self._context_options if key not in shown]:
+            self._context_options.pop(key)[1].cancel()
+        self._shown_results = results
+        self.show_results(results)
+        if selected_item and self.results_nav:
+            self.results_nav.select(selected_index)
+        if not late and tracing.is_enabled():
+            self.call_after_next_paint(tracing.results_painted)
+
+    def show_results(self, results: Sequence[Result]) -> None:
+        """
+        :param results: Result instances
+        """
+        started_at = time.perf_counter()
+        with tracing.span("show_results"), allocations.stage("widgets") as stage:
+            stage.rows = self._show_results(results)
+        metrics.observe("render", (time.perf_counter() - started_at) * 1000)
+
+    def _show_results(self, results: Sequence[Result]) -> int:
         """
-        :param list results: list of Result instances
+        :returns: the number of rendered rows
         """
         self.results_nav = None
         # GTK4: Remove all children
@@ -365,13 +607,16 @@ class UlauncherWindow(Gtk.ApplicationWindow):
         if not self.input.get_text() and self.settings.max_recent_apps:
             results = []
 
+        results = results[:limit]
         if results:
             result_widgets: list[ResultWidget] = []
-            for index, result in enumerate(results[:limit]):
+            for index, result in enumerate(results):
                 result_widget = ResultWidget(result, index, self.app.query)
                 result_widgets.append(result_widget)
                 self.result_box.append(result_widget)
-            self.results_nav = ItemNavigation(result_widgets)
+            self.results_nav = ItemNavigation(
+                result_widgets, on_select=None if self._context_result else self.on_result_selected
+            )
             self.results_nav.select_default(self.app.query)
 
             self.result_box.set_margin_bottom(10)
@@ -382,3 +627,4 @@ class UlauncherWindow(Gtk.ApplicationWindow):
             # Hide the scroll container completely when empty to avoid any extra spacing
             self.scroll_container.set_visible(False)
         logger.debug("render %s results", len(results))
+        return len(results)
@@ -17,6 +17,39 @@ class Settings:
     terminal_command: str = ""
     theme_name: str = "light"
     arrow_key_aliases: str = "hjkl"
+    # Build and realize the window at startup so the first activation only has to present it
+    preload_window: bool = False
+    # Command for the pop-launcher backend, ex "python3 -m ulauncher.modes.poplauncher.fake_launcher" to test without it
+    pop_launcher_command: str = "pop-launcher"
+    # Decode pop-launcher responses and build results in a reader thread instead of the main loop
+    threaded_response_parsing: bool = False
+    # Show the results that have arrived from the result providers by this deadline after each keystroke,
+    # and merge in later results as they arrive. Providers are cancelled after the timeout
+    search_deadline_ms: int = 50
+    search_timeout_ms: int = 5000
+    # Search the applications with an in-process index instead of the pop-launcher desktop entries plugin
+    # (honors blacklisted_desktop_dirs and disable_desktop_filters)
+    in_process_app_index: bool = False
+    # Evaluate arithmetic queries in-process
+    enable_calculator: bool = True
+    # Run the pop-launcher plugins directly instead of through pop-launcher, with a timeout for each plugin
+    host_pop_launcher_plugins: bool = False
+    plugin_timeout_ms: int = 1000
+    # When pop-launcher (or the hosted plugins) runs: "always-on", "idle-shutdown" (stopped after the window
+    # has been hidden for backend_idle_minutes, and started again when it's shown) or "on-demand" (only while shown)
+    backend_lifecycle: str = "always-on"
+    backend_idle_minutes: int = 10
+    # Browse the files of path queries ("/", "~/") in-process, with the listings streamed and cached
+    enable_file_browser: bool = False
+    # Release the caches and the result widgets when the window has been hidden this long (0 to keep them).
+    # Memory is also released when the system is low on memory
+    release_memory_when_hidden_s: int = 600
+    # Where pop-launcher runs and its results are decoded and ranked: "in-process" (on the main loop), or "worker"
+    # (in a search core worker process). The applications, calculator and files providers always run in-process
+    search_core: str = "in-process"
+    # Log levels by module, ex "ulauncher.modes=DEBUG,ulauncher.ui=WARNING"
+    # (the default is INFO, or DEBUG with --verbose)
+    log_levels: str = ""
     # Additional fields found in the settings file
     blacklisted_desktop_dirs: str = ""
     disable_desktop_filters: bool = False
@@ -6,7 +6,7 @@ from pathlib import Path
 
 from ulauncher.config import PATHS
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 DEFAULT_CSS = """
 * {
   color: inherit;
@@ -0,0 +1,110 @@
+"""
+tracemalloc based accounting of the memory allocated by each stage of turning an Update into widgets
+(protocol decoding, result model build and widget build).
+
+Disabled by default, since tracemalloc slows down every allocation while it's tracing. When enabled, each stage
+records the bytes it retained and its transient peak, so the cost per rendered row can be tracked over time.
+Stages can be nested, the peak of the outer stage includes the peak of the inner one.
+"""
+
+from __future__ import annotations
+
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Self
+
+# Module state rather than an object, so the disabled stage() costs a single global lookup, like tracing.span()
+_enabled = False
+# Whether tracemalloc was started here, and not by someone else (ex PYTHONTRACEMALLOC), who keeps it running
+_started_tracing = False
+_stats: defaultdict[str, dict[str, int]] = defaultdict(lambda: {"count": 0, "rows": 0, "retained": 0, "peak": 0})
+# The stages being run, innermost last
+_open_stages: list[_Stage] = []
+
+
+class _Stage:
+    __slots__ = ("_start", "name", "peak", "rows")
+
+    def __init__(self, name: str, rows: int) -> None:
+        self.name = name
+        # Can be set inside the block, when the number of rows isn't known beforehand
+        self.rows = rows
+        self._start = 0
+        # The highest peak before the last reset of the traced peak (by inner stages)
+        self.peak = 0
+
+    def __enter__(self) -> Self:
+        if _open_stages:
+            # Resetting the peak loses the peak of the outer stage so far
+            outer = _open_stages[-1]
+            outer.peak = max(outer.peak, tracemalloc.get_traced_memory()[1])
+        _open_stages.append(self)
+        tracemalloc.reset_peak()
+        self._start = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *_args: object) -> None:
+        _open_stages.remove(self)
+        current, traced_peak = tracemalloc.get_traced_memory()
+        peak = max(self.peak, traced_peak)
+        if _open_stages:
+            outer = _open_stages[-1]
+            outer.peak = max(outer.peak, peak)
+        stats = _stats[self.name]
+        stats["count"] += 1
+        stats["rows"] += self.rows
+        stats["retained"] += current - self._start
+        stats["peak"] += peak - self._start
+
+
+class _NoopStage:
+    __slots__ = ("rows",)
+
+    def __init__(self) -> None:
+        self.rows = 0
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_args: object) -> None:
+        pass
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    global _enabled, _started_tracing  # noqa: PLW0603
+    _enabled = enabled
+    if enabled:
+        _stats.clear()
+        _open_stages.clear()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+    elif _started_tracing:
+        tracemalloc.stop()
+        _started_tracing = False
+
+
+def stage(name: str, rows: int = 0) -> _Stage | _NoopStage:
+    """
+    Account the allocations of the enclosed block: `with allocations.stage("decode") as s: ...`
+    """
+    return _Stage(name, rows) if _enabled else _NoopStage()
+
+
+def get_stats() -> dict[str, dict[str, Any]]:
+    """
+    :returns: per stage totals, and the average retained and peak bytes per row
+    """
+    summary = {}
+    for name, stats in _stats.items():
+        rows = stats["rows"]
+        summary[name] = {
+            **stats,
+            "retained_per_row": stats["retained"] / rows if rows else None,
+            "peak_per_row": stats["peak"] / rows if rows else None,
+        }
+    return summary
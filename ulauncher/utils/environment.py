@@ -10,7 +10,7 @@ import logging
 import os
 import pathlib
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 
 GDK_BACKEND = os.environ.get("GDK_BACKEND", "").upper()
 XDG_SESSION_TYPE = os.environ.get("XDG_SESSION_TYPE", "").upper()
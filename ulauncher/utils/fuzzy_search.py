@@ -3,17 +3,78 @@ from __future__ import annotations
 import logging
 import unicodedata
 from difflib import Match, SequenceMatcher
-from functools import lru_cache
 
-logger = logging.getLogger()
+from ulauncher.utils import metrics
+from ulauncher.utils.lru_cache import lru_cache
+
+logger = logging.getLogger(__name__)
+
+
+# SequenceMatcher ignores the popular characters of texts this long ("autojunk")
+AUTOJUNK_MIN_LENGTH = 200
+
+
+def _find_longest_match(query: str, text: str, query_lo: int, query_hi: int, text_lo: int, text_hi: int) -> Match:
+    """
+    Same as SequenceMatcher.find_longest_match without junk: the longest block, starting earliest in the query,
+    then earliest in the text. Queries are short, so looking for their substrings with str.find is faster
+    """
+    find = text.find
+    best_index = query_lo
+    best_size = 0
+    # Only blocks longer than the longest one so far are looked for, their size is found by bisection
+    for query_index in range(query_lo, query_hi):
+        if query_index + best_size >= query_hi:
+            break
+        if find(query[query_index : query_index + best_size + 1], text_lo, text_hi) < 0:
+            continue
+        low = best_size + 1
+        high = min(query_hi - query_index, text_hi - text_lo)
+        while low < high:
+            size = (low + high + 1) // 2
+            if find(query[query_index : query_index + size], text_lo, text_hi) < 0:
+                high = size - 1
+            else:
+                low = size
+        best_index = query_index
+        best_size = low
+    if not best_size:
+        return Match(query_lo, text_lo, 0)
+    return Match(best_index, find(query[best_index : best_index + best_size], text_lo, text_hi), best_size)
 
 
 def _get_matching_blocks_native(query: str, text: str) -> list[Match]:
-    return SequenceMatcher(None, query, text).get_matching_blocks()
+    """
+    Same as SequenceMatcher.get_matching_blocks, ~5x faster for short queries (~100x if the query is in the text)
+    """
+    if len(text) >= AUTOJUNK_MIN_LENGTH:
+        return SequenceMatcher(None, query, text).get_matching_blocks()
+    queue = [(0, len(query), 0, len(text))]
+    found = []
+    while queue:
+        query_lo, query_hi, text_lo, text_hi = queue.pop()
+        match = _find_longest_match(query, text, query_lo, query_hi, text_lo, text_hi)
+        query_index, text_index, size = match
+        if size:
+            found.append(match)
+            if query_lo < query_index and text_lo < text_index:
+                queue.append((query_lo, query_index, text_lo, text_index))
+            if query_index + size < query_hi and text_index + size < text_hi:
+                queue.append((query_index + size, query_hi, text_index + size, text_hi))
+    found.sort()
+    # Join the adjacent blocks
+    blocks: list[Match] = []
+    for match in found:
+        if blocks and blocks[-1].a + blocks[-1].size == match.a and blocks[-1].b + blocks[-1].size == match.b:
+            blocks[-1] = Match(blocks[-1].a, blocks[-1].b, blocks[-1].size + match.size)
+        else:
+            blocks.append(match)
+    blocks.append(Match(len(query), len(text), 0))
+    return blocks
 
 
 # Using Levenshtein is ~10x faster, but some older distro releases might not package Levenshtein
-# with these methods. So we fall back on difflib.SequenceMatcher (native Python library) to be sure.
+# with these methods. So we fall back on the same matching as difflib.SequenceMatcher (native Python) to be sure.
 try:
     from Levenshtein import editops, matching_blocks  # type: ignore[import-not-found]
 
@@ -48,3 +109,32 @@ def get_matching_blocks(query: str, text: str) -> tuple[list, int]:
     return output, total_len
 
 
+def get_score(query: str, text: str) -> float:
+    """
+    Uses get_matching_blocks() to figure out how much of the query that matches the text,
+    and tries to weight this to slightly favor shorter results and largely favor word matches
+    :returns: number between 0 and 100
+    """
+    if not query or not text:
+        return 0
+
+    query_len = len(query)
+    text_len = len(text)
+    max_len = max(query_len, text_len)
+    blocks, matching_chars = get_matching_blocks(query, text)
+
+    # Ratio of the query that matches the text
+    base_similarity = matching_chars / query_len
+
+    # Lower the score if the match is in the middle of a word.
+    for index, _ in blocks:
+        is_word_boundary = index == 0 or text[index - 1] == " "
+        if not is_word_boundary:
+            base_similarity -= 0.5 / query_len
+
+    # Rank matches lower for each extra character, to slightly favor shorter ones.
+    return 100 * base_similarity * query_len / (query_len + (max_len - query_len) * 0.001)
+
+
+# Keeps about the matches of the last query against the apps when trimmed
+metrics.register_cache("fuzzy", get_matching_blocks, keep=200)
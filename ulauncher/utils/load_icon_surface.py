@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import logging
-from functools import lru_cache
 from os.path import expanduser, isfile
 
 from gi.repository import Gdk, Gio, Gtk
 
-logger = logging.getLogger()
+from ulauncher.utils import metrics
+from ulauncher.utils.lru_cache import lru_cache
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_EXE_ICON = "application-x-executable"
 
@@ -82,3 +84,6 @@ def load_icon_paintable(icon: str, scale_factor: int = 1) -> Gtk.IconPaintable:
         0
     )
 
+
+# Keeps about the icons of the results shown last when trimmed
+metrics.register_cache("icon", load_icon_paintable, keep=25)
@@ -0,0 +1,82 @@
+"""
+Logging that doesn't block the main loop.
+
+Loggers only put the records on a queue, and a background thread formats and writes them to the
+(size-rotated) log file and the terminal. Levels can be set per module, so debug logging can be enabled
+where it's needed without paying for it everywhere: a disabled logger.debug() call is just a level check.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from ulauncher.utils.logging_color_formatter import ColoredFormatter
+
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s | %(module)s.%(funcName)s():%(lineno)s"
+MAX_LOG_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    """
+    Queues the records as they are. The default QueueHandler formats the message on the logging thread,
+    which is the main loop here, so this defers that to the listener thread.
+    The log arguments must not be mutated after logging, which holds for the values the app logs.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Tracebacks keep their frames (and the locals in them) alive until formatted, so format those now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_log_levels(log_levels: str) -> dict[str, int]:
+    """
+    Parse per-module log levels, ex "ulauncher.modes=DEBUG,ulauncher.ui.windows.UlauncherWindow=WARNING"
+    """
+    levels = {}
+    for item in filter(None, log_levels.split(",")):
+        name, _, level_name = item.strip().partition("=")
+        level = logging.getLevelName(level_name.strip().upper())
+        if not name or not isinstance(level, int):
+            logger.warning("Invalid log level %r, expected <module>=<level>", item)
+            continue
+        levels[name.strip()] = level
+    return levels
+
+
+def setup_logging(log_path: str, verbose: bool, log_levels: str = "") -> QueueListener:
+    """
+    Route the logging through a queue to a background thread that writes to the log file and to the terminal
+    (warnings only, unless verbose). The previous log file is rotated, so log_path is the log of this run.
+
+    :returns: the started listener, which has to be stopped on exit to flush the queue
+    """
+    # The log format doesn't use these, and they're collected for every record
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    file_handler = RotatingFileHandler(log_path, maxBytes=MAX_LOG_BYTES, backupCount=LOG_BACKUPS, delay=True)
+    if os.path.isfile(log_path) and os.path.getsize(log_path):
+        file_handler.doRollover()
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    stream_handler = logging.StreamHandler()
+    stream_handler.setLevel(logging.DEBUG if verbose else logging.WARNING)
+    stream_handler.setFormatter(ColoredFormatter())
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    logging.root.handlers = [_DeferredFormatQueueHandler(log_queue)]
+    logging.root.setLevel(logging.DEBUG if verbose else logging.INFO)
+    listener.start()
+
+    for name, level in parse_log_levels(log_levels).items():
+        logging.getLogger(name).setLevel(level)
+    return listener
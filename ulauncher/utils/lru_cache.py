@@ -0,0 +1,81 @@
+"""
+A least recently used cache decorator like functools.lru_cache, that can also be trimmed to its most recently used
+entries, so releasing memory doesn't throw away the entries that are about to be used again.
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, NamedTuple, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Separates the positional from the keyword arguments in the keys
+_KWARGS_MARK = object()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LruCache(Generic[P, R]):
+    def __init__(self, func: Callable[P, R], maxsize: int) -> None:
+        self._func = func
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, R] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args: P.args, **kwargs: P.kwargs) -> R:
+        key = (*args, _KWARGS_MARK, *kwargs.items()) if kwargs else args
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+        # Exceptions aren't cached, like with functools.lru_cache
+        value = self._func(*args, **kwargs)
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
+
+    def cache_clear(self) -> None:
+        """
+        Drop all the entries and reset the statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = 0
+
+    def cache_trim(self, keep: int) -> None:
+        """
+        Drop all but the `keep` most recently used entries, keeping the statistics
+        """
+        with self._lock:
+            while len(self._entries) > keep:
+                self._entries.popitem(last=False)
+
+
+def lru_cache(maxsize: int) -> Callable[[Callable[P, R]], LruCache[P, R]]:
+    def decorator(func: Callable[P, R]) -> LruCache[P, R]:
+        return LruCache(func, maxsize)
+
+    return decorator
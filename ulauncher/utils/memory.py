@@ -0,0 +1,112 @@
+"""
+Memory policy of the daemon, so it stays cheap while it's idle in the background.
+
+When the launcher has been hidden for a while, or when the system warns that it's low on memory
+(Gio.MemoryMonitor), the memory that can be recomputed is released: the registered caches are trimmed to their
+most recently used entries (which are likely to be needed again right away, ex the icons of the next search),
+the modules drop what they registered a release callback for, and the garbage is collected.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import ctypes
+import gc
+import logging
+import time
+from collections.abc import Callable
+
+from gi.repository import Gio, GLib
+
+from ulauncher.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Low memory warnings are repeated while the pressure lasts, but releasing again right away frees little
+MIN_RELEASE_INTERVAL_S = 30
+
+_release_callbacks: list[Callable[[], None]] = []
+
+
+def add_release_callback(callback: Callable[[], None]) -> None:
+    """
+    Register a callback that drops memory that can be loaded or computed again when needed
+    """
+    _release_callbacks.append(callback)
+
+
+def _malloc_trim() -> None:
+    """
+    Give the free memory at the top of the heap back to the OS. Without it, glibc keeps the freed memory
+    and the resident size doesn't shrink
+    """
+    # Fails if this isn't glibc
+    with contextlib.suppress(OSError, AttributeError):
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+
+
+def release(reason: str) -> None:
+    """
+    Trim the caches, call the release callbacks and collect the garbage, logging the resident memory
+    before and after
+    """
+    resident_before = metrics.get_resident_memory()
+    started_at = time.perf_counter()
+    metrics.trim_caches()
+    for callback in _release_callbacks:
+        callback()
+    collected = gc.collect()
+    _malloc_trim()
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    metrics.increment("memory_releases")
+    metrics.observe("memory_release", elapsed_ms)
+    logger.info(
+        "Released memory (%s) in %.1f ms: resident %.1f MB -> %.1f MB, collected %i objects",
+        reason,
+        elapsed_ms,
+        resident_before / 1024 / 1024,
+        metrics.get_resident_memory() / 1024 / 1024,
+        collected,
+    )
+
+
+class MemoryPolicy:
+    """
+    Decides when to release memory: after the launcher has been hidden for hidden_release_delay_s
+    (0 to never release because of that), and on low memory warnings.
+
+    Args:
+        on_release: Releases the memory, with the reason to log
+    """
+
+    def __init__(self, on_release: Callable[[str], None], hidden_release_delay_s: int) -> None:
+        self.on_release = on_release
+        self.hidden_release_delay_s = hidden_release_delay_s
+        self._released_at = float("-inf")
+        self._hidden_source_id = 0
+        self._monitor = Gio.MemoryMonitor.dup_default()
+        self._monitor.connect("low-memory-warning", self._on_low_memory_warning)
+
+    def on_shown(self) -> None:
+        if self._hidden_source_id:
+            GLib.source_remove(self._hidden_source_id)
+            self._hidden_source_id = 0
+
+    def on_hidden(self) -> None:
+        if self.hidden_release_delay_s > 0 and not self._hidden_source_id:
+            self._hidden_source_id = GLib.timeout_add_seconds(self.hidden_release_delay_s, self._on_hidden_timeout)
+
+    def _release(self, reason: str) -> None:
+        self._released_at = time.monotonic()
+        self.on_release(reason)
+
+    def _on_hidden_timeout(self) -> bool:
+        self._hidden_source_id = 0
+        self._release(f"hidden for {self.hidden_release_delay_s}s")
+        return GLib.SOURCE_REMOVE
+
+    def _on_low_memory_warning(self, _monitor: Gio.MemoryMonitor, level: Gio.MemoryMonitorWarningLevel) -> None:
+        metrics.increment("low_memory_warnings")
+        if time.monotonic() - self._released_at < MIN_RELEASE_INTERVAL_S:
+            return
+        self._release(f"low memory warning, level {int(level)}")
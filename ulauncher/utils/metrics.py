@@ -0,0 +1,126 @@
+"""
+Always-on runtime metrics (counters, latency histograms and cache statistics) of the running daemon.
+
+The metrics are cheap enough to keep enabled in production. UlauncherApp exposes a snapshot over D-Bus,
+which `ulauncher --metrics` prints.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import defaultdict
+from typing import Any
+
+from ulauncher.utils import allocations
+from ulauncher.utils.lru_cache import LruCache
+from ulauncher.utils.tracing import Histogram
+
+DBUS_INTERFACE = "io.ulauncher.Metrics"
+DBUS_INTROSPECTION_XML = f"""
+<node>
+  <interface name="{DBUS_INTERFACE}">
+    <method name="GetMetrics">
+      <arg type="s" name="metrics_json" direction="out"/>
+    </method>
+  </interface>
+</node>
+"""
+
+_started_at = time.monotonic()
+_counters: defaultdict[str, int] = defaultdict(int)
+_histograms: defaultdict[str, Histogram] = defaultdict(Histogram)
+_caches: dict[str, LruCache[..., Any]] = {}
+# The number of most recently used entries of each cache that are kept when the caches are trimmed
+_cache_floors: dict[str, int] = {}
+
+
+def increment(name: str, value: int = 1) -> None:
+    _counters[name] += value
+
+
+def observe(name: str, value_ms: float) -> None:
+    _histograms[name].add(value_ms)
+
+
+def register_cache(name: str, cached_func: LruCache[..., Any], keep: int = 0) -> None:
+    """
+    Register a ulauncher.utils.lru_cache wrapped function to report its hit rate, and to trim it to its `keep`
+    most recently used entries when memory is released
+    """
+    _caches[name] = cached_func
+    _cache_floors[name] = keep
+
+
+def trim_caches() -> None:
+    """
+    Trim the registered caches to their most recently used entries, keeping their statistics
+    """
+    for name, cached_func in _caches.items():
+        cached_func.cache_trim(_cache_floors[name])
+
+
+def get_resident_memory() -> int:
+    """
+    :returns: resident set size of this process in bytes (0 if unavailable)
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def get_process_usage(pid: int, include_children: bool = True) -> tuple[int, int]:
+    """
+    :returns: resident set size in bytes and number of context switches (mostly wakeups) of a process and
+        its descendants ((0, 0) if unavailable)
+    """
+    resident = context_switches = 0
+    child_pids: list[str] = []
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            resident = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/status") as status:
+                context_switches += sum(int(line.split()[1]) for line in status if "ctxt_switches" in line)
+            if include_children:
+                with open(f"/proc/{pid}/task/{tid}/children") as children:
+                    child_pids += children.read().split()
+    except (OSError, ValueError, IndexError):
+        pass  # Exited, or /proc isn't available
+    for child_pid in child_pids:
+        child_resident, child_context_switches = get_process_usage(int(child_pid))
+        resident += child_resident
+        context_switches += child_context_switches
+    return resident, context_switches
+
+
+def get_cache_stats() -> dict[str, dict[str, Any]]:
+    stats = {}
+    for name, cached_func in _caches.items():
+        info = cached_func.cache_info()
+        hits = info.hits
+        misses = info.misses
+        lookups = hits + misses
+        stats[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else None,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+        }
+    return stats
+
+
+def snapshot() -> dict[str, Any]:
+    data = {
+        "uptime_s": round(time.monotonic() - _started_at, 1),
+        "resident_memory_bytes": get_resident_memory(),
+        "counters": dict(_counters),
+        "histograms_ms": {name: histogram.summary() for name, histogram in _histograms.items()},
+        "caches": get_cache_stats(),
+    }
+    if allocations.is_enabled():
+        data["allocations"] = allocations.get_stats()
+    return data
@@ -0,0 +1,66 @@
+"""
+Requests to another process that are answered asynchronously by key, ex the context options of a result by its id
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class _Pending(Generic[T]):
+    __slots__ = ("future", "waiters")
+
+    def __init__(self, future: asyncio.Future[T]) -> None:
+        self.future = future
+        self.waiters = 0
+
+
+class PendingRequests(Generic[K, T]):
+    """
+    Concurrent requests for the same key share the request sent and its answer, instead of replacing each other.
+    A request is dropped when all its callers have given up (ex timed out), so the next one is sent again.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[K, _Pending[T]] = {}
+
+    async def request(self, key: K, send: Callable[[], bool], default: T) -> T:
+        """
+        :param send: Sends the request, returns False if it could not be sent
+        :returns: the answer, or the default if the request could not be sent (or was resolved without an answer)
+        """
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = _Pending(asyncio.get_running_loop().create_future())
+            self._pending[key] = pending
+            if not send():
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+                return default
+        pending.waiters += 1
+        try:
+            # Shielded, because a caller giving up must not cancel the answer the others wait for
+            return await asyncio.shield(pending.future)
+        finally:
+            pending.waiters -= 1
+            if not pending.waiters and self._pending.get(key) is pending:
+                del self._pending[key]
+
+    def resolve(self, key: K, answer: T) -> None:
+        pending = self._pending.pop(key, None)
+        if pending and not pending.future.done():
+            pending.future.set_result(answer)
+
+    def resolve_all(self, answer: T) -> None:
+        """
+        Resolve all the pending requests without their answer (ex when the process they were sent to has exited)
+        """
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_result(answer)
+        self._pending.clear()
@@ -0,0 +1,122 @@
+"""
+On-demand CPU profiling of the running daemon, toggled with application actions, ex:
+    gapplication action io.ulauncher.Ulauncher profile   (start, and again to stop)
+
+Two profilers are available:
+- profile: deterministic (cProfile) profile of the main thread, dumped as pstats
+  (`python -m pstats <file>`, snakeviz). Exact call counts, but it slows down every Python call.
+- sample: samples the stack of the main thread every few milliseconds from a background thread, dumped as
+  collapsed stacks (flamegraph.pl, https://www.speedscope.app). Cheap enough for real usage. Time the main
+  loop spends waiting for events is sampled as the stack that started it (Gtk.Application.run).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+
+SAMPLE_INTERVAL_S = 0.005
+SUMMARY_ROWS = 15
+
+# The running profilers, as module state since there's at most one of each per process
+_profile: cProfile.Profile | None = None
+_sampler: _Sampler | None = None
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self._frame_names: dict[CodeType, str] = {}
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # noqa: SLF001
+            stack = []
+            while frame:
+                stack.append(self._get_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def _get_frame_name(self, code: CodeType) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            # ";" separates the frames in the collapsed stack format
+            name = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+            self._frame_names[code] = name
+        return name
+
+
+def is_profiling() -> bool:
+    return _profile is not None
+
+
+def start_profile() -> None:
+    """
+    Start the deterministic profiler. It profiles the calling thread (the main thread)
+    """
+    global _profile  # noqa: PLW0603
+    if _profile is None:
+        _profile = cProfile.Profile()
+        _profile.enable()
+
+
+def stop_profile(path: str | Path) -> str:
+    """
+    Stop the deterministic profiler and dump the pstats to path
+    :returns: a summary of the functions with the most cumulative time
+    """
+    global _profile  # noqa: PLW0603
+    if _profile is None:
+        return ""
+    profile = _profile
+    _profile = None
+    profile.disable()
+    profile.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profile, stream=summary).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_ROWS)
+    return summary.getvalue()
+
+
+def is_sampling() -> bool:
+    return _sampler is not None
+
+
+def start_sampling(interval: float = SAMPLE_INTERVAL_S) -> None:
+    """
+    Start sampling the stack of the calling thread (the main thread)
+    """
+    global _sampler  # noqa: PLW0603
+    if _sampler is None:
+        _sampler = _Sampler(threading.get_ident(), interval)
+        _sampler.start()
+
+
+def stop_sampling(path: str | Path) -> int:
+    """
+    Stop sampling and write the samples to path as collapsed stacks ("frame;frame;frame count" lines)
+    :returns: the number of samples
+    """
+    global _sampler  # noqa: PLW0603
+    if _sampler is None:
+        return 0
+    sampler = _sampler
+    _sampler = None
+    sampler.stop()
+    Path(path).write_text("".join(f"{';'.join(stack)} {count}\n" for stack, count in sampler.stacks.items()))
+    return sum(sampler.stacks.values())
@@ -0,0 +1,166 @@
+"""
+Latency tracing for the keystroke -> IPC -> render pipeline.
+
+Spans are recorded with monotonic timestamps and kept in memory, both as Chrome trace events
+(load the dumped file in chrome://tracing or https://ui.perfetto.dev) and as rolling latency histograms.
+Tracing is disabled by default, and then span() only costs a global lookup and a no-op context manager.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Self
+
+MAX_EVENTS = 100_000
+HISTOGRAM_SIZE = 1000
+
+# Module state rather than an object, so the disabled span() costs a single global lookup of _enabled
+_enabled = False
+_events: deque[dict[str, Any]] = deque(maxlen=MAX_EVENTS)
+_histograms: dict[str, Histogram] = {}
+_pending_keystrokes: deque[int] = deque(maxlen=100)
+_superseded_results = 0
+
+
+class Histogram:
+    """
+    Rolling window of the most recent durations (in ms)
+    """
+
+    def __init__(self, size: int = HISTOGRAM_SIZE) -> None:
+        self.samples: deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+
+    def summary(self) -> dict[str, float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"count": self.count}
+
+        def percentile(fraction: float) -> float:
+            return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+        return {
+            "count": self.count,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": ordered[-1],
+        }
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = 0
+
+    def __enter__(self) -> Self:
+        self.start = time.monotonic_ns()
+        return self
+
+    def __exit__(self, *_args: object) -> None:
+        record(self.name, self.start, time.monotonic_ns())
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_args: object) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    global _enabled, _superseded_results  # noqa: PLW0603
+    _enabled = enabled
+    if enabled:
+        _events.clear()
+        _histograms.clear()
+        _pending_keystrokes.clear()
+        _superseded_results = 0
+
+
+def span(name: str) -> _Span | _NoopSpan:
+    """
+    Time the enclosed block: `with tracing.span("name"): ...`
+    """
+    return _Span(name) if _enabled else _NOOP_SPAN
+
+
+def record(name: str, start_ns: int, end_ns: int, tid: int | None = None) -> None:
+    duration_us = (end_ns - start_ns) / 1000
+    _events.append(
+        {
+            "name": name,
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": duration_us,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id() if tid is None else tid,
+        }
+    )
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = Histogram()
+    histogram.add(duration_us / 1000)
+
+
+def keystroke_started() -> None:
+    """
+    Mark the start of a keystroke, which ends when the results for it have been painted
+    """
+    if _enabled:
+        _pending_keystrokes.append(time.monotonic_ns())
+
+
+def results_superseded(count: int) -> None:
+    """
+    Mark results as dropped before rendering, because newer results replaced them.
+    Their keystrokes end when the newer results are painted.
+    """
+    global _superseded_results  # noqa: PLW0603
+    if _enabled:
+        _superseded_results += count
+
+
+def results_painted() -> None:
+    """
+    Mark the results for the oldest pending keystroke as painted.
+    Results arrive in the same order as the searches were sent, so they can be matched first in, first out.
+    """
+    global _superseded_results  # noqa: PLW0603
+    if not _enabled:
+        return
+    painted_at = time.monotonic_ns()
+    for _ in range(_superseded_results + 1):
+        if _pending_keystrokes:
+            # Keystrokes can overlap each other, so they get their own track instead of the main thread's
+            record("keystroke", _pending_keystrokes.popleft(), painted_at, tid=0)
+    _superseded_results = 0
+
+
+def get_histograms() -> dict[str, dict[str, float]]:
+    return {name: histogram.summary() for name, histogram in _histograms.items()}
+
+
+def dump_chrome_trace(path: str | Path) -> None:
+    Path(path).write_text(json.dumps({"traceEvents": list(_events), "displayTimeUnit": "ms"}))
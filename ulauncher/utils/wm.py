@@ -4,7 +4,7 @@ import logging
 
 from gi.repository import Gdk, Gio  # type: ignore[attr-defined]
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 
 
 def get_monitor(use_mouse_position: bool = False) -> Gdk.Monitor | None: